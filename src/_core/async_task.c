@@ -34,6 +34,9 @@ typedef enum {
     KOMPARU_ASYNC_COMPARE_DIR,
     KOMPARU_ASYNC_COMPARE_ARCHIVE,
     KOMPARU_ASYNC_COMPARE_DIR_URLS,
+    KOMPARU_ASYNC_FINGERPRINT,
+    KOMPARU_ASYNC_OPEN_SHARED,
+    KOMPARU_ASYNC_STAT,
 } komparu_async_type_t;
 
 /* Task lifecycle states (CAS transitions only):
@@ -53,10 +56,15 @@ typedef enum {
 struct komparu_async_task {
     komparu_async_type_t type;
 
-    /* Notification fds */
+    /* Notification fds (per-task mode only; -1 when chan is set) */
     int read_fd;
     int write_fd;
 
+    /* Shared completion channel (NULL = per-task fd mode) */
+    komparu_async_chan_t *chan;
+    komparu_async_done_t *done;     /* preallocated completion record */
+    uint64_t id;
+
     /* Common inputs (owned copies) */
     char *source_a;
     char *source_b;
@@ -72,9 +80,17 @@ struct komparu_async_task {
     bool verify_ssl;
     bool allow_private;
     char *proxy;             /* Owned copy, or NULL */
+    komparu_file_map_t *map_a;  /* Shared mapping of source_a (open_shared:
+                                 * the output), or NULL */
+    komparu_reader_t guard;     /* Cancellation guard around reader A */
+    komparu_reader_t *inner_a;  /* Reader wrapped by guard */
+
+    /* Fingerprint-specific */
+    bool samples;           /* Quick check sample points only */
 
     /* Dir-specific */
     bool follow_symlinks;
+    bool trust_mtime;
     size_t max_workers;
 
     /* Archive-specific */
@@ -83,14 +99,22 @@ struct komparu_async_task {
     int64_t max_entries;
     int64_t max_entry_name_length;
     int hash_compare;
+    size_t parallel_workers;
 
     /* Dir_urls-specific */
-    char **url_rel_paths;   /* owned copies */
-    char **url_urls;        /* owned copies */
+    void *url_block;        /* owns both arrays and their strings */
+    const char **url_rel_paths;
+    const char **url_urls;
     size_t url_count;
 
+    /* Stat-specific */
+    char **stat_paths;      /* one block: pointers, then the strings */
+    komparu_stat_entry_t *stats;
+    size_t stat_count;
+
     /* Output */
     komparu_result_t cmp_result;
+    uint64_t digest[3];             /* fingerprint tasks */
     komparu_dir_result_t *dir_result;
     char error_buf[512];
     bool has_error;
@@ -233,6 +257,117 @@ static void notify_close(int read_fd, int write_fd) {
 
 #endif /* KOMPARU_WINDOWS */
 
+/* =========================================================================
+ * Completion channel — one notification fd shared by many tasks
+ *
+ * Finished tasks are pushed onto a Treiber stack (multi-producer CAS
+ * push) and the fd is signalled only on the empty -> non-empty edge;
+ * the event loop detaches the whole stack with one atomic exchange, so
+ * there is no lock and no ABA (there is only one consumer and it never
+ * pops single nodes). Each task preallocates its stack node at submit
+ * time, so a worker never allocates on completion.
+ * Refcounted: the Python handle and each attached task hold a reference.
+ * ========================================================================= */
+
+struct komparu_async_chan {
+    int read_fd;
+    int write_fd;
+    _Atomic(komparu_async_done_t *) head;   /* newest first */
+    _Atomic size_t refcount;
+};
+
+/* Consume pending wakeup bytes so a level-triggered reader goes quiet. */
+static void notify_consume(int read_fd) {
+#ifdef KOMPARU_WINDOWS
+    char buf[256];
+    while (recv((SOCKET)(intptr_t)read_fd, buf, sizeof(buf), 0) > 0);
+#elif defined(KOMPARU_LINUX)
+    uint64_t val;
+    while (read(read_fd, &val, sizeof(val)) < 0 && errno == EINTR);
+#else
+    char buf[256];
+    for (;;) {
+        ssize_t n = read(read_fd, buf, sizeof(buf));
+        if (n > 0) continue;
+        if (n < 0 && errno == EINTR) continue;
+        break;
+    }
+#endif
+}
+
+komparu_async_chan_t *komparu_async_chan_new(const char **err_msg) {
+    komparu_async_chan_t *chan = calloc(1, sizeof(*chan));
+    if (!chan) {
+        *err_msg = "out of memory";
+        return NULL;
+    }
+    if (notify_create(&chan->read_fd, &chan->write_fd) != 0) {
+        *err_msg = "failed to create notification fd";
+        free(chan);
+        return NULL;
+    }
+    atomic_init(&chan->head, NULL);
+    atomic_init(&chan->refcount, 1);
+    return chan;
+}
+
+static void chan_retain(komparu_async_chan_t *chan) {
+    atomic_fetch_add_explicit(&chan->refcount, 1, memory_order_relaxed);
+}
+
+void komparu_async_chan_release(komparu_async_chan_t *chan) {
+    if (!chan) return;
+    if (atomic_fetch_sub_explicit(&chan->refcount, 1, memory_order_acq_rel) != 1)
+        return;
+    notify_close(chan->read_fd, chan->write_fd);
+    komparu_async_done_free(atomic_load_explicit(&chan->head, memory_order_acquire));
+    free(chan);
+}
+
+int komparu_async_chan_fd(komparu_async_chan_t *chan) {
+    return chan->read_fd;
+}
+
+/* Push a finished task's preallocated record; wake the loop only when
+ * the stack goes from empty to non-empty. Later pushes ride on the
+ * wakeup already pending, so a burst of completions costs one write(). */
+static void chan_push(komparu_async_chan_t *chan, komparu_async_done_t *node) {
+    komparu_async_done_t *head = atomic_load_explicit(&chan->head, memory_order_relaxed);
+    do {
+        node->next = head;
+    } while (!atomic_compare_exchange_weak_explicit(&chan->head, &head, node,
+                memory_order_release, memory_order_relaxed));
+    if (!head) notify_signal(chan->write_fd);
+}
+
+komparu_async_done_t *komparu_async_chan_take(komparu_async_chan_t *chan) {
+    /* Consume before detaching: the exchange leaves the stack empty, so
+     * the next push sees NULL and signals again — no completion is left
+     * without a wakeup. At worst a push between the two steps yields one
+     * spurious, empty wakeup. */
+    notify_consume(chan->read_fd);
+
+    komparu_async_done_t *node = atomic_exchange_explicit(&chan->head, NULL,
+                                                          memory_order_acquire);
+    /* Reverse to completion order */
+    komparu_async_done_t *fifo = NULL;
+    while (node) {
+        komparu_async_done_t *next = node->next;
+        node->next = fifo;
+        fifo = node;
+        node = next;
+    }
+    return fifo;
+}
+
+void komparu_async_done_free(komparu_async_done_t *list) {
+    while (list) {
+        komparu_async_done_t *next = list->next;
+        free(list);
+        list = next;
+    }
+}
+
 /* =========================================================================
  * Global async pool — lazily initialized
  * ========================================================================= */
@@ -278,11 +413,23 @@ static void task_free_internals(komparu_async_task_t *task);
  * ========================================================================= */
 
 static void worker_finish(komparu_async_task_t *task) {
+    /* Once DONE is published Python may free the task at any moment, so
+     * the channel and record are captured first. The task's channel
+     * reference and record pass to this thread on DONE. */
+    komparu_async_chan_t *chan = task->chan;
+    komparu_async_done_t *done = task->done;
+    if (done) done->id = task->id;
+
     int expected = KOMPARU_TASK_RUNNING;
     if (atomic_compare_exchange_strong_explicit(&task->state, &expected,
             KOMPARU_TASK_DONE, memory_order_acq_rel, memory_order_acquire)) {
         /* Normal completion — Python will read result and free. */
-        notify_signal(task->write_fd);
+        if (chan) {
+            chan_push(chan, done);
+            komparu_async_chan_release(chan);
+        } else {
+            notify_signal(task->write_fd);
+        }
     } else {
         /* ORPHANED: Python discarded the handle. We own the memory. */
         task_free_internals(task);
@@ -290,6 +437,70 @@ static void worker_finish(komparu_async_task_t *task) {
     }
 }
 
+/* =========================================================================
+ * Cancellation guard — pass-through reader that fails once the task is
+ * orphaned, so an abandoned comparison stops at its next chunk instead
+ * of reading both sources to the end. Lives inside the task: no alloc.
+ * ========================================================================= */
+
+static int64_t guard_read(komparu_reader_t *self, void *buf, size_t size) {
+    komparu_async_task_t *task = (komparu_async_task_t *)self->ctx;
+    if (KOMPARU_UNLIKELY(atomic_load_explicit(&task->state, memory_order_relaxed)
+                         == KOMPARU_TASK_ORPHANED)) {
+        return -1;
+    }
+    return task->inner_a->read(task->inner_a, buf, size);
+}
+
+static int64_t guard_read_view(komparu_reader_t *self, const void **view, size_t size) {
+    komparu_async_task_t *task = (komparu_async_task_t *)self->ctx;
+    if (KOMPARU_UNLIKELY(atomic_load_explicit(&task->state, memory_order_relaxed)
+                         == KOMPARU_TASK_ORPHANED)) {
+        return -1;
+    }
+    return task->inner_a->read_view(task->inner_a, view, size);
+}
+
+static int64_t guard_read_compare(komparu_reader_t *self, const void *other, size_t size) {
+    komparu_async_task_t *task = (komparu_async_task_t *)self->ctx;
+    if (KOMPARU_UNLIKELY(atomic_load_explicit(&task->state, memory_order_relaxed)
+                         == KOMPARU_TASK_ORPHANED)) {
+        return -1;
+    }
+    return task->inner_a->read_compare(task->inner_a, other, size);
+}
+
+static int64_t guard_get_size(komparu_reader_t *self) {
+    komparu_async_task_t *task = (komparu_async_task_t *)self->ctx;
+    return task->inner_a->get_size(task->inner_a);
+}
+
+static int guard_seek(komparu_reader_t *self, int64_t offset) {
+    komparu_async_task_t *task = (komparu_async_task_t *)self->ctx;
+    return task->inner_a->seek(task->inner_a, offset);
+}
+
+static void guard_close(komparu_reader_t *self) {
+    komparu_async_task_t *task = (komparu_async_task_t *)self->ctx;
+    task->inner_a->close(task->inner_a);
+    task->inner_a = NULL;
+}
+
+static komparu_reader_t *guard_wrap(komparu_async_task_t *task, komparu_reader_t *inner) {
+    task->inner_a = inner;
+    task->guard = (komparu_reader_t){
+        .read = guard_read,
+        .read_view = inner->read_view ? guard_read_view : NULL,
+        .read_compare = inner->read_compare ? guard_read_compare : NULL,
+        .get_size = guard_get_size,
+        .seek = inner->seek ? guard_seek : NULL,
+        .close = guard_close,
+        .ctx = task,
+        .source_name = inner->source_name,
+    };
+    return &task->guard;
+}
+
 /* =========================================================================
  * Worker: file/URL comparison
  * ========================================================================= */
@@ -322,6 +533,8 @@ static void compare_worker(void *arg) {
             task->timeout, task->follow_redirects,
             task->verify_ssl, task->allow_private,
             task->proxy, &err);
+    } else if (task->map_a) {
+        ra = komparu_reader_file_from_map(task->map_a, &err);
     } else {
         ra = komparu_reader_file_open(task->source_a, &err);
     }
@@ -333,16 +546,18 @@ static void compare_worker(void *arg) {
         worker_finish(task);
         return;
     }
+    ra = guard_wrap(task, ra);
 
     /* Open reader B */
     komparu_reader_t *rb;
     if (is_url(task->source_b)) {
-        rb = komparu_reader_http_open_ex(
+        /* A local A bounds how much of B opening needs to fetch */
+        rb = komparu_reader_http_open_sized(
             task->source_b,
             (const char **)task->headers,
             task->timeout, task->follow_redirects,
             task->verify_ssl, task->allow_private,
-            task->proxy, &err);
+            task->proxy, is_url(task->source_a) ? -1 : ra->get_size(ra), &err);
     } else {
         rb = komparu_reader_file_open(task->source_b, &err);
     }
@@ -388,6 +603,98 @@ static void compare_worker(void *arg) {
     worker_finish(task);
 }
 
+/* =========================================================================
+ * Worker: source fingerprint
+ * ========================================================================= */
+
+static void fingerprint_worker(void *arg) {
+    komparu_async_task_t *task = (komparu_async_task_t *)arg;
+    const char *err = NULL;
+
+    komparu_reader_t *r;
+    if (is_url(task->source_a)) {
+        r = komparu_reader_http_open_ex(
+            task->source_a,
+            (const char **)task->headers,
+            task->timeout, task->follow_redirects,
+            task->verify_ssl, task->allow_private,
+            task->proxy, &err);
+    } else {
+        r = komparu_reader_file_open(task->source_a, &err);
+    }
+    if (KOMPARU_UNLIKELY(!r)) {
+        snprintf(task->error_buf, sizeof(task->error_buf),
+                 "cannot open '%s': %s", task->source_a,
+                 err ? err : "unknown error");
+        task->has_error = true;
+        worker_finish(task);
+        return;
+    }
+    r = guard_wrap(task, r);
+
+    int rc = task->samples
+        ? komparu_fingerprint_samples(r, task->chunk_size, task->digest, &err)
+        : komparu_fingerprint(r, task->chunk_size, task->digest, &err);
+    if (rc != 0) {
+        snprintf(task->error_buf, sizeof(task->error_buf),
+                 "read error: %s", err ? err : "unknown");
+        task->has_error = true;
+    }
+
+    r->close(r);
+    worker_finish(task);
+}
+
+/* =========================================================================
+ * Worker: shared source mapping
+ * ========================================================================= */
+
+static void open_shared_worker(void *arg) {
+    komparu_async_task_t *task = (komparu_async_task_t *)arg;
+    const char *err = NULL;
+
+    task->map_a = komparu_file_map_open(task->source_a, &err);
+    if (!task->map_a) {
+        snprintf(task->error_buf, sizeof(task->error_buf),
+                 "cannot map '%s': %s", task->source_a,
+                 err ? err : "unknown error");
+        task->has_error = true;
+    }
+
+    worker_finish(task);
+}
+
+/* =========================================================================
+ * Worker: stat of many paths
+ * ========================================================================= */
+
+static void stat_worker(void *arg) {
+    komparu_async_task_t *task = (komparu_async_task_t *)arg;
+
+#ifndef KOMPARU_WINDOWS
+    for (size_t i = 0; i < task->stat_count; i++) {
+        const char *path = task->stat_paths[i];
+        komparu_stat_entry_t *e = &task->stats[i];
+        struct stat st;
+        if (strstr(path, "://") || stat(path, &st) != 0) continue;
+        e->ok = true;
+        e->mode = (uint32_t)st.st_mode;
+        e->dev = (uint64_t)st.st_dev;
+        e->ino = (uint64_t)st.st_ino;
+        e->size = (int64_t)st.st_size;
+#ifdef KOMPARU_MACOS
+        e->mtime_ns = (int64_t)st.st_mtimespec.tv_sec * 1000000000 + st.st_mtimespec.tv_nsec;
+        e->ctime_ns = (int64_t)st.st_ctimespec.tv_sec * 1000000000 + st.st_ctimespec.tv_nsec;
+#else
+        e->mtime_ns = (int64_t)st.st_mtim.tv_sec * 1000000000 + st.st_mtim.tv_nsec;
+        e->ctime_ns = (int64_t)st.st_ctim.tv_sec * 1000000000 + st.st_ctim.tv_nsec;
+#endif
+    }
+#endif
+
+    worker_finish(task);
+}
+
 /* =========================================================================
  * Worker: directory comparison
  * ========================================================================= */
@@ -399,7 +706,7 @@ static void compare_dir_worker(void *arg) {
     task->dir_result = komparu_compare_dirs(
         task->source_a, task->source_b,
         task->chunk_size, task->size_precheck,
-        task->quick_check, task->follow_symlinks,
+        task->quick_check, task->trust_mtime, task->follow_symlinks,
         task->max_workers, &err);
 
     if (!task->dir_result) {
@@ -440,7 +747,16 @@ static void compare_archive_worker(void *arg) {
     }
 #endif
 
-    if (task->hash_compare) {
+    if (task->parallel_workers != 1) {
+        task->dir_result = komparu_compare_archives_parallel(
+            task->source_a, task->source_b,
+            task->parallel_workers,
+            task->max_decompressed_size,
+            task->max_compression_ratio,
+            task->max_entries,
+            task->max_entry_name_length,
+            NULL, &err);
+    } else if (task->hash_compare) {
         task->dir_result = komparu_compare_archives_hashed(
             task->source_a, task->source_b,
             task->max_decompressed_size,
@@ -479,8 +795,8 @@ static void compare_dir_urls_worker(void *arg) {
 
     task->dir_result = komparu_compare_dir_urls(
         task->source_a,
-        (const char **)task->url_rel_paths,
-        (const char **)task->url_urls,
+        task->url_rel_paths,
+        task->url_urls,
         task->url_count,
         (const char **)task->headers,
         task->chunk_size,
@@ -491,6 +807,7 @@ static void compare_dir_urls_worker(void *arg) {
         task->verify_ssl,
         task->allow_private,
         task->proxy,
+        task->max_workers,
         &err);
 
     if (!task->dir_result) {
@@ -507,10 +824,13 @@ static void compare_dir_urls_worker(void *arg) {
  * Allocate and init a task
  * ========================================================================= */
 
+static _Atomic uint64_t g_next_task_id = 1;
+
 static komparu_async_task_t *task_alloc(
     komparu_async_type_t type,
     const char *source_a,
     const char *source_b,
+    komparu_async_chan_t *chan,
     const char **err_msg
 ) {
     komparu_async_task_t *task = calloc(1, sizeof(*task));
@@ -523,8 +843,18 @@ static komparu_async_task_t *task_alloc(
     task->read_fd = -1;
     task->write_fd = -1;
     task->cmp_result = KOMPARU_ERROR;
+    task->id = atomic_fetch_add_explicit(&g_next_task_id, 1, memory_order_relaxed);
 
-    if (notify_create(&task->read_fd, &task->write_fd) != 0) {
+    if (chan) {
+        task->done = malloc(sizeof(*task->done));
+        if (!task->done) {
+            *err_msg = "out of memory";
+            free(task);
+            return NULL;
+        }
+        chan_retain(chan);
+        task->chan = chan;
+    } else if (notify_create(&task->read_fd, &task->write_fd) != 0) {
         *err_msg = "failed to create notification fd";
         free(task);
         return NULL;
@@ -542,6 +872,26 @@ static komparu_async_task_t *task_alloc(
     return task;
 }
 
+/* Copy a NULL-terminated header array into the task. -1 on OOM. */
+static int task_copy_headers(komparu_async_task_t *task, const char **headers) {
+    if (!headers) return 0;
+    size_t count = 0;
+    while (headers[count]) count++;
+    if (count == 0) return 0;
+
+    task->headers = calloc(count + 1, sizeof(char *));
+    if (!task->headers) return -1;
+    for (size_t i = 0; i < count; i++) {
+        task->headers[i] = strdup(headers[i]);
+        if (!task->headers[i]) {
+            task->header_count = i;
+            return -1;
+        }
+    }
+    task->header_count = count;
+    return 0;
+}
+
 /* =========================================================================
  * Public API
  * ========================================================================= */
@@ -558,6 +908,8 @@ komparu_async_task_t *komparu_async_compare(
     bool verify_ssl,
     bool allow_private,
     const char *proxy,
+    komparu_file_map_t *shared_a,
+    komparu_async_chan_t *chan,
     const char **err_msg
 ) {
     komparu_pool_t *pool = get_pool();
@@ -567,33 +919,14 @@ komparu_async_task_t *komparu_async_compare(
     }
 
     komparu_async_task_t *task = task_alloc(
-        KOMPARU_ASYNC_COMPARE, source_a, source_b, err_msg);
+        KOMPARU_ASYNC_COMPARE, source_a, source_b, chan, err_msg);
     if (!task) return NULL;
 
-    /* Copy headers */
-    if (headers) {
-        size_t count = 0;
-        while (headers[count]) count++;
-        if (count > 0) {
-            task->headers = calloc(count + 1, sizeof(char *));
-            if (!task->headers) {
-                *err_msg = "out of memory";
-                task_free_internals(task);
-                free(task);
-                return NULL;
-            }
-            for (size_t i = 0; i < count; i++) {
-                task->headers[i] = strdup(headers[i]);
-                if (!task->headers[i]) {
-                    task->header_count = i;
-                    *err_msg = "out of memory";
-                    task_free_internals(task);
-                    free(task);
-                    return NULL;
-                }
-            }
-            task->header_count = count;
-        }
+    if (task_copy_headers(task, headers) != 0) {
+        *err_msg = "out of memory";
+        task_free_internals(task);
+        free(task);
+        return NULL;
     }
 
     task->chunk_size = chunk_size ? chunk_size : KOMPARU_DEFAULT_CHUNK_SIZE;
@@ -604,6 +937,10 @@ komparu_async_task_t *komparu_async_compare(
     task->verify_ssl = verify_ssl;
     task->allow_private = allow_private;
     task->proxy = proxy ? strdup(proxy) : NULL;
+    if (shared_a) {
+        komparu_file_map_retain(shared_a);
+        task->map_a = shared_a;
+    }
 
     if (komparu_pool_submit(pool, compare_worker, task) != 0) {
         *err_msg = "async pool queue full";
@@ -615,14 +952,136 @@ komparu_async_task_t *komparu_async_compare(
     return task;
 }
 
+komparu_async_task_t *komparu_async_fingerprint(
+    const char *source,
+    const char **headers,
+    size_t chunk_size,
+    double timeout,
+    bool follow_redirects,
+    bool verify_ssl,
+    bool allow_private,
+    const char *proxy,
+    bool samples,
+    komparu_async_chan_t *chan,
+    const char **err_msg
+) {
+    komparu_pool_t *pool = get_pool();
+    if (!pool) {
+        *err_msg = "failed to create async pool";
+        return NULL;
+    }
+
+    /* source_a = source, source_b = unused placeholder */
+    komparu_async_task_t *task = task_alloc(
+        KOMPARU_ASYNC_FINGERPRINT, source, "", chan, err_msg);
+    if (!task) return NULL;
+
+    if (task_copy_headers(task, headers) != 0) {
+        *err_msg = "out of memory";
+        task_free_internals(task);
+        free(task);
+        return NULL;
+    }
+
+    task->chunk_size = chunk_size ? chunk_size : KOMPARU_DEFAULT_CHUNK_SIZE;
+    task->timeout = timeout > 0 ? timeout : 30.0;
+    task->follow_redirects = follow_redirects;
+    task->verify_ssl = verify_ssl;
+    task->allow_private = allow_private;
+    task->proxy = proxy ? strdup(proxy) : NULL;
+    task->samples = samples;
+
+    if (komparu_pool_submit(pool, fingerprint_worker, task) != 0) {
+        *err_msg = "async pool queue full";
+        task_free_internals(task);
+        free(task);
+        return NULL;
+    }
+
+    return task;
+}
+
+komparu_async_task_t *komparu_async_stat(
+    const char **paths,
+    size_t count,
+    komparu_async_chan_t *chan,
+    const char **err_msg
+) {
+    komparu_pool_t *pool = get_pool();
+    if (!pool) {
+        *err_msg = "failed to create async pool";
+        return NULL;
+    }
+
+    komparu_async_task_t *task = task_alloc(
+        KOMPARU_ASYNC_STAT, "", "", chan, err_msg);
+    if (!task) return NULL;
+
+    size_t bytes = count * sizeof(char *);
+    for (size_t i = 0; i < count; i++) bytes += strlen(paths[i]) + 1;
+    task->stat_paths = malloc(bytes ? bytes : 1);
+    task->stats = calloc(count ? count : 1, sizeof(*task->stats));
+    if (!task->stat_paths || !task->stats) {
+        *err_msg = "out of memory";
+        task_free_internals(task);
+        free(task);
+        return NULL;
+    }
+    char *dst = (char *)(task->stat_paths + count);
+    for (size_t i = 0; i < count; i++) {
+        size_t len = strlen(paths[i]) + 1;
+        memcpy(dst, paths[i], len);
+        task->stat_paths[i] = dst;
+        dst += len;
+    }
+    task->stat_count = count;
+
+    if (komparu_pool_submit(pool, stat_worker, task) != 0) {
+        *err_msg = "async pool queue full";
+        task_free_internals(task);
+        free(task);
+        return NULL;
+    }
+
+    return task;
+}
+
+komparu_async_task_t *komparu_async_open_shared(
+    const char *path,
+    komparu_async_chan_t *chan,
+    const char **err_msg
+) {
+    komparu_pool_t *pool = get_pool();
+    if (!pool) {
+        *err_msg = "failed to create async pool";
+        return NULL;
+    }
+
+    /* source_a = path, source_b = unused placeholder */
+    komparu_async_task_t *task = task_alloc(
+        KOMPARU_ASYNC_OPEN_SHARED, path, "", chan, err_msg);
+    if (!task) return NULL;
+
+    if (komparu_pool_submit(pool, open_shared_worker, task) != 0) {
+        *err_msg = "async pool queue full";
+        task_free_internals(task);
+        free(task);
+        return NULL;
+    }
+
+    return task;
+}
+
 komparu_async_task_t *komparu_async_compare_dir(
     const char *dir_a,
     const char *dir_b,
     size_t chunk_size,
     bool size_precheck,
     bool quick_check,
+    bool trust_mtime,
     bool follow_symlinks,
     size_t max_workers,
+    komparu_async_chan_t *chan,
     const char **err_msg
 ) {
     komparu_pool_t *pool = get_pool();
@@ -632,12 +1091,13 @@ komparu_async_task_t *komparu_async_compare_dir(
     }
 
     komparu_async_task_t *task = task_alloc(
-        KOMPARU_ASYNC_COMPARE_DIR, dir_a, dir_b, err_msg);
+        KOMPARU_ASYNC_COMPARE_DIR, dir_a, dir_b, chan, err_msg);
     if (!task) return NULL;
 
     task->chunk_size = chunk_size ? chunk_size : KOMPARU_DEFAULT_CHUNK_SIZE;
     task->size_precheck = size_precheck;
     task->quick_check = quick_check;
+    task->trust_mtime = trust_mtime;
     task->follow_symlinks = follow_symlinks;
     task->max_workers = max_workers;
 
@@ -660,6 +1120,8 @@ komparu_async_task_t *komparu_async_compare_archive(
     int64_t max_entries,
     int64_t max_entry_name_length,
     int hash_compare,
+    size_t parallel_workers,
+    komparu_async_chan_t *chan,
     const char **err_msg
 ) {
     komparu_pool_t *pool = get_pool();
@@ -669,7 +1131,7 @@ komparu_async_task_t *komparu_async_compare_archive(
     }
 
     komparu_async_task_t *task = task_alloc(
-        KOMPARU_ASYNC_COMPARE_ARCHIVE, path_a, path_b, err_msg);
+        KOMPARU_ASYNC_COMPARE_ARCHIVE, path_a, path_b, chan, err_msg);
     if (!task) return NULL;
 
     task->chunk_size = chunk_size ? chunk_size : KOMPARU_DEFAULT_CHUNK_SIZE;
@@ -678,6 +1140,7 @@ komparu_async_task_t *komparu_async_compare_archive(
     task->max_entries = max_entries;
     task->max_entry_name_length = max_entry_name_length;
     task->hash_compare = hash_compare;
+    task->parallel_workers = parallel_workers;
 
     if (komparu_pool_submit(pool, compare_archive_worker, task) != 0) {
         *err_msg = "async pool queue full";
@@ -703,6 +1166,7 @@ komparu_async_task_t *komparu_async_compare_dir_urls(
     bool verify_ssl,
     bool allow_private,
     const char *proxy,
+    komparu_async_chan_t *chan,
     const char **err_msg
 ) {
     komparu_pool_t *pool = get_pool();
@@ -713,57 +1177,27 @@ komparu_async_task_t *komparu_async_compare_dir_urls(
 
     /* source_a = dir_path, source_b = unused placeholder */
     komparu_async_task_t *task = task_alloc(
-        KOMPARU_ASYNC_COMPARE_DIR_URLS, dir_path, "", err_msg);
+        KOMPARU_ASYNC_COMPARE_DIR_URLS, dir_path, "", chan, err_msg);
     if (!task) return NULL;
 
     /* Copy url map */
     if (url_count > 0) {
-        task->url_rel_paths = calloc(url_count, sizeof(char *));
-        task->url_urls = calloc(url_count, sizeof(char *));
-        if (!task->url_rel_paths || !task->url_urls) {
+        task->url_block = komparu_url_map_copy(
+            rel_paths, urls, url_count, &task->url_rel_paths, &task->url_urls);
+        if (!task->url_block) {
             *err_msg = "out of memory";
             task_free_internals(task);
             free(task);
             return NULL;
         }
-        for (size_t i = 0; i < url_count; i++) {
-            task->url_rel_paths[i] = strdup(rel_paths[i]);
-            task->url_urls[i] = strdup(urls[i]);
-            if (!task->url_rel_paths[i] || !task->url_urls[i]) {
-                task->url_count = i + 1; /* for cleanup */
-                *err_msg = "out of memory";
-                task_free_internals(task);
-                free(task);
-                return NULL;
-            }
-        }
         task->url_count = url_count;
     }
 
-    /* Copy headers */
-    if (headers) {
-        size_t count = 0;
-        while (headers[count]) count++;
-        if (count > 0) {
-            task->headers = calloc(count + 1, sizeof(char *));
-            if (!task->headers) {
-                *err_msg = "out of memory";
-                task_free_internals(task);
-                free(task);
-                return NULL;
-            }
-            for (size_t i = 0; i < count; i++) {
-                task->headers[i] = strdup(headers[i]);
-                if (!task->headers[i]) {
-                    task->header_count = i + 1;
-                    *err_msg = "out of memory";
-                    task_free_internals(task);
-                    free(task);
-                    return NULL;
-                }
-            }
-            task->header_count = count;
-        }
+    if (task_copy_headers(task, headers) != 0) {
+        *err_msg = "out of memory";
+        task_free_internals(task);
+        free(task);
+        return NULL;
     }
 
     task->chunk_size = chunk_size ? chunk_size : KOMPARU_DEFAULT_CHUNK_SIZE;
@@ -786,7 +1220,11 @@ komparu_async_task_t *komparu_async_compare_dir_urls(
 }
 
 int komparu_async_task_fd(komparu_async_task_t *task) {
-    return task->read_fd;
+    return task->chan ? task->chan->read_fd : task->read_fd;
+}
+
+uint64_t komparu_async_task_id(komparu_async_task_t *task) {
+    return task->id;
 }
 
 int komparu_async_task_cmp_result(
@@ -804,6 +1242,43 @@ int komparu_async_task_cmp_result(
     return 0;
 }
 
+int komparu_async_task_digest(
+    komparu_async_task_t *task,
+    uint64_t out[3],
+    const char **err_msg
+) {
+    (void)atomic_load_explicit(&task->state, memory_order_acquire);
+    if (task->has_error) {
+        *err_msg = task->error_buf;
+        return -1;
+    }
+    memcpy(out, task->digest, sizeof(task->digest));
+    return 0;
+}
+
+const komparu_stat_entry_t *komparu_async_task_stats(
+    komparu_async_task_t *task,
+    size_t *count
+) {
+    (void)atomic_load_explicit(&task->state, memory_order_acquire);
+    *count = task->stat_count;
+    return task->stats;
+}
+
+komparu_file_map_t *komparu_async_task_take_map(
+    komparu_async_task_t *task,
+    const char **err_msg
+) {
+    (void)atomic_load_explicit(&task->state, memory_order_acquire);
+    if (task->has_error) {
+        *err_msg = task->error_buf;
+        return NULL;
+    }
+    komparu_file_map_t *map = task->map_a;
+    task->map_a = NULL;  /* transfer ownership */
+    return map;
+}
+
 komparu_dir_result_t *komparu_async_task_dir_result(
     komparu_async_task_t *task,
     const char **err_msg
@@ -822,24 +1297,24 @@ komparu_dir_result_t *komparu_async_task_dir_result(
 /** Free internal resources of a task (does NOT free the task struct). */
 static void task_free_internals(komparu_async_task_t *task) {
     notify_close(task->read_fd, task->write_fd);
+    /* A DONE task's channel reference and record went to worker_finish */
+    if (task->chan && atomic_load_explicit(&task->state, memory_order_acquire)
+            != KOMPARU_TASK_DONE) {
+        free(task->done);
+        komparu_async_chan_release(task->chan);
+    }
     free(task->source_a);
     free(task->source_b);
     free(task->proxy);
+    komparu_file_map_release(task->map_a);
     if (task->headers) {
         for (size_t i = 0; i < task->header_count; i++)
             free(task->headers[i]);
         free(task->headers);
     }
-    if (task->url_rel_paths) {
-        for (size_t i = 0; i < task->url_count; i++)
-            free(task->url_rel_paths[i]);
-        free(task->url_rel_paths);
-    }
-    if (task->url_urls) {
-        for (size_t i = 0; i < task->url_count; i++)
-            free(task->url_urls[i]);
-        free(task->url_urls);
-    }
+    free(task->url_block);
+    free(task->stat_paths);
+    free(task->stats);
     if (task->dir_result)
         komparu_dir_result_free(task->dir_result);
 }
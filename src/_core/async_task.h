@@ -14,8 +14,43 @@
 
 #include "compat.h"
 #include "compare.h"
+#include "reader_file.h"
 
 typedef struct komparu_async_task komparu_async_task_t;
+typedef struct komparu_async_chan komparu_async_chan_t;
+
+/* =========================================================================
+ * Completion channel — shared notification fd for many tasks
+ *
+ * Tasks submitted with a channel do not get their own fd. On completion
+ * the worker pushes the task id onto the channel's lock-free stack and
+ * signals its fd, so the event loop registers one reader for any number
+ * of in-flight tasks.
+ * ========================================================================= */
+
+/** Completed-task record returned by komparu_async_chan_take(). */
+typedef struct komparu_async_done {
+    struct komparu_async_done *next;
+    uint64_t id;
+} komparu_async_done_t;
+
+/** Create a channel (refcount 1). Returns NULL on error. */
+komparu_async_chan_t *komparu_async_chan_new(const char **err_msg);
+
+/** Drop a reference. Freed once the caller and all attached tasks let go. */
+void komparu_async_chan_release(komparu_async_chan_t *chan);
+
+/** Get the read fd for asyncio.loop.add_reader(). */
+int komparu_async_chan_fd(komparu_async_chan_t *chan);
+
+/**
+ * Detach all completed records, oldest first, and consume the wakeup.
+ * Returns NULL if none. Never blocks. Free with komparu_async_done_free().
+ */
+komparu_async_done_t *komparu_async_chan_take(komparu_async_chan_t *chan);
+
+/** Free a list returned by komparu_async_chan_take(). */
+void komparu_async_done_free(komparu_async_done_t *list);
 
 /**
  * Submit an async file/URL comparison.
@@ -25,6 +60,9 @@ typedef struct komparu_async_task komparu_async_task_t;
  * then reads the result with task_cmp_result().
  *
  * headers: NULL-terminated "Key: Value" array (copied), or NULL.
+ * shared_a: mapping of source_a to read from instead of opening it
+ *           (retained by the task), or NULL.
+ * chan: completion channel to report to, or NULL for a per-task fd.
  * Returns NULL on error (pool full, OOM).
  */
 komparu_async_task_t *komparu_async_compare(
@@ -39,6 +77,68 @@ komparu_async_task_t *komparu_async_compare(
     bool verify_ssl,
     bool allow_private,
     const char *proxy,
+    komparu_file_map_t *shared_a,
+    komparu_async_chan_t *chan,
+    const char **err_msg
+);
+
+/**
+ * Submit an async fingerprint of one source (see komparu_fingerprint).
+ *
+ * Read the digest with task_digest() once the task is done.
+ * headers: NULL-terminated "Key: Value" array (copied), or NULL.
+ * Returns NULL on error (pool full, OOM).
+ */
+komparu_async_task_t *komparu_async_fingerprint(
+    const char *source,
+    const char **headers,
+    size_t chunk_size,
+    double timeout,
+    bool follow_redirects,
+    bool verify_ssl,
+    bool allow_private,
+    const char *proxy,
+    bool samples,
+    komparu_async_chan_t *chan,
+    const char **err_msg
+);
+
+/** stat() of one path, as reported by komparu_async_stat(). */
+typedef struct komparu_stat_entry {
+    bool ok;            /* false: URL, stat failed, or not POSIX */
+    uint32_t mode;
+    uint64_t dev;
+    uint64_t ino;
+    int64_t size;
+    int64_t mtime_ns;
+    int64_t ctime_ns;
+} komparu_stat_entry_t;
+
+/**
+ * Submit an async stat() of each path, so the event loop makes no
+ * filesystem call. Paths containing "://" are not stat'ed.
+ *
+ * paths: array of length count (copied).
+ * Read the entries with task_stats() once the task is done.
+ * Returns NULL on error (pool full, OOM).
+ */
+komparu_async_task_t *komparu_async_stat(
+    const char **paths,
+    size_t count,
+    komparu_async_chan_t *chan,
+    const char **err_msg
+);
+
+/**
+ * Submit an async open of a shared source mapping (komparu_file_map_open),
+ * so the open, fstat and mmap run in a pool thread, not the event loop.
+ *
+ * Take the mapping with task_take_map() once the task is done.
+ * Returns NULL on error (pool full, OOM).
+ */
+komparu_async_task_t *komparu_async_open_shared(
+    const char *path,
+    komparu_async_chan_t *chan,
     const char **err_msg
 );
 
@@ -54,14 +154,19 @@ komparu_async_task_t *komparu_async_compare_dir(
     size_t chunk_size,
     bool size_precheck,
     bool quick_check,
+    bool trust_mtime,
     bool follow_symlinks,
     size_t max_workers,
+    komparu_async_chan_t *chan,
     const char **err_msg
 );
 
-/** Get the read fd for asyncio.loop.add_reader(). */
+/** Get the read fd for asyncio.loop.add_reader() (the channel's, if any). */
 int komparu_async_task_fd(komparu_async_task_t *task);
 
+/** Get the task's process-unique id (reported through its channel). */
+uint64_t komparu_async_task_id(komparu_async_task_t *task);
+
 /**
  * Get comparison result. Call only after fd is readable.
  * Returns 0 on success (*out set), -1 on error (*err_msg set).
@@ -72,6 +177,34 @@ int komparu_async_task_cmp_result(
     const char **err_msg
 );
 
+/**
+ * Get fingerprint result. Call only after fd is readable.
+ * Returns 0 on success (out set), -1 on error (*err_msg set).
+ */
+int komparu_async_task_digest(
+    komparu_async_task_t *task,
+    uint64_t out[3],
+    const char **err_msg
+);
+
+/**
+ * Get the entries of a stat task, one per path in submission order
+ * (owned by the task). Call only after fd is readable.
+ */
+const komparu_stat_entry_t *komparu_async_task_stats(
+    komparu_async_task_t *task,
+    size_t *count
+);
+
+/**
+ * Get the mapping of an open_shared task (caller owns the reference).
+ * Call only after fd is readable. Returns NULL on error (*err_msg set).
+ */
+komparu_file_map_t *komparu_async_task_take_map(
+    komparu_async_task_t *task,
+    const char **err_msg
+);
+
 /**
  * Get directory comparison result. Call only after fd is readable.
  * Returns result (caller owns), or NULL on error.
@@ -91,6 +224,7 @@ void komparu_async_task_free(komparu_async_task_t *task);
  * Submit an async archive comparison.
  *
  * Runs komparu_compare_archives() in a C pool worker thread.
+ * parallel_workers != 1 selects komparu_compare_archives_parallel().
  * Returns NULL on error.
  */
 komparu_async_task_t *komparu_async_compare_archive(
@@ -102,6 +236,8 @@ komparu_async_task_t *komparu_async_compare_archive(
     int64_t max_entries,
     int64_t max_entry_name_length,
     int hash_compare,
+    size_t parallel_workers,
+    komparu_async_chan_t *chan,
     const char **err_msg
 );
 
@@ -130,6 +266,7 @@ komparu_async_task_t *komparu_async_compare_dir_urls(
     bool verify_ssl,
     bool allow_private,
     const char *proxy,
+    komparu_async_chan_t *chan,
     const char **err_msg
 );
 
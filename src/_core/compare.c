@@ -6,62 +6,121 @@
  * 2. Optional quick check (sample start/end/25%/50%/75%)
  * 3. Sequential chunk read + memcmp until EOF or difference
  *
- * Memory: O(chunk_size) — two buffers only.
+ * Memory: O(min(size, chunk_size)) — two buffers only.
  * I/O: stops at first difference.
  */
 
 #include "compare.h"
+#include "reader_file.h"
 #include <stdlib.h>
 #include <string.h>
 
 /* =========================================================================
  * Thread-local comparison buffers — avoid malloc/free per comparison.
- * Each worker thread gets its own pair. Resized only when chunk_size grows.
+ * Each worker thread gets its own pair, carved out of one cache-line
+ * aligned block (buffer b starts on the next cache line after a).
+ * Capacity grows in powers of two from KOMPARU_MIN_CHUNK_SIZE, so a walk
+ * over small files never allocates a full chunk_size pair and growing
+ * read sizes reallocate O(log chunk_size) times per thread.
  * ========================================================================= */
 
-static _Thread_local void *tl_buf_a = NULL;
-static _Thread_local void *tl_buf_b = NULL;
+static _Thread_local void *tl_buf_block = NULL;
 static _Thread_local size_t tl_buf_cap = 0;
 
 static int ensure_buffers(size_t chunk_size, void **a, void **b) {
     if (KOMPARU_LIKELY(chunk_size <= tl_buf_cap)) {
-        *a = tl_buf_a;
-        *b = tl_buf_b;
+        *a = tl_buf_block;
+        *b = (char *)tl_buf_block + tl_buf_cap;
         return 0;
     }
 
-    /* Use temp pointers so that on OOM we don't lose the old allocation.
-     * realloc(ptr, size) may free the old block on success, so we must
-     * save the new pointer immediately — but only commit to thread-local
-     * state after BOTH allocations succeed. */
-    void *na = realloc(tl_buf_a, chunk_size);
-    if (!na) return -1;
-
-    void *nb = realloc(tl_buf_b, chunk_size);
-    if (!nb) {
-        /* Second realloc failed. na is valid (old tl_buf_a may be freed),
-         * so save it to prevent a leak. tl_buf_b is still valid at old size.
-         * tl_buf_cap stays at old value — next call will retry. */
-        tl_buf_a = na;
-        return -1;
-    }
-
-    tl_buf_a = na;
-    tl_buf_b = nb;
-    tl_buf_cap = chunk_size;
-    *a = na;
-    *b = nb;
+    /* A power of two keeps buffer b cache-line aligned too. Contents need
+     * not survive a resize, so allocate fresh instead of realloc (which
+     * would copy the old data and lose the alignment guarantee). The old
+     * block is kept until the new one is in hand. */
+    if (KOMPARU_UNLIKELY(chunk_size > SIZE_MAX / 4)) return -1;
+    size_t cap = KOMPARU_MIN_CHUNK_SIZE;
+    while (cap < chunk_size) cap <<= 1;
+
+    void *block = komparu_aligned_alloc(KOMPARU_CACHE_LINE, cap * 2);
+    if (!block) return -1;
+
+    komparu_aligned_free(tl_buf_block);
+    tl_buf_block = block;
+    tl_buf_cap = cap;
+    *a = block;
+    *b = (char *)block + cap;
     return 0;
 }
 
 void komparu_compare_tls_cleanup(void) {
-    free(tl_buf_a);
-    free(tl_buf_b);
-    tl_buf_a = NULL;
-    tl_buf_b = NULL;
+    komparu_aligned_free(tl_buf_block);
+    tl_buf_block = NULL;
     tl_buf_cap = 0;
 }
 
+/* Name a failing reader for *err_msg */
+static const char *reader_error(const komparu_reader_t *r, const char *fallback) {
+    return r->source_name ? r->source_name : fallback;
+}
+
+/*
+ * A mapped source against one that compares as it reads (HTTP): each view
+ * of the mapped side goes straight to the other's read_compare(), so the
+ * streamed bytes are checked where they land instead of being copied
+ * into a buffer and compared in a second pass.
+ */
+static komparu_result_t compare_streamed(
+    komparu_reader_t *mapped,
+    komparu_reader_t *streamed,
+    const char *mapped_fallback,
+    const char *streamed_fallback,
+    size_t cur,
+    size_t chunk_size,
+    void *scratch,
+    const char **err_msg
+) {
+    for (;;) {
+        const void *view;
+        int64_t n = mapped->read_view(mapped, &view, cur);
+        if (n < 0) {
+            *err_msg = reader_error(mapped, mapped_fallback);
+            return KOMPARU_ERROR;
+        }
+
+        if (n == 0) {
+            /* Mapped side at EOF: equal only if the stream ends too */
+            int64_t m = streamed->read(streamed, scratch, 1);
+            if (m < 0) {
+                *err_msg = reader_error(streamed, streamed_fallback);
+                return KOMPARU_ERROR;
+            }
+            return m == 0 ? KOMPARU_EQUAL : KOMPARU_DIFFERENT;
+        }
+
+        int64_t m = streamed->read_compare(streamed, view, (size_t)n);
+        if (KOMPARU_UNLIKELY(m == KOMPARU_READ_VIEW_FAULT)) {
+            *err_msg = reader_error(mapped, mapped_fallback);
+            return KOMPARU_ERROR;
+        }
+        if (m == KOMPARU_READ_MISMATCH) {
+            return KOMPARU_DIFFERENT;
+        }
+        if (m < 0) {
+            *err_msg = reader_error(streamed, streamed_fallback);
+            return KOMPARU_ERROR;
+        }
+        if (m != n) {
+            return KOMPARU_DIFFERENT;
+        }
+
+        /* No buffers to resize: only the request size grows */
+        if (KOMPARU_UNLIKELY((size_t)n == cur && cur < chunk_size)) {
+            cur = cur > chunk_size / 2 ? chunk_size : cur * 2;
+        }
+    }
+}
+
 komparu_result_t komparu_compare(
     komparu_reader_t *reader_a,
     komparu_reader_t *reader_b,
@@ -73,11 +132,11 @@ komparu_result_t komparu_compare(
         chunk_size = KOMPARU_DEFAULT_CHUNK_SIZE;
     }
 
+    int64_t size_a = reader_a->get_size(reader_a);
+    int64_t size_b = reader_b->get_size(reader_b);
+
     /* Step 1: Size pre-check */
     if (size_precheck) {
-        int64_t size_a = reader_a->get_size(reader_a);
-        int64_t size_b = reader_b->get_size(reader_b);
-
         if (size_a >= 0 && size_b >= 0) {
             if (size_a != size_b) {
                 return KOMPARU_DIFFERENT;
@@ -89,19 +148,49 @@ komparu_result_t komparu_compare(
         }
     }
 
+    /* Read size: a known size caps it (a small file is read in one call
+     * without touching a full chunk_size buffer); an unknown size starts
+     * at KOMPARU_MIN_CHUNK_SIZE and doubles after every full read. */
+    int64_t known = size_a > size_b ? size_a : size_b;
+    size_t cur;
+    if (known > 0) {
+        cur = (uint64_t)known < chunk_size ? (size_t)known : chunk_size;
+    } else {
+        cur = chunk_size < KOMPARU_MIN_CHUNK_SIZE ? chunk_size : KOMPARU_MIN_CHUNK_SIZE;
+    }
+
     /* Thread-local comparison buffers (no malloc/free per call) */
     void *buf_a, *buf_b;
-    if (ensure_buffers(chunk_size, &buf_a, &buf_b) != 0) {
+    if (ensure_buffers(cur, &buf_a, &buf_b) != 0) {
         *err_msg = "out of memory";
         return KOMPARU_ERROR;
     }
 
+    if (reader_a->read_view && reader_b->read_compare) {
+        return compare_streamed(reader_a, reader_b, "source A read error",
+                                "source B read error", cur, chunk_size, buf_a, err_msg);
+    }
+    if (reader_b->read_view && reader_a->read_compare) {
+        return compare_streamed(reader_b, reader_a, "source B read error",
+                                "source A read error", cur, chunk_size, buf_a, err_msg);
+    }
+
     komparu_result_t result = KOMPARU_EQUAL;
 
+    /* Mapped sources are compared in place, without copying them into
+     * the buffers first; only the other side (if any) is read. */
+    bool views = reader_a->read_view || reader_b->read_view;
+
     /* Step 2: Sequential chunk comparison */
     for (;;) {
-        int64_t n_a = reader_a->read(reader_a, buf_a, chunk_size);
-        int64_t n_b = reader_b->read(reader_b, buf_b, chunk_size);
+        const void *pa = buf_a;
+        const void *pb = buf_b;
+        int64_t n_a = reader_a->read_view
+            ? reader_a->read_view(reader_a, &pa, cur)
+            : reader_a->read(reader_a, buf_a, cur);
+        int64_t n_b = reader_b->read_view
+            ? reader_b->read_view(reader_b, &pb, cur)
+            : reader_b->read(reader_b, buf_b, cur);
 
         /* Read errors */
         if (n_a < 0) {
@@ -132,15 +221,60 @@ komparu_result_t komparu_compare(
         }
 
         /* Compare chunk contents */
-        if (memcmp(buf_a, buf_b, (size_t)n_a) != 0) {
+        if (views) {
+            int diff = komparu_view_memcmp(pa, pb, (size_t)n_a);
+            if (KOMPARU_UNLIKELY(diff < 0)) {
+                komparu_reader_t *mapped = reader_a->read_view ? reader_a : reader_b;
+                *err_msg = mapped->source_name ? mapped->source_name : "mapped source read error";
+                result = KOMPARU_ERROR;
+                break;
+            }
+            if (diff) {
+                result = KOMPARU_DIFFERENT;
+                break;
+            }
+        } else if (memcmp(buf_a, buf_b, (size_t)n_a) != 0) {
             result = KOMPARU_DIFFERENT;
             break;
         }
+
+        /* A full read means more data may follow: grow toward chunk_size */
+        if (KOMPARU_UNLIKELY((size_t)n_a == cur && cur < chunk_size)) {
+            cur = cur > chunk_size / 2 ? chunk_size : cur * 2;
+            if (ensure_buffers(cur, &buf_a, &buf_b) != 0) {
+                *err_msg = "out of memory";
+                result = KOMPARU_ERROR;
+                break;
+            }
+        }
     }
 
     return result;
 }
 
+/* Quick check sample points of a source of `size` > chunk_size bytes,
+ * read `len` bytes each: start, end, 25%, 50%, 75%. Returns the count. */
+static int quick_sample_offsets(int64_t size, size_t chunk_size, size_t len,
+                                int64_t offsets[5]) {
+    int count = 0;
+
+    /* Always check start */
+    offsets[count++] = 0;
+
+    /* Always check end (the source is larger than one chunk here) */
+    offsets[count++] = size - (int64_t)len;
+
+    /* Check 25%, 50%, 75% if file is large enough */
+    if (size > (int64_t)(chunk_size * 4)) {
+        offsets[count++] = size / 4;
+        offsets[count++] = size / 2;
+        offsets[count++] = (size * 3) / 4;
+    } else if (size > (int64_t)(chunk_size * 2)) {
+        offsets[count++] = size / 2;
+    }
+    return count;
+}
+
 komparu_result_t komparu_quick_check(
     komparu_reader_t *reader_a,
     komparu_reader_t *reader_b,
@@ -163,7 +297,9 @@ komparu_result_t komparu_quick_check(
         return KOMPARU_DIFFERENT;
     }
 
-    if (size_a == 0) {
+    /* One chunk covers the whole source: the full scan's first read would
+     * fetch the same bytes again, so sampling only adds I/O */
+    if ((uint64_t)size_a <= chunk_size) {
         return KOMPARU_EQUAL;
     }
 
@@ -171,34 +307,20 @@ komparu_result_t komparu_quick_check(
         return KOMPARU_ERROR; /* Seek not supported */
     }
 
+    /* A sample only has to catch a difference, not scan for it: a page
+     * per offset keeps a passing check (the common case before a full
+     * scan) to a few small reads or Range requests */
+    size_t len = chunk_size < KOMPARU_QUICK_SAMPLE_SIZE
+        ? chunk_size : KOMPARU_QUICK_SAMPLE_SIZE;
+
     void *buf_a, *buf_b;
-    if (ensure_buffers(chunk_size, &buf_a, &buf_b) != 0) {
+    if (ensure_buffers(len, &buf_a, &buf_b) != 0) {
         *err_msg = "out of memory";
         return KOMPARU_ERROR;
     }
 
-    /* Sample points: start, end, 25%, 50%, 75% */
     int64_t sample_offsets[5];
-    int num_samples = 0;
-
-    /* Always check start */
-    sample_offsets[num_samples++] = 0;
-
-    /* Check end (last chunk) if file is larger than one chunk */
-    if (size_a > (int64_t)chunk_size) {
-        int64_t end_offset = size_a - (int64_t)chunk_size;
-        if (end_offset < 0) end_offset = 0;
-        sample_offsets[num_samples++] = end_offset;
-    }
-
-    /* Check 25%, 50%, 75% if file is large enough */
-    if (size_a > (int64_t)(chunk_size * 4)) {
-        sample_offsets[num_samples++] = size_a / 4;
-        sample_offsets[num_samples++] = size_a / 2;
-        sample_offsets[num_samples++] = (size_a * 3) / 4;
-    } else if (size_a > (int64_t)(chunk_size * 2)) {
-        sample_offsets[num_samples++] = size_a / 2;
-    }
+    int num_samples = quick_sample_offsets(size_a, chunk_size, len, sample_offsets);
 
     komparu_result_t result = KOMPARU_EQUAL;
 
@@ -210,8 +332,8 @@ komparu_result_t komparu_quick_check(
             break;
         }
 
-        int64_t n_a = reader_a->read(reader_a, buf_a, chunk_size);
-        int64_t n_b = reader_b->read(reader_b, buf_b, chunk_size);
+        int64_t n_a = reader_a->read(reader_a, buf_a, len);
+        int64_t n_b = reader_b->read(reader_b, buf_b, len);
 
         if (n_a < 0 || n_b < 0) {
             result = KOMPARU_ERROR;
@@ -237,6 +359,233 @@ komparu_result_t komparu_quick_check(
     return result;
 }
 
+/* =========================================================================
+ * Content hash
+ * ========================================================================= */
+
+#define HASH_PRIME_1  0x9E3779B185EBCA87ULL
+#define HASH_PRIME_2  0xC2B2AE3D27D4EB4FULL
+#define HASH_PRIME_3  0x165667B19E3779F9ULL
+#define HASH_PRIME_4  0x85EBCA77C2B2AE63ULL
+#define HASH_PRIME_5  0x27D4EB2F165667C5ULL
+
+static inline uint64_t rotl64(uint64_t x, int r) {
+    return (x << r) | (x >> (64 - r));
+}
+
+static inline uint64_t load64(const uint8_t *p) {
+    uint64_t v;
+    memcpy(&v, p, sizeof(v));
+    return v;
+}
+
+static inline uint64_t hash_round(uint64_t acc, uint64_t input) {
+    acc += input * HASH_PRIME_2;
+    return rotl64(acc, 31) * HASH_PRIME_1;
+}
+
+static inline uint64_t hash_merge(uint64_t acc, uint64_t lane) {
+    acc ^= hash_round(0, lane);
+    return acc * HASH_PRIME_1 + HASH_PRIME_4;
+}
+
+static void hash_stripes(uint64_t lanes[4], const uint8_t *p, size_t count) {
+    uint64_t v1 = lanes[0], v2 = lanes[1], v3 = lanes[2], v4 = lanes[3];
+    for (size_t i = 0; i < count; i++, p += 32) {
+        v1 = hash_round(v1, load64(p));
+        v2 = hash_round(v2, load64(p + 8));
+        v3 = hash_round(v3, load64(p + 16));
+        v4 = hash_round(v4, load64(p + 24));
+    }
+    lanes[0] = v1;
+    lanes[1] = v2;
+    lanes[2] = v3;
+    lanes[3] = v4;
+}
+
+void komparu_hash_init(komparu_hash_t *h) {
+    h->lanes[0] = HASH_PRIME_1 + HASH_PRIME_2;
+    h->lanes[1] = HASH_PRIME_2;
+    h->lanes[2] = 0;
+    h->lanes[3] = 0 - HASH_PRIME_1;
+    h->length = 0;
+    h->tail_len = 0;
+}
+
+void komparu_hash_update(komparu_hash_t *h, const void *data, size_t len) {
+    const uint8_t *p = (const uint8_t *)data;
+    h->length += len;
+
+    if (h->tail_len > 0) {
+        size_t take = 32 - h->tail_len;
+        if (take > len) take = len;
+        memcpy(h->tail + h->tail_len, p, take);
+        h->tail_len += take;
+        p += take;
+        len -= take;
+        if (h->tail_len < 32) return;
+        hash_stripes(h->lanes, h->tail, 1);
+        h->tail_len = 0;
+    }
+
+    hash_stripes(h->lanes, p, len / 32);
+    p += len & ~(size_t)31;
+    len &= 31;
+    memcpy(h->tail, p, len);
+    h->tail_len = len;
+}
+
+/* One 64-bit half: the lanes are merged in a different order and with
+ * different rotations per half, and a short input starts from `seed`. */
+static uint64_t hash_finish(const komparu_hash_t *h, const int rot[4],
+                            const int order[4], uint64_t seed) {
+    uint64_t acc;
+    if (h->length >= 32) {
+        acc = 0;
+        for (int i = 0; i < 4; i++) {
+            acc += rotl64(h->lanes[order[i]], rot[i]);
+        }
+        for (int i = 0; i < 4; i++) {
+            acc = hash_merge(acc, h->lanes[order[i]]);
+        }
+    } else {
+        acc = seed + HASH_PRIME_5;
+    }
+    acc += h->length;
+
+    const uint8_t *p = h->tail;
+    size_t len = h->tail_len;
+    for (; len >= 8; p += 8, len -= 8) {
+        acc ^= hash_round(0, load64(p));
+        acc = rotl64(acc, 27) * HASH_PRIME_1 + HASH_PRIME_4;
+    }
+    if (len >= 4) {
+        uint32_t v;
+        memcpy(&v, p, sizeof(v));
+        acc ^= (uint64_t)v * HASH_PRIME_1;
+        acc = rotl64(acc, 23) * HASH_PRIME_2 + HASH_PRIME_3;
+        p += 4;
+        len -= 4;
+    }
+    for (; len > 0; p++, len--) {
+        acc ^= *p * HASH_PRIME_5;
+        acc = rotl64(acc, 11) * HASH_PRIME_1;
+    }
+
+    acc ^= acc >> 33;
+    acc *= HASH_PRIME_2;
+    acc ^= acc >> 29;
+    acc *= HASH_PRIME_3;
+    acc ^= acc >> 32;
+    return acc;
+}
+
+void komparu_hash_final(const komparu_hash_t *h, uint64_t *lo, uint64_t *hi) {
+    static const int rot_lo[4] = {1, 7, 12, 18};
+    static const int rot_hi[4] = {18, 12, 7, 1};
+    static const int order_lo[4] = {0, 1, 2, 3};
+    static const int order_hi[4] = {2, 3, 0, 1};
+    *lo = hash_finish(h, rot_lo, order_lo, 0);
+    *hi = hash_finish(h, rot_hi, order_hi, HASH_PRIME_3);
+}
+
+int komparu_fingerprint(
+    komparu_reader_t *reader,
+    size_t chunk_size,
+    uint64_t digest[3],
+    const char **err_msg
+) {
+    if (chunk_size == 0) {
+        chunk_size = KOMPARU_DEFAULT_CHUNK_SIZE;
+    }
+
+    /* A small source is read in one call, as in komparu_compare */
+    int64_t size = reader->get_size(reader);
+    if (size > 0 && (uint64_t)size < chunk_size) {
+        chunk_size = (size_t)size;
+    }
+
+    void *buf, *unused;
+    if (ensure_buffers(chunk_size, &buf, &unused) != 0) {
+        *err_msg = "out of memory";
+        return -1;
+    }
+
+    /* A mapped source is hashed in place rather than copied out first */
+    komparu_hash_t hash;
+    komparu_hash_init(&hash);
+    for (;;) {
+        const void *view = buf;
+        int64_t n = reader->read_view
+            ? reader->read_view(reader, &view, chunk_size)
+            : reader->read(reader, buf, chunk_size);
+        if (n < 0) {
+            *err_msg = reader->source_name ? reader->source_name : "read error";
+            return -1;
+        }
+        if (n == 0) break;
+        if (komparu_view_hash(&hash, view, (size_t)n) != 0) {
+            *err_msg = reader->source_name ? reader->source_name : "read error";
+            return -1;
+        }
+    }
+
+    komparu_hash_final(&hash, &digest[0], &digest[1]);
+    digest[2] = hash.length;
+    return 0;
+}
+
+int komparu_fingerprint_samples(
+    komparu_reader_t *reader,
+    size_t chunk_size,
+    uint64_t digest[3],
+    const char **err_msg
+) {
+    if (chunk_size == 0) {
+        chunk_size = KOMPARU_DEFAULT_CHUNK_SIZE;
+    }
+
+    int64_t size = reader->get_size(reader);
+    if (size < 0 || !reader->seek) {
+        *err_msg = "sampling needs a known size and seek support";
+        return -1;
+    }
+    /* One chunk is what a sample pass would read anyway */
+    if ((uint64_t)size <= chunk_size) {
+        return komparu_fingerprint(reader, chunk_size, digest, err_msg);
+    }
+
+    size_t len = chunk_size < KOMPARU_QUICK_SAMPLE_SIZE
+        ? chunk_size : KOMPARU_QUICK_SAMPLE_SIZE;
+    void *buf, *unused;
+    if (ensure_buffers(len, &buf, &unused) != 0) {
+        *err_msg = "out of memory";
+        return -1;
+    }
+
+    int64_t offsets[5];
+    int count = quick_sample_offsets(size, chunk_size, len, offsets);
+
+    komparu_hash_t hash;
+    komparu_hash_init(&hash);
+    for (int i = 0; i < count; i++) {
+        if (reader->seek(reader, offsets[i]) != 0) {
+            *err_msg = "seek failed while sampling";
+            return -1;
+        }
+        int64_t n = reader->read(reader, buf, len);
+        if (n < 0) {
+            *err_msg = reader->source_name ? reader->source_name : "read error";
+            return -1;
+        }
+        komparu_hash_update(&hash, buf, (size_t)n);
+    }
+
+    komparu_hash_final(&hash, &digest[0], &digest[1]);
+    digest[2] = (uint64_t)size;
+    return 0;
+}
+
 /* =========================================================================
  * Directory / archive comparison result helpers
  * ========================================================================= */
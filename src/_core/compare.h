@@ -37,6 +37,9 @@ komparu_result_t komparu_compare(
 
 /**
  * Quick check: sample up to 5 offsets (start, end, 25%, 50%, 75%) before full scan.
+ * Each sample is KOMPARU_QUICK_SAMPLE_SIZE bytes (at most chunk_size).
+ * Sources no larger than one chunk are not sampled: the full scan reads
+ * them in a single call anyway.
  * Only works if both readers support seek.
  *
  * Returns:
@@ -51,6 +54,59 @@ komparu_result_t komparu_quick_check(
     const char **err_msg
 );
 
+/* =========================================================================
+ * Content hash — four 64-bit lanes over 32-byte stripes (the XXH64
+ * round), finalized twice into 128 bits. Not collision resistant: the
+ * lanes are invertible, so colliding inputs can be computed. Only used
+ * where a digest match is confirmed by comparing bytes; digest.h is the
+ * one to use when a match has to stand for equality.
+ * ========================================================================= */
+
+typedef struct komparu_hash {
+    uint64_t lanes[4];
+    uint64_t length;        /* bytes fed so far */
+    uint8_t tail[32];       /* bytes of an incomplete stripe */
+    size_t tail_len;
+} komparu_hash_t;
+
+void komparu_hash_init(komparu_hash_t *h);
+
+/* Feed `len` bytes; any split of the same bytes gives the same hash. */
+void komparu_hash_update(komparu_hash_t *h, const void *data, size_t len);
+
+void komparu_hash_final(const komparu_hash_t *h, uint64_t *lo, uint64_t *hi);
+
+/**
+ * Read a source to EOF and fingerprint it: digest = {hash_lo, hash_hi,
+ * length}. Equal content always gives equal digests, so different
+ * digests prove the sources differ; equal digests do not prove equality.
+ *
+ * Returns 0 on success, -1 on read error (*err_msg set).
+ */
+int komparu_fingerprint(
+    komparu_reader_t *reader,
+    size_t chunk_size,
+    uint64_t digest[3],
+    const char **err_msg
+);
+
+/**
+ * Fingerprint a source from its quick check sample points only (the whole
+ * source if it fits in one chunk): digest = {hash_lo, hash_hi, size}.
+ * Equal content always gives equal sample digests, so different ones
+ * prove the sources differ without reading either in full. Not
+ * comparable with komparu_fingerprint digests.
+ *
+ * Returns 0 on success, -1 on read error or a source without a known
+ * size or seek support (*err_msg set).
+ */
+int komparu_fingerprint_samples(
+    komparu_reader_t *reader,
+    size_t chunk_size,
+    uint64_t digest[3],
+    const char **err_msg
+);
+
 /**
  * Free thread-local comparison buffers.
  * Call from worker threads before exit to prevent leaks.
@@ -62,10 +118,13 @@ void komparu_compare_tls_cleanup(void);
  * Directory / archive comparison result
  * ========================================================================= */
 
-/* Diff reasons */
-#define KOMPARU_DIFF_CONTENT    0
-#define KOMPARU_DIFF_SIZE       1
-#define KOMPARU_DIFF_READ_ERROR 2
+/* Diff reasons — passed to Python as ints; values index the
+ * _DIFF_BY_CODE table in komparu/_types.py (DiffReason order). */
+#define KOMPARU_DIFF_CONTENT       0
+#define KOMPARU_DIFF_SIZE          1
+#define KOMPARU_DIFF_MISSING       2   /* reserved, not emitted yet */
+#define KOMPARU_DIFF_TYPE_MISMATCH 3   /* reserved, not emitted yet */
+#define KOMPARU_DIFF_READ_ERROR    4
 
 typedef struct {
     char *path;
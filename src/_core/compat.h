@@ -120,6 +120,31 @@ static inline size_t komparu_cpu_count(void) {
     #define KOMPARU_UNLIKELY(x) (x)
 #endif
 
+/* =========================================================================
+ * Aligned allocation — cache-line aligned buffers
+ * ========================================================================= */
+
+#define KOMPARU_CACHE_LINE 64
+
+#include <stdlib.h>
+
+static inline void *komparu_aligned_alloc(size_t alignment, size_t size) {
+#ifdef KOMPARU_WINDOWS
+    return _aligned_malloc(size, alignment);
+#else
+    void *p = NULL;
+    return posix_memalign(&p, alignment, size) == 0 ? p : NULL;
+#endif
+}
+
+static inline void komparu_aligned_free(void *p) {
+#ifdef KOMPARU_WINDOWS
+    _aligned_free(p);
+#else
+    free(p);
+#endif
+}
+
 /* =========================================================================
  * POSIX string function compat (Windows MSVC)
  * ========================================================================= */
@@ -151,6 +176,20 @@ static inline void komparu_strerror(int errnum, char *buf, size_t buflen) {
 /* Default chunk size: 64 KB */
 #define KOMPARU_DEFAULT_CHUNK_SIZE  (64 * 1024)
 
+/* First read size when the source size is unknown; doubles up to chunk_size */
+#define KOMPARU_MIN_CHUNK_SIZE      (4 * 1024)
+
+/* Local files up to this size are read with pread() instead of mapped */
+#define KOMPARU_FILE_PREAD_MAX      (128 * 1024)
+
+/* Local files from this size on are read in KOMPARU_FILE_BLOCK_SIZE
+ * blocks instead of mapped while they are not in the page cache */
+#define KOMPARU_FILE_BLOCK_MIN      (2 * 1024 * 1024)
+#define KOMPARU_FILE_BLOCK_SIZE     (4 * 1024 * 1024)
+
+/* Bytes read at each quick check sample point (one page, one small Range) */
+#define KOMPARU_QUICK_SAMPLE_SIZE   (4 * 1024)
+
 /* Maximum number of default workers */
 #define KOMPARU_MAX_DEFAULT_WORKERS 8
 
@@ -0,0 +1,136 @@
+/**
+ * digest.c — BLAKE2b-128 content digest (RFC 7693).
+ *
+ * Portable C, no external dependency. Fed straight from libarchive's
+ * data blocks; one 128-byte block is compressed per call of
+ * blake2b_compress, and the final block is held back so it can be
+ * flagged as last.
+ */
+
+#include "digest.h"
+#include <stdbool.h>
+#include <string.h>
+
+#define DIGEST_OUT_LEN 16
+
+static const uint64_t blake2b_iv[8] = {
+    0x6A09E667F3BCC908ULL, 0xBB67AE8584CAA73BULL,
+    0x3C6EF372FE94F82BULL, 0xA54FF53A5F1D36F1ULL,
+    0x510E527FADE682D1ULL, 0x9B05688C2B3E6C1FULL,
+    0x1F83D9ABFB41BD6BULL, 0x5BE0CD19137E2179ULL,
+};
+
+static const uint8_t blake2b_sigma[12][16] = {
+    { 0,  1,  2,  3,  4,  5,  6,  7,  8,  9, 10, 11, 12, 13, 14, 15},
+    {14, 10,  4,  8,  9, 15, 13,  6,  1, 12,  0,  2, 11,  7,  5,  3},
+    {11,  8, 12,  0,  5,  2, 15, 13, 10, 14,  3,  6,  7,  1,  9,  4},
+    { 7,  9,  3,  1, 13, 12, 11, 14,  2,  6,  5, 10,  4,  0, 15,  8},
+    { 9,  0,  5,  7,  2,  4, 10, 15, 14,  1, 11, 12,  6,  8,  3, 13},
+    { 2, 12,  6, 10,  0, 11,  8,  3,  4, 13,  7,  5, 15, 14,  1,  9},
+    {12,  5,  1, 15, 14, 13,  4, 10,  0,  7,  6,  3,  9,  2,  8, 11},
+    {13, 11,  7, 14, 12,  1,  3,  9,  5,  0, 15,  4,  8,  6,  2, 10},
+    { 6, 15, 14,  9, 11,  3,  0,  8, 12,  2, 13,  7,  1,  4, 10,  5},
+    {10,  2,  8,  4,  7,  6,  1,  5, 15, 11,  9, 14,  3, 12, 13,  0},
+    { 0,  1,  2,  3,  4,  5,  6,  7,  8,  9, 10, 11, 12, 13, 14, 15},
+    {14, 10,  4,  8,  9, 15, 13,  6,  1, 12,  0,  2, 11,  7,  5,  3},
+};
+
+static inline uint64_t rotr64(uint64_t x, int r) {
+    return (x >> r) | (x << (64 - r));
+}
+
+static inline uint64_t load64_le(const uint8_t *p) {
+    return (uint64_t)p[0] | (uint64_t)p[1] << 8 | (uint64_t)p[2] << 16 |
+           (uint64_t)p[3] << 24 | (uint64_t)p[4] << 32 | (uint64_t)p[5] << 40 |
+           (uint64_t)p[6] << 48 | (uint64_t)p[7] << 56;
+}
+
+#define G(a, b, c, d, x, y) do {            \
+        v[a] = v[a] + v[b] + (x);           \
+        v[d] = rotr64(v[d] ^ v[a], 32);     \
+        v[c] = v[c] + v[d];                 \
+        v[b] = rotr64(v[b] ^ v[c], 24);     \
+        v[a] = v[a] + v[b] + (y);           \
+        v[d] = rotr64(v[d] ^ v[a], 16);     \
+        v[c] = v[c] + v[d];                 \
+        v[b] = rotr64(v[b] ^ v[c], 63);     \
+    } while (0)
+
+static void blake2b_compress(komparu_digest_t *d, const uint8_t *block, bool last) {
+    uint64_t m[16], v[16];
+    for (int i = 0; i < 16; i++) m[i] = load64_le(block + 8 * i);
+    for (int i = 0; i < 8; i++) {
+        v[i] = d->h[i];
+        v[i + 8] = blake2b_iv[i];
+    }
+    v[12] ^= d->t[0];
+    v[13] ^= d->t[1];
+    if (last) v[14] = ~v[14];
+
+    for (int r = 0; r < 12; r++) {
+        const uint8_t *s = blake2b_sigma[r];
+        G(0, 4,  8, 12, m[s[ 0]], m[s[ 1]]);
+        G(1, 5,  9, 13, m[s[ 2]], m[s[ 3]]);
+        G(2, 6, 10, 14, m[s[ 4]], m[s[ 5]]);
+        G(3, 7, 11, 15, m[s[ 6]], m[s[ 7]]);
+        G(0, 5, 10, 15, m[s[ 8]], m[s[ 9]]);
+        G(1, 6, 11, 12, m[s[10]], m[s[11]]);
+        G(2, 7,  8, 13, m[s[12]], m[s[13]]);
+        G(3, 4,  9, 14, m[s[14]], m[s[15]]);
+    }
+
+    for (int i = 0; i < 8; i++) d->h[i] ^= v[i] ^ v[i + 8];
+}
+
+static inline void blake2b_count(komparu_digest_t *d, uint64_t n) {
+    d->t[0] += n;
+    if (d->t[0] < n) d->t[1]++;
+}
+
+void komparu_digest_init(komparu_digest_t *d) {
+    memcpy(d->h, blake2b_iv, sizeof(d->h));
+    /* Parameter block: digest length, no key, fanout 1, depth 1 */
+    d->h[0] ^= 0x01010000ULL ^ DIGEST_OUT_LEN;
+    d->t[0] = 0;
+    d->t[1] = 0;
+    d->buf_len = 0;
+}
+
+void komparu_digest_update(komparu_digest_t *d, const void *data, size_t len) {
+    const uint8_t *p = (const uint8_t *)data;
+    if (len == 0) return;
+
+    /* A full buffer is only compressed once more input shows it is not
+     * the last block */
+    if (d->buf_len > 0) {
+        size_t take = sizeof(d->buf) - d->buf_len;
+        if (take > len) take = len;
+        memcpy(d->buf + d->buf_len, p, take);
+        d->buf_len += take;
+        p += take;
+        len -= take;
+        if (len == 0) return;
+        blake2b_count(d, sizeof(d->buf));
+        blake2b_compress(d, d->buf, false);
+        d->buf_len = 0;
+    }
+
+    while (len > sizeof(d->buf)) {
+        blake2b_count(d, sizeof(d->buf));
+        blake2b_compress(d, p, false);
+        p += sizeof(d->buf);
+        len -= sizeof(d->buf);
+    }
+
+    memcpy(d->buf, p, len);
+    d->buf_len = len;
+}
+
+void komparu_digest_final(komparu_digest_t *d, uint64_t *lo, uint64_t *hi) {
+    blake2b_count(d, d->buf_len);
+    memset(d->buf + d->buf_len, 0, sizeof(d->buf) - d->buf_len);
+    blake2b_compress(d, d->buf, true);
+    /* h[] is the little-endian digest; the first 16 bytes are h[0], h[1] */
+    *lo = d->h[0];
+    *hi = d->h[1];
+}
@@ -0,0 +1,32 @@
+/**
+ * digest.h — Collision-resistant content digest (BLAKE2b, RFC 7693).
+ *
+ * Used where equal digests are taken as equal content without a byte
+ * comparison (compare_archive in hash mode). komparu_hash_t in compare.h
+ * is faster but not collision resistant, so it is only used where a
+ * digest match is still confirmed by comparing bytes.
+ */
+
+#ifndef KOMPARU_DIGEST_H
+#define KOMPARU_DIGEST_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+typedef struct komparu_digest {
+    uint64_t h[8];          /* chained state */
+    uint64_t t[2];          /* bytes compressed so far (128-bit counter) */
+    uint8_t buf[128];       /* pending block; the last one is held back */
+    size_t buf_len;
+} komparu_digest_t;
+
+/* BLAKE2b with a 16-byte output, unkeyed. */
+void komparu_digest_init(komparu_digest_t *d);
+
+/* Feed `len` bytes; any split of the same bytes gives the same digest. */
+void komparu_digest_update(komparu_digest_t *d, const void *data, size_t len);
+
+/* The 16-byte digest as two little-endian 64-bit words. Consumes `d`. */
+void komparu_digest_final(komparu_digest_t *d, uint64_t *lo, uint64_t *hi);
+
+#endif /* KOMPARU_DIGEST_H */
@@ -96,6 +96,11 @@ static int path_cmp(const void *a, const void *b) {
     return strcmp(*(const char *const *)a, *(const char *const *)b);
 }
 
+/* Order pointers into a rel_paths array by the string they point to. */
+static int rel_path_ptr_cmp(const void *a, const void *b) {
+    return strcmp(**(const char *const *const *)a, **(const char *const *const *)b);
+}
+
 void komparu_pathlist_free(komparu_pathlist_t *list) {
     if (!list) return;
     arena_free(&list->arena);
@@ -237,6 +242,9 @@ static int walk_recursive(
 
     int dfd = dirfd(dir);
     struct dirent *entry;
+    /* Set by the first successful fstatat: until then a failing stat
+     * (no search permission) must still be reported per entry */
+    bool searchable = false;
 
     while ((entry = readdir(dir)) != NULL) {
         /* Skip . and .. */
@@ -246,26 +254,45 @@ static int walk_recursive(
             if (name[1] == '.' && name[2] == '\0') continue;
         }
 
-        struct stat st;
-        if (KOMPARU_UNLIKELY(fstatat(dfd, name, &st, stat_flags) != 0)) {
-            if (errors && (errno == EACCES || errno == EPERM)) {
-                /* Build relative path for the error entry */
-                char err_path[PATH_MAX];
-                int elen;
-                if (rel_prefix[0]) {
-                    elen = snprintf(err_path, sizeof(err_path), "%s/%s", rel_prefix, name);
-                } else {
-                    elen = snprintf(err_path, sizeof(err_path), "%s", name);
-                }
-                if (elen >= 0 && (size_t)elen < sizeof(err_path)) {
-                    if (KOMPARU_UNLIKELY(pathlist_append(errors, err_path, err_msg) != 0)) {
-                        closedir(dir);
-                        return -1;
+        /* readdir's d_type classifies most entries without a stat call;
+         * only unknown types and followed symlinks need fstatat */
+        bool is_reg = false;
+        bool is_dir = false;
+        bool typed = false;
+#ifdef DT_REG
+        if (searchable && entry->d_type != DT_UNKNOWN &&
+            (entry->d_type != DT_LNK || stat_flags != 0)) {
+            is_reg = entry->d_type == DT_REG;
+            is_dir = entry->d_type == DT_DIR;
+            typed = true;
+        }
+#endif
+        if (!typed) {
+            struct stat st;
+            if (KOMPARU_UNLIKELY(fstatat(dfd, name, &st, stat_flags) != 0)) {
+                if (errors && (errno == EACCES || errno == EPERM)) {
+                    /* Build relative path for the error entry */
+                    char err_path[PATH_MAX];
+                    int elen;
+                    if (rel_prefix[0]) {
+                        elen = snprintf(err_path, sizeof(err_path), "%s/%s", rel_prefix, name);
+                    } else {
+                        elen = snprintf(err_path, sizeof(err_path), "%s", name);
+                    }
+                    if (elen >= 0 && (size_t)elen < sizeof(err_path)) {
+                        if (KOMPARU_UNLIKELY(pathlist_append(errors, err_path, err_msg) != 0)) {
+                            closedir(dir);
+                            return -1;
+                        }
                     }
                 }
+                continue;
             }
-            continue;
+            searchable = true;
+            is_reg = S_ISREG(st.st_mode);
+            is_dir = S_ISDIR(st.st_mode);
         }
+        if (!is_reg && !is_dir) continue;
 
         /* Build relative path */
         char rel_path[PATH_MAX];
@@ -278,12 +305,12 @@ static int walk_recursive(
         if (KOMPARU_UNLIKELY(plen < 0 || (size_t)plen >= sizeof(rel_path)))
             continue; /* path too long — skip */
 
-        if (S_ISREG(st.st_mode)) {
+        if (is_reg) {
             if (KOMPARU_UNLIKELY(pathlist_append(result, rel_path, err_msg) != 0)) {
                 closedir(dir);
                 return -1;
             }
-        } else if (S_ISDIR(st.st_mode)) {
+        } else {
             int sub_fd = openat(dfd, name, O_RDONLY | O_DIRECTORY | O_CLOEXEC);
             if (KOMPARU_UNLIKELY(sub_fd < 0)) {
                 if (errors && (errno == EACCES || errno == EPERM)) {
@@ -380,6 +407,30 @@ int komparu_dirwalk(
     return 0;
 }
 
+/* =========================================================================
+ * Walk task: both trees of compare_dirs are listed concurrently
+ * ========================================================================= */
+
+typedef struct {
+    const char *dir;
+    bool follow_symlinks;
+    komparu_pathlist_t paths;
+    komparu_pathlist_t errors;
+    int rc;
+    /* The walking thread's err_msg may point at its own thread-local
+     * buffer, so the message is copied out before the task returns */
+    char err_buf[512];
+} dir_walk_task_t;
+
+static void dir_walk_task_exec(void *arg) {
+    dir_walk_task_t *t = (dir_walk_task_t *)arg;
+    const char *msg = NULL;
+    t->rc = komparu_dirwalk(t->dir, t->follow_symlinks, &t->paths, &t->errors, &msg);
+    if (t->rc != 0) {
+        snprintf(t->err_buf, sizeof(t->err_buf), "%s", msg ? msg : "directory walk failed");
+    }
+}
+
 /* =========================================================================
  * Per-file comparison task (used by both sequential and parallel paths)
  * ========================================================================= */
@@ -391,26 +442,93 @@ typedef struct {
     size_t chunk_size;
     bool size_precheck;
     bool quick_check;
+    bool trust_mtime;
     int result_reason;  /* -1 = equal, else KOMPARU_DIFF_* */
 } dir_cmp_task_t;
 
+/* Equal size and modification time, to the filesystem's resolution */
+static inline bool same_size_mtime(const struct stat *a, const struct stat *b) {
+    if (a->st_size != b->st_size) return false;
+#if defined(KOMPARU_WINDOWS)
+    return a->st_mtime == b->st_mtime;
+#elif defined(KOMPARU_MACOS)
+    return a->st_mtimespec.tv_sec == b->st_mtimespec.tv_sec &&
+           a->st_mtimespec.tv_nsec == b->st_mtimespec.tv_nsec;
+#else
+    return a->st_mtim.tv_sec == b->st_mtim.tv_sec &&
+           a->st_mtim.tv_nsec == b->st_mtim.tv_nsec;
+#endif
+}
+
 static void dir_cmp_task_exec(void *arg) {
     dir_cmp_task_t *task = (dir_cmp_task_t *)arg;
     task->result_reason = -1;  /* assume equal */
+    const char *cmp_err = NULL;
 
-    /* Same-file short-circuit via inode comparison */
 #ifndef KOMPARU_WINDOWS
-    {
-        struct stat sa, sb;
+    /* One open + fstat per side answers both the same-file and the size
+     * pre-check, so hard-linked and resized pairs are settled before
+     * anything is mapped */
+    int fa = open(task->full_path_a, O_RDONLY);
+    int fb = fa >= 0 ? open(task->full_path_b, O_RDONLY) : -1;
+    struct stat sa, sb;
+    if (KOMPARU_UNLIKELY(fb < 0 || fstat(fa, &sa) != 0 || fstat(fb, &sb) != 0)) {
+        if (fa >= 0) close(fa);
+        if (fb >= 0) close(fb);
+        /* An unreadable file is still equal to itself */
         if (stat(task->full_path_a, &sa) == 0 &&
             stat(task->full_path_b, &sb) == 0 &&
             sa.st_dev == sb.st_dev && sa.st_ino == sb.st_ino) {
-            return;  /* same file — equal */
+            return;
+        }
+        task->result_reason = KOMPARU_DIFF_READ_ERROR;
+        return;
+    }
+
+    if (sa.st_dev == sb.st_dev && sa.st_ino == sb.st_ino) {
+        close(fa);
+        close(fb);
+        return;  /* same file — equal */
+    }
+
+    if (task->size_precheck && S_ISREG(sa.st_mode) && S_ISREG(sb.st_mode) &&
+        sa.st_size != sb.st_size) {
+        close(fa);
+        close(fb);
+        task->result_reason = KOMPARU_DIFF_SIZE;
+        return;
+    }
+
+    /* Unchanged copies (same size and mtime) are taken as equal */
+    if (task->trust_mtime && S_ISREG(sa.st_mode) && S_ISREG(sb.st_mode) &&
+        same_size_mtime(&sa, &sb)) {
+        close(fa);
+        close(fb);
+        return;
+    }
+
+    komparu_reader_t *ra = komparu_reader_file_from_fd(fa, &sa, task->full_path_a, &cmp_err);
+    if (KOMPARU_UNLIKELY(!ra)) {
+        close(fb);
+        task->result_reason = KOMPARU_DIFF_READ_ERROR;
+        return;
+    }
+
+    komparu_reader_t *rb = komparu_reader_file_from_fd(fb, &sb, task->full_path_b, &cmp_err);
+    if (KOMPARU_UNLIKELY(!rb)) {
+        ra->close(ra);
+        task->result_reason = KOMPARU_DIFF_READ_ERROR;
+        return;
+    }
+#else
+    if (task->trust_mtime) {
+        struct stat sa, sb;
+        if (stat(task->full_path_a, &sa) == 0 && stat(task->full_path_b, &sb) == 0 &&
+            same_size_mtime(&sa, &sb)) {
+            return;
         }
     }
-#endif
 
-    const char *cmp_err = NULL;
     komparu_reader_t *ra = komparu_reader_file_open(task->full_path_a, &cmp_err);
     if (KOMPARU_UNLIKELY(!ra)) {
         task->result_reason = KOMPARU_DIFF_READ_ERROR;
@@ -435,6 +553,7 @@ static void dir_cmp_task_exec(void *arg) {
             return;
         }
     }
+#endif
 
     /* Quick check */
     if (task->quick_check) {
@@ -471,6 +590,7 @@ komparu_dir_result_t *komparu_compare_dirs(
     size_t chunk_size,
     bool size_precheck,
     bool quick_check,
+    bool trust_mtime,
     bool follow_symlinks,
     size_t max_workers,
     const char **err_msg
@@ -488,20 +608,38 @@ komparu_dir_result_t *komparu_compare_dirs(
         return r;  /* equal=true, empty diff/only_left/only_right */
     }
 
-    komparu_pathlist_t paths_a = {0};
-    komparu_pathlist_t paths_b = {0};
-    komparu_pathlist_t errors_a = {0};
-    komparu_pathlist_t errors_b = {0};
-
-    if (komparu_dirwalk(dir_a, follow_symlinks, &paths_a, &errors_a, err_msg) != 0) {
-        return NULL;
+    /* The pool, if any, lists both trees at once and then runs the
+     * comparisons; the walks are directory reads and stats, so they
+     * overlap on I/O even when there is one CPU. */
+    komparu_pool_t *pool = NULL;
+    if (max_workers != 1) {
+        pool = komparu_pool_acquire(max_workers);
+        /* Fall back to sequential if pool creation fails */
     }
 
-    if (komparu_dirwalk(dir_b, follow_symlinks, &paths_b, &errors_b, err_msg) != 0) {
-        komparu_pathlist_free(&paths_a);
-        komparu_pathlist_free(&errors_a);
-        return NULL;
+    dir_walk_task_t walks[2] = {
+        {.dir = dir_a, .follow_symlinks = follow_symlinks},
+        {.dir = dir_b, .follow_symlinks = follow_symlinks},
+    };
+    komparu_pool_run(pool, dir_walk_task_exec, walks, sizeof(*walks), 2);
+    for (int w = 0; w < 2; w++) {
+        if (walks[w].rc != 0) {
+            snprintf(dirwalk_errbuf, sizeof(dirwalk_errbuf), "%s", walks[w].err_buf);
+            *err_msg = dirwalk_errbuf;
+            for (int k = 0; k < 2; k++) {
+                if (walks[k].rc == 0) {
+                    komparu_pathlist_free(&walks[k].paths);
+                    komparu_pathlist_free(&walks[k].errors);
+                }
+            }
+            komparu_pool_release(pool);
+            return NULL;
+        }
     }
+    komparu_pathlist_t paths_a = walks[0].paths;
+    komparu_pathlist_t paths_b = walks[1].paths;
+    komparu_pathlist_t errors_a = walks[0].errors;
+    komparu_pathlist_t errors_b = walks[1].errors;
 
     komparu_dir_result_t *result = komparu_dir_result_new();
     if (KOMPARU_UNLIKELY(!result)) {
@@ -510,6 +648,7 @@ komparu_dir_result_t *komparu_compare_dirs(
         komparu_pathlist_free(&paths_b);
         komparu_pathlist_free(&errors_a);
         komparu_pathlist_free(&errors_b);
+        komparu_pool_release(pool);
         return NULL;
     }
 
@@ -522,6 +661,7 @@ komparu_dir_result_t *komparu_compare_dirs(
             komparu_pathlist_free(&errors_a);
             komparu_pathlist_free(&errors_b);
             komparu_dir_result_free(result);
+            komparu_pool_release(pool);
             return NULL;
         }
     }
@@ -533,6 +673,7 @@ komparu_dir_result_t *komparu_compare_dirs(
             komparu_pathlist_free(&errors_a);
             komparu_pathlist_free(&errors_b);
             komparu_dir_result_free(result);
+            komparu_pool_release(pool);
             return NULL;
         }
     }
@@ -599,6 +740,7 @@ komparu_dir_result_t *komparu_compare_dirs(
             t->chunk_size = chunk_size;
             t->size_precheck = size_precheck;
             t->quick_check = quick_check;
+            t->trust_mtime = trust_mtime;
             t->result_reason = -1;
 
             task_count++;
@@ -624,33 +766,9 @@ komparu_dir_result_t *komparu_compare_dirs(
 
     /* Phase 2: Execute file comparisons */
     if (task_count > 0) {
-        bool use_pool = (max_workers != 1 && task_count > 1);
-        komparu_pool_t *pool = NULL;
-
-        if (use_pool) {
-            pool = komparu_pool_create(max_workers);
-            /* Fall back to sequential if pool creation fails */
-        }
-
-        if (pool) {
-            for (size_t k = 0; k < task_count; k++) {
-                if (KOMPARU_UNLIKELY(komparu_pool_submit(pool, dir_cmp_task_exec, &tasks[k]) != 0)) {
-                    /* Submit failed — execute remaining tasks inline */
-                    (void)komparu_pool_wait(pool);
-                    komparu_pool_destroy(pool);
-                    for (size_t m = k; m < task_count; m++)
-                        dir_cmp_task_exec(&tasks[m]);
-                    pool = NULL;
-                    break;
-                }
-            }
-            (void)komparu_pool_wait(pool);
-            komparu_pool_destroy(pool);
-        } else {
-            for (size_t k = 0; k < task_count; k++) {
-                dir_cmp_task_exec(&tasks[k]);
-            }
-        }
+        /* One pool entry per worker, not per file pair */
+        komparu_pool_run(task_count > 1 ? pool : NULL, dir_cmp_task_exec,
+                         tasks, sizeof(*tasks), task_count);
 
         /* Phase 3: Collect results */
         for (size_t k = 0; k < task_count; k++) {
@@ -672,6 +790,7 @@ komparu_dir_result_t *komparu_compare_dirs(
     free(tasks);
     komparu_pathlist_free(&paths_a);
     komparu_pathlist_free(&paths_b);
+    komparu_pool_release(pool);
     return result;
 
 fail:
@@ -684,13 +803,136 @@ fail:
     komparu_pathlist_free(&paths_a);
     komparu_pathlist_free(&paths_b);
     komparu_dir_result_free(result);
+    komparu_pool_release(pool);
     return NULL;
 }
 
+void *komparu_url_map_copy(
+    const char *const *rel_paths,
+    const char *const *urls,
+    size_t count,
+    const char ***rel_out,
+    const char ***urls_out
+) {
+    size_t bytes = 2 * count * sizeof(char *);
+    for (size_t k = 0; k < count; k++)
+        bytes += strlen(rel_paths[k]) + strlen(urls[k]) + 2;
+
+    char **block = malloc(bytes);
+    if (KOMPARU_UNLIKELY(!block)) return NULL;
+
+    char *p = (char *)(block + 2 * count);
+    for (size_t k = 0; k < count; k++) {
+        size_t len = strlen(rel_paths[k]) + 1;
+        block[k] = memcpy(p, rel_paths[k], len);
+        p += len;
+        len = strlen(urls[k]) + 1;
+        block[count + k] = memcpy(p, urls[k], len);
+        p += len;
+    }
+    *rel_out = (const char **)block;
+    *urls_out = (const char **)block + count;
+    return block;
+}
+
 /* =========================================================================
  * Directory vs URL map comparison — sorted merge of local tree vs URL set
  * ========================================================================= */
 
+/* =========================================================================
+ * Per-entry local file vs URL comparison task
+ * ========================================================================= */
+
+typedef struct {
+    const char *dir_path;
+    const char **headers;
+    size_t chunk_size;
+    bool size_precheck;
+    bool quick_check;
+    double timeout;
+    bool follow_redirects;
+    bool verify_ssl;
+    bool allow_private;
+    const char *proxy;
+} url_cmp_opts_t;
+
+typedef struct {
+    const url_cmp_opts_t *opts;
+    const char *rel_path;   /* points into the local path list */
+    const char *url;
+    int result_reason;      /* -1 = equal, else KOMPARU_DIFF_* */
+} url_cmp_task_t;
+
+static void url_cmp_task_exec(void *arg) {
+    url_cmp_task_t *task = (url_cmp_task_t *)arg;
+    const url_cmp_opts_t *o = task->opts;
+    task->result_reason = -1;  /* assume equal */
+
+    char full_path[PATH_MAX];
+    snprintf(full_path, sizeof(full_path), "%s/%s", o->dir_path, task->rel_path);
+
+    const char *open_err = NULL;
+    komparu_reader_t *ra = komparu_reader_file_open(full_path, &open_err);
+    if (!ra) {
+        task->result_reason = KOMPARU_DIFF_READ_ERROR;
+        return;
+    }
+
+    komparu_reader_t *rb = komparu_reader_http_open_sized(
+        task->url, o->headers,
+        o->timeout, o->follow_redirects, o->verify_ssl, o->allow_private,
+        o->proxy, ra->get_size(ra), &open_err);
+    if (!rb) {
+        ra->close(ra);
+        task->result_reason = KOMPARU_DIFF_READ_ERROR;
+        return;
+    }
+
+    /* Size pre-check */
+    if (o->size_precheck) {
+        int64_t sa = ra->get_size(ra);
+        int64_t sb = rb->get_size(rb);
+        if (sa >= 0 && sb >= 0 && sa != sb) {
+            ra->close(ra);
+            rb->close(rb);
+            task->result_reason = KOMPARU_DIFF_SIZE;
+            return;
+        }
+    }
+
+    /* Quick check */
+    if (o->quick_check) {
+        const char *qerr = NULL;
+        komparu_result_t qr = komparu_quick_check(ra, rb, o->chunk_size, &qerr);
+        if (qr == KOMPARU_DIFFERENT) {
+            ra->close(ra);
+            rb->close(rb);
+            task->result_reason = KOMPARU_DIFF_CONTENT;
+            return;
+        }
+        if (qr == KOMPARU_ERROR && ra->seek && rb->seek) {
+            ra->seek(ra, 0);
+            rb->seek(rb, 0);
+        }
+    }
+
+    /* Full comparison */
+    const char *cmp_err = NULL;
+    komparu_result_t cr = komparu_compare(ra, rb, o->chunk_size, false, &cmp_err);
+    ra->close(ra);
+    rb->close(rb);
+
+    if (cr == KOMPARU_DIFFERENT)
+        task->result_reason = KOMPARU_DIFF_CONTENT;
+    else if (cr == KOMPARU_ERROR)
+        task->result_reason = KOMPARU_DIFF_READ_ERROR;
+}
+
+/* =========================================================================
+ * Directory vs URL map comparison — sorted merge, common entries are
+ * handed to the pool as soon as the merge reaches them
+ * ========================================================================= */
+
 komparu_dir_result_t *komparu_compare_dir_urls(
     const char *dir_path,
     const char **rel_paths,
@@ -705,6 +947,7 @@ komparu_dir_result_t *komparu_compare_dir_urls(
     bool verify_ssl,
     bool allow_private,
     const char *proxy,
+    size_t max_workers,
     const char **err_msg
 ) {
     if (chunk_size == 0) chunk_size = KOMPARU_DEFAULT_CHUNK_SIZE;
@@ -716,28 +959,25 @@ komparu_dir_result_t *komparu_compare_dir_urls(
         return NULL;
     }
 
-    /* Build sorted index over URL rel_paths */
-    size_t *url_order = NULL;
+    /* Build sorted index over URL rel_paths: pointers into rel_paths, so
+     * the URL of an entry is urls[url_order[k] - rel_paths]. */
+    const char ***url_order = NULL;
     if (url_count > 0) {
-        url_order = malloc(url_count * sizeof(size_t));
+        url_order = malloc(url_count * sizeof(*url_order));
         if (KOMPARU_UNLIKELY(!url_order)) {
             komparu_pathlist_free(&local_paths);
             komparu_pathlist_free(&local_errors);
             *err_msg = "out of memory";
             return NULL;
         }
-        for (size_t k = 0; k < url_count; k++) url_order[k] = k;
-
-        /* Insertion sort by rel_path — url_count is typically small */
+        for (size_t k = 0; k < url_count; k++) url_order[k] = &rel_paths[k];
+        /* Maps built from a bucket listing (S3, GCS) arrive in key order
+         * already; sort only if not */
         for (size_t k = 1; k < url_count; k++) {
-            size_t tmp = url_order[k];
-            size_t m = k;
-            while (m > 0 && strcmp(rel_paths[url_order[m - 1]],
-                                   rel_paths[tmp]) > 0) {
-                url_order[m] = url_order[m - 1];
-                m--;
+            if (strcmp(rel_paths[k - 1], rel_paths[k]) > 0) {
+                qsort(url_order, url_count, sizeof(*url_order), rel_path_ptr_cmp);
+                break;
             }
-            url_order[m] = tmp;
         }
     }
 
@@ -763,10 +1003,42 @@ komparu_dir_result_t *komparu_compare_dir_urls(
     }
     komparu_pathlist_free(&local_errors);
 
-    /* Sorted merge: local_paths (already sorted) vs url_order */
+    /* At most min(local, url) common entries: sized once, so tasks
+     * already in the pool never move */
+    const url_cmp_opts_t opts = {
+        .dir_path = dir_path,
+        .headers = headers,
+        .chunk_size = chunk_size,
+        .size_precheck = size_precheck,
+        .quick_check = quick_check,
+        .timeout = timeout,
+        .follow_redirects = follow_redirects,
+        .verify_ssl = verify_ssl,
+        .allow_private = allow_private,
+        .proxy = proxy,
+    };
+    size_t task_cap = local_paths.count < url_count ? local_paths.count : url_count;
+    url_cmp_task_t *tasks = NULL;
+    size_t task_count = 0;
+    komparu_pool_t *pool = NULL;
+    if (task_cap > 0) {
+        tasks = malloc(task_cap * sizeof(*tasks));
+        if (KOMPARU_UNLIKELY(!tasks)) {
+            *err_msg = "out of memory";
+            goto fail;
+        }
+        /* Each comparison is dominated by HTTP round trips, so run them
+         * concurrently; falls back to sequential if creation fails */
+        if (max_workers != 1 && task_cap > 1) {
+            pool = komparu_pool_acquire(max_workers);
+        }
+    }
+
+    /* Sorted merge: local_paths (already sorted) vs url_order. Common
+     * entries start comparing while the merge goes on. */
     size_t li = 0, ui = 0;
     while (li < local_paths.count && ui < url_count) {
-        size_t uidx = url_order[ui];
+        size_t uidx = (size_t)(url_order[ui] - rel_paths);
         int cmp = strcmp(local_paths.paths[li], rel_paths[uidx]);
 
         if (cmp < 0) {
@@ -784,79 +1056,16 @@ komparu_dir_result_t *komparu_compare_dir_urls(
             }
             ui++;
         } else {
-            /* Common entry — compare local file vs URL */
-            char full_path[PATH_MAX];
-            snprintf(full_path, sizeof(full_path), "%s/%s",
-                     dir_path, local_paths.paths[li]);
-
-            const char *open_err = NULL;
-            komparu_reader_t *ra = komparu_reader_file_open(full_path, &open_err);
-            if (!ra) {
-                komparu_dir_result_add_diff(result, local_paths.paths[li],
-                                            KOMPARU_DIFF_READ_ERROR);
-                li++; ui++;
-                continue;
+            url_cmp_task_t *t = &tasks[task_count++];
+            *t = (url_cmp_task_t){
+                .opts = &opts,
+                .rel_path = local_paths.paths[li],
+                .url = urls[uidx],
+                .result_reason = -1,
+            };
+            if (!pool || KOMPARU_UNLIKELY(komparu_pool_submit(pool, url_cmp_task_exec, t) != 0)) {
+                url_cmp_task_exec(t);
             }
-
-            komparu_reader_t *rb = komparu_reader_http_open_ex(
-                urls[uidx], headers,
-                timeout, follow_redirects, verify_ssl, allow_private,
-                proxy, &open_err);
-            if (!rb) {
-                ra->close(ra);
-                komparu_dir_result_add_diff(result, local_paths.paths[li],
-                                            KOMPARU_DIFF_READ_ERROR);
-                li++; ui++;
-                continue;
-            }
-
-            /* Size pre-check */
-            if (size_precheck) {
-                int64_t sa = ra->get_size(ra);
-                int64_t sb = rb->get_size(rb);
-                if (sa >= 0 && sb >= 0 && sa != sb) {
-                    ra->close(ra);
-                    rb->close(rb);
-                    komparu_dir_result_add_diff(result, local_paths.paths[li],
-                                                KOMPARU_DIFF_SIZE);
-                    li++; ui++;
-                    continue;
-                }
-            }
-
-            /* Quick check */
-            if (quick_check) {
-                const char *qerr = NULL;
-                komparu_result_t qr = komparu_quick_check(
-                    ra, rb, chunk_size, &qerr);
-                if (qr == KOMPARU_DIFFERENT) {
-                    ra->close(ra);
-                    rb->close(rb);
-                    komparu_dir_result_add_diff(result, local_paths.paths[li],
-                                                KOMPARU_DIFF_CONTENT);
-                    li++; ui++;
-                    continue;
-                }
-                if (qr == KOMPARU_ERROR && ra->seek && rb->seek) {
-                    ra->seek(ra, 0);
-                    rb->seek(rb, 0);
-                }
-            }
-
-            /* Full comparison */
-            const char *cmp_err = NULL;
-            komparu_result_t cr = komparu_compare(
-                ra, rb, chunk_size, false, &cmp_err);
-            ra->close(ra);
-            rb->close(rb);
-
-            if (cr == KOMPARU_DIFFERENT)
-                komparu_dir_result_add_diff(result, local_paths.paths[li],
-                                            KOMPARU_DIFF_CONTENT);
-            else if (cr == KOMPARU_ERROR)
-                komparu_dir_result_add_diff(result, local_paths.paths[li],
-                                            KOMPARU_DIFF_READ_ERROR);
-
             li++; ui++;
         }
     }
@@ -870,7 +1079,7 @@ komparu_dir_result_t *komparu_compare_dir_urls(
         li++;
     }
     while (ui < url_count) {
-        size_t uidx = url_order[ui];
+        size_t uidx = (size_t)(url_order[ui] - rel_paths);
         if (KOMPARU_UNLIKELY(komparu_dir_result_add_only_right(
                 result, rel_paths[uidx]) != 0)) {
             *err_msg = "out of memory";
@@ -879,11 +1088,29 @@ komparu_dir_result_t *komparu_compare_dir_urls(
         ui++;
     }
 
+    komparu_pool_release(pool);
+    pool = NULL;
+
+    /* Collect results in merge (sorted) order */
+    for (size_t k = 0; k < task_count; k++) {
+        if (tasks[k].result_reason >= 0) {
+            if (KOMPARU_UNLIKELY(komparu_dir_result_add_diff(
+                    result, tasks[k].rel_path, tasks[k].result_reason) != 0)) {
+                *err_msg = "out of memory";
+                goto fail;
+            }
+        }
+    }
+
+    free(tasks);
     komparu_pathlist_free(&local_paths);
     free(url_order);
     return result;
 
 fail:
+    /* Tasks in flight point into tasks and local_paths */
+    komparu_pool_release(pool);
+    free(tasks);
     komparu_pathlist_free(&local_paths);
     free(url_order);
     komparu_dir_result_free(result);
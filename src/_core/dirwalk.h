@@ -72,6 +72,8 @@ void komparu_pathlist_free(komparu_pathlist_t *list);
  * Walks both directories, merge-compares sorted path lists,
  * opens file readers and uses komparu_compare for each common entry.
  * If max_workers > 1, file comparisons run in parallel.
+ * If trust_mtime, regular files with equal size and modification time
+ * are reported equal without reading their content.
  *
  * Returns allocated dir_result_t on success, NULL on error.
  * Caller must free with komparu_dir_result_free().
@@ -82,20 +84,38 @@ komparu_dir_result_t *komparu_compare_dirs(
     size_t chunk_size,
     bool size_precheck,
     bool quick_check,
+    bool trust_mtime,
     bool follow_symlinks,
     size_t max_workers,
     const char **err_msg
 );
 
+/**
+ * Copy a URL map (parallel arrays of length count > 0) into one block:
+ * both pointer arrays followed by the strings. *rel_out and *urls_out
+ * point into the returned block, which is released with a single free().
+ * Returns NULL on out of memory.
+ */
+void *komparu_url_map_copy(
+    const char *const *rel_paths,
+    const char *const *urls,
+    size_t count,
+    const char ***rel_out,
+    const char ***urls_out
+);
+
 /**
  * Compare local directory files against a URL mapping.
  *
  * Walks dir_path with komparu_dirwalk, merge-compares against the URL map,
  * opens file + HTTP readers for each common entry and compares content.
+ * Each common entry is handed to a thread pool as soon as the merge finds
+ * it, so the HTTP round trips overlap each other and the rest of the merge.
  * All I/O in C — no Python involvement.
  *
  * rel_paths/urls: parallel arrays of length url_count.
  * headers: NULL-terminated "Key: Value" array, or NULL.
+ * max_workers: pool size (0 = auto, 1 = sequential).
  * Returns allocated dir_result_t on success, NULL on error.
  * Caller must free with komparu_dir_result_free().
  */
@@ -113,6 +133,7 @@ komparu_dir_result_t *komparu_compare_dir_urls(
     bool verify_ssl,
     bool allow_private,
     const char *proxy,
+    size_t max_workers,
     const char **err_msg
 );
 
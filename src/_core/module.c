@@ -14,8 +14,10 @@
 #include "dirwalk.h"
 #include "reader_archive.h"
 #include "async_task.h"
+#include "pool.h"
 #include <string.h>
 #include <stdlib.h>
+#include <stdatomic.h>
 
 /* =========================================================================
  * URL detection — check if source is an HTTP(S) URL
@@ -89,6 +91,43 @@ static void free_header_array(const char **arr, size_t count) {
     free(arr);
 }
 
+/* =========================================================================
+ * Borrow the UTF-8 strings of a url_map dict as parallel C arrays.
+ * Must be called with GIL held; the strings stay owned by the dict, so
+ * copy them before releasing the GIL. Returns the entry count and sets
+ * *views to rel_paths followed by urls (2 * count pointers, one free()),
+ * or returns -1 with an exception set.
+ * ========================================================================= */
+
+static Py_ssize_t url_map_views(PyObject *py_url_map, const char ***views) {
+    *views = NULL;
+    Py_ssize_t map_size = PyDict_Size(py_url_map);
+    if (map_size == 0) return 0;
+
+    const char **arr = malloc(2 * (size_t)map_size * sizeof(const char *));
+    if (!arr) {
+        PyErr_NoMemory();
+        return -1;
+    }
+
+    PyObject *key, *value;
+    Py_ssize_t pos = 0;
+    Py_ssize_t idx = 0;
+    while (PyDict_Next(py_url_map, &pos, &key, &value)) {
+        arr[idx] = PyUnicode_Check(key) ? PyUnicode_AsUTF8(key) : NULL;
+        arr[map_size + idx] = PyUnicode_Check(value) ? PyUnicode_AsUTF8(value) : NULL;
+        if (!arr[idx] || !arr[map_size + idx]) {
+            free(arr);
+            PyErr_Clear();
+            PyErr_SetString(PyExc_TypeError, "url_map keys and values must be strings");
+            return -1;
+        }
+        idx++;
+    }
+    *views = arr;
+    return map_size;
+}
+
 /* =========================================================================
  * Open a reader based on source type (file or HTTP).
  * Pure C — no Python API calls. Safe to call without GIL.
@@ -102,13 +141,14 @@ static komparu_reader_t *open_reader(
     int verify_ssl,
     int allow_private,
     const char *proxy,
+    int64_t expected_size,      /* size of the other side, -1 if unknown */
     const char **err_msg
 ) {
     if (is_url(source)) {
-        return komparu_reader_http_open_ex(
+        return komparu_reader_http_open_sized(
             source, header_array,
             timeout, (bool)follow_redirects, (bool)verify_ssl,
-            (bool)allow_private, proxy,
+            (bool)allow_private, proxy, expected_size,
             err_msg
         );
     }
@@ -117,6 +157,98 @@ static komparu_reader_t *open_reader(
     return komparu_reader_file_open(source, err_msg);
 }
 
+/* =========================================================================
+ * Cancel flag — lets a batch stop the sync comparisons it no longer needs.
+ * compare(cancel=flag) wraps reader A in a guard that fails its next read
+ * once the flag is set, so the comparison ends within one chunk.
+ * ========================================================================= */
+
+typedef struct {
+    komparu_reader_t base;
+    komparu_reader_t *inner;
+    const atomic_bool *cancel;
+} cancel_guard_t;
+
+static int64_t cancel_guard_read(komparu_reader_t *self, void *buf, size_t size) {
+    cancel_guard_t *g = (cancel_guard_t *)self;
+    if (KOMPARU_UNLIKELY(atomic_load_explicit(g->cancel, memory_order_relaxed))) {
+        return -1;
+    }
+    return g->inner->read(g->inner, buf, size);
+}
+
+static int64_t cancel_guard_read_view(komparu_reader_t *self, const void **view, size_t size) {
+    cancel_guard_t *g = (cancel_guard_t *)self;
+    if (KOMPARU_UNLIKELY(atomic_load_explicit(g->cancel, memory_order_relaxed))) {
+        return -1;
+    }
+    return g->inner->read_view(g->inner, view, size);
+}
+
+static int64_t cancel_guard_read_compare(komparu_reader_t *self, const void *other, size_t size) {
+    cancel_guard_t *g = (cancel_guard_t *)self;
+    if (KOMPARU_UNLIKELY(atomic_load_explicit(g->cancel, memory_order_relaxed))) {
+        return -1;
+    }
+    return g->inner->read_compare(g->inner, other, size);
+}
+
+static int64_t cancel_guard_get_size(komparu_reader_t *self) {
+    cancel_guard_t *g = (cancel_guard_t *)self;
+    return g->inner->get_size(g->inner);
+}
+
+static int cancel_guard_seek(komparu_reader_t *self, int64_t offset) {
+    cancel_guard_t *g = (cancel_guard_t *)self;
+    return g->inner->seek(g->inner, offset);
+}
+
+static void cancel_guard_close(komparu_reader_t *self) {
+    cancel_guard_t *g = (cancel_guard_t *)self;
+    g->inner->close(g->inner);
+}
+
+/* Wrap `inner` in a caller-owned guard (no allocation). */
+static komparu_reader_t *cancel_guard_wrap(cancel_guard_t *g, komparu_reader_t *inner,
+                                           const atomic_bool *cancel) {
+    g->inner = inner;
+    g->cancel = cancel;
+    g->base = (komparu_reader_t){
+        .read = cancel_guard_read,
+        .read_view = inner->read_view ? cancel_guard_read_view : NULL,
+        .read_compare = inner->read_compare ? cancel_guard_read_compare : NULL,
+        .get_size = cancel_guard_get_size,
+        .seek = inner->seek ? cancel_guard_seek : NULL,
+        .close = cancel_guard_close,
+        .ctx = NULL,
+        .source_name = inner->source_name,
+    };
+    return &g->base;
+}
+
+static void cancel_flag_capsule_destructor(PyObject *capsule) {
+    free(PyCapsule_GetPointer(capsule, "komparu.cancel_flag"));
+}
+
+static PyObject *py_cancel_flag_new(PyObject *self, PyObject *Py_UNUSED(arg)) {
+    (void)self;
+    atomic_bool *flag = malloc(sizeof(*flag));
+    if (!flag) return PyErr_NoMemory();
+    atomic_init(flag, false);
+    PyObject *capsule = PyCapsule_New(flag, "komparu.cancel_flag",
+                                      cancel_flag_capsule_destructor);
+    if (!capsule) free(flag);
+    return capsule;
+}
+
+static PyObject *py_cancel_flag_set(PyObject *self, PyObject *arg) {
+    (void)self;
+    atomic_bool *flag = PyCapsule_GetPointer(arg, "komparu.cancel_flag");
+    if (!flag) return NULL;
+    atomic_store_explicit(flag, true, memory_order_relaxed);
+    Py_RETURN_NONE;
+}
+
 /* =========================================================================
  * Python wrapper: compare(source_a, source_b, ...) -> bool
  * ========================================================================= */
@@ -135,20 +267,29 @@ static PyObject *py_compare(PyObject *self, PyObject *args, PyObject *kwargs) {
     int verify_ssl = 1;
     int allow_private = 0;
     const char *proxy = NULL;
+    PyObject *py_cancel = Py_None;
 
     static char *kwlist[] = {
         "source_a", "source_b", "chunk_size", "size_precheck", "quick_check",
         "headers", "timeout", "follow_redirects", "verify_ssl", "allow_private",
-        "proxy", NULL
+        "proxy", "cancel", NULL
     };
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|nppOdpppz", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|nppOdpppzO", kwlist,
             &source_a, &source_b, &chunk_size, &size_precheck, &quick_check,
             &py_headers, &timeout, &follow_redirects, &verify_ssl,
-            &allow_private, &proxy)) {
+            &allow_private, &proxy, &py_cancel)) {
         return NULL;
     }
 
+    /* The flag lives in the capsule, which the argument tuple keeps
+     * alive for the whole call */
+    const atomic_bool *cancel = NULL;
+    if (py_cancel != Py_None) {
+        cancel = PyCapsule_GetPointer(py_cancel, "komparu.cancel_flag");
+        if (!cancel) return NULL;
+    }
+
     if (chunk_size <= 0) {
         PyErr_SetString(PyExc_ValueError, "chunk_size must be positive");
         return NULL;
@@ -194,6 +335,7 @@ static PyObject *py_compare(PyObject *self, PyObject *args, PyObject *kwargs) {
     komparu_result_t result;
     komparu_reader_t *reader_a = NULL;
     komparu_reader_t *reader_b = NULL;
+    cancel_guard_t guard;
 
     KOMPARU_GIL_STATE_DECL
     KOMPARU_GIL_RELEASE()
@@ -217,12 +359,16 @@ static PyObject *py_compare(PyObject *self, PyObject *args, PyObject *kwargs) {
 #endif
 
     reader_a = open_reader(
-        src_a, header_array, timeout, follow_redirects, verify_ssl, allow_private, proxy_copy, &err_msg
+        src_a, header_array, timeout, follow_redirects, verify_ssl, allow_private, proxy_copy,
+        -1, &err_msg
     );
     if (!reader_a) goto open_failed;
+    if (cancel) reader_a = cancel_guard_wrap(&guard, reader_a, cancel);
 
+    /* A local A bounds how much of a URL B opening needs to fetch */
     reader_b = open_reader(
-        src_b, header_array, timeout, follow_redirects, verify_ssl, allow_private, proxy_copy, &err_msg
+        src_b, header_array, timeout, follow_redirects, verify_ssl, allow_private, proxy_copy,
+        src_a_is_url ? -1 : reader_a->get_size(reader_a), &err_msg
     );
     if (!reader_b) goto open_failed;
 
@@ -313,13 +459,107 @@ done:
  * Must be called with GIL held.
  * ========================================================================= */
 
-static const char *diff_reason_str(int reason) {
-    switch (reason) {
-        case KOMPARU_DIFF_CONTENT: return "content_mismatch";
-        case KOMPARU_DIFF_SIZE:    return "size_mismatch";
-        case KOMPARU_DIFF_READ_ERROR: return "read_error";
-        default: return "unknown";
+/* Above this many paths, only_left/only_right are returned as a sorted
+ * tuple (wrapped in a PathSet view) instead of a set, and diff as sorted
+ * paths plus a byte string of reason codes instead of a dict — roughly
+ * half the memory for huge trees, and no hash table to build. */
+#define KOMPARU_PATHS_AS_TUPLE_THRESHOLD 10000
+
+static int path_strcmp(const void *a, const void *b) {
+    return strcmp(*(const char *const *)a, *(const char *const *)b);
+}
+
+static PyObject *path_array_to_python(char **paths, size_t count) {
+    if (count <= KOMPARU_PATHS_AS_TUPLE_THRESHOLD) {
+        PyObject *set = PySet_New(NULL);
+        if (!set) return NULL;
+        for (size_t i = 0; i < count; i++) {
+            PyObject *s = PyUnicode_FromString(paths[i]);
+            if (!s || PySet_Add(set, s) < 0) {
+                Py_XDECREF(s);
+                Py_DECREF(set);
+                return NULL;
+            }
+            Py_DECREF(s);
+        }
+        return set;
     }
+
+    /* Producers emit these in merge order already; sort only if not */
+    for (size_t i = 1; i < count; i++) {
+        if (strcmp(paths[i - 1], paths[i]) > 0) {
+            qsort(paths, count, sizeof(char *), path_strcmp);
+            break;
+        }
+    }
+
+    PyObject *tup = PyTuple_New((Py_ssize_t)count);
+    if (!tup) return NULL;
+    for (size_t i = 0; i < count; i++) {
+        PyObject *s = PyUnicode_FromString(paths[i]);
+        if (!s) {
+            Py_DECREF(tup);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(tup, (Py_ssize_t)i, s);
+    }
+    return tup;
+}
+
+static int diff_entry_ptr_cmp(const void *a, const void *b) {
+    const komparu_diff_entry_t *ea = *(const komparu_diff_entry_t *const *)a;
+    const komparu_diff_entry_t *eb = *(const komparu_diff_entry_t *const *)b;
+    return strcmp(ea->path, eb->path);
+}
+
+/* Above KOMPARU_PATHS_AS_TUPLE_THRESHOLD differences, diff is returned as
+ * (sorted tuple of paths, bytes of KOMPARU_DIFF_* codes) for a PathDiff
+ * view instead of a dict. Returns NULL without an exception if the paths
+ * are not unique (archives may repeat a name), so the caller builds the
+ * dict, where the last entry for a name wins as before. */
+static PyObject *diff_array_to_python(komparu_dir_result_t *r) {
+    size_t count = r->diff_count;
+    komparu_diff_entry_t **sorted = malloc(count * sizeof(*sorted));
+    if (!sorted) return PyErr_NoMemory();
+    bool in_order = true;
+    for (size_t i = 0; i < count; i++) {
+        sorted[i] = &r->diffs[i];
+        if (i > 0 && strcmp(r->diffs[i - 1].path, r->diffs[i].path) > 0) {
+            in_order = false;
+        }
+    }
+    /* Producers emit these in merge order already; sort only if not */
+    if (!in_order) {
+        qsort(sorted, count, sizeof(*sorted), diff_entry_ptr_cmp);
+    }
+    for (size_t i = 1; i < count; i++) {
+        if (strcmp(sorted[i - 1]->path, sorted[i]->path) == 0) {
+            free(sorted);
+            return NULL;
+        }
+    }
+
+    PyObject *paths = PyTuple_New((Py_ssize_t)count);
+    PyObject *codes = PyBytes_FromStringAndSize(NULL, (Py_ssize_t)count);
+    if (!paths || !codes) goto fail;
+    char *code = PyBytes_AS_STRING(codes);
+    for (size_t i = 0; i < count; i++) {
+        PyObject *s = PyUnicode_FromString(sorted[i]->path);
+        if (!s) goto fail;
+        PyTuple_SET_ITEM(paths, (Py_ssize_t)i, s);
+        code[i] = (char)sorted[i]->reason;
+    }
+    free(sorted);
+    PyObject *pair = PyTuple_Pack(2, paths, codes);
+    Py_DECREF(paths);
+    Py_DECREF(codes);
+    return pair;
+
+fail:
+    free(sorted);
+    Py_XDECREF(paths);
+    Py_XDECREF(codes);
+    return NULL;
 }
 
 static PyObject *dir_result_to_python(komparu_dir_result_t *r) {
@@ -330,13 +570,19 @@ static PyObject *dir_result_to_python(komparu_dir_result_t *r) {
     PyObject *equal = r->equal ? Py_True : Py_False;
     if (PyDict_SetItemString(dict, "equal", equal) < 0) goto fail;
 
-    /* diff: dict[str, str] */
+    /* diff: dict[str, int] of KOMPARU_DIFF_* codes, or (paths, codes)
+     * when large */
     {
-        PyObject *diff = PyDict_New();
+        PyObject *diff = NULL;
+        if (r->diff_count > KOMPARU_PATHS_AS_TUPLE_THRESHOLD) {
+            diff = diff_array_to_python(r);
+            if (!diff && PyErr_Occurred()) goto fail;
+        }
+        if (!diff) diff = PyDict_New();
         if (!diff) goto fail;
-        for (size_t i = 0; i < r->diff_count; i++) {
+        for (size_t i = 0; PyDict_Check(diff) && i < r->diff_count; i++) {
             PyObject *key = PyUnicode_FromString(r->diffs[i].path);
-            PyObject *val = PyUnicode_FromString(diff_reason_str(r->diffs[i].reason));
+            PyObject *val = PyLong_FromLong(r->diffs[i].reason);
             if (!key || !val || PyDict_SetItem(diff, key, val) < 0) {
                 Py_XDECREF(key);
                 Py_XDECREF(val);
@@ -353,19 +599,10 @@ static PyObject *dir_result_to_python(komparu_dir_result_t *r) {
         Py_DECREF(diff);
     }
 
-    /* only_left: set[str] */
+    /* only_left / only_right: set[str], or sorted tuple[str, ...] for a PathSet */
     {
-        PyObject *ol = PySet_New(NULL);
+        PyObject *ol = path_array_to_python(r->only_left, r->only_left_count);
         if (!ol) goto fail;
-        for (size_t i = 0; i < r->only_left_count; i++) {
-            PyObject *s = PyUnicode_FromString(r->only_left[i]);
-            if (!s || PySet_Add(ol, s) < 0) {
-                Py_XDECREF(s);
-                Py_DECREF(ol);
-                goto fail;
-            }
-            Py_DECREF(s);
-        }
         if (PyDict_SetItemString(dict, "only_left", ol) < 0) {
             Py_DECREF(ol);
             goto fail;
@@ -373,19 +610,9 @@ static PyObject *dir_result_to_python(komparu_dir_result_t *r) {
         Py_DECREF(ol);
     }
 
-    /* only_right: set[str] */
     {
-        PyObject *or_set = PySet_New(NULL);
+        PyObject *or_set = path_array_to_python(r->only_right, r->only_right_count);
         if (!or_set) goto fail;
-        for (size_t i = 0; i < r->only_right_count; i++) {
-            PyObject *s = PyUnicode_FromString(r->only_right[i]);
-            if (!s || PySet_Add(or_set, s) < 0) {
-                Py_XDECREF(s);
-                Py_DECREF(or_set);
-                goto fail;
-            }
-            Py_DECREF(s);
-        }
         if (PyDict_SetItemString(dict, "only_right", or_set) < 0) {
             Py_DECREF(or_set);
             goto fail;
@@ -434,15 +661,16 @@ static PyObject *py_compare_dir(PyObject *self, PyObject *args, PyObject *kwargs
     int quick_check = 1;
     int follow_symlinks = 1;
     Py_ssize_t max_workers = 0;  /* 0 = auto */
+    int trust_mtime = 0;
 
     static char *kwlist[] = {
         "dir_a", "dir_b", "chunk_size", "size_precheck",
-        "quick_check", "follow_symlinks", "max_workers", NULL
+        "quick_check", "follow_symlinks", "max_workers", "trust_mtime", NULL
     };
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|npppn", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|npppnp", kwlist,
             &dir_a, &dir_b, &chunk_size, &size_precheck,
-            &quick_check, &follow_symlinks, &max_workers)) {
+            &quick_check, &follow_symlinks, &max_workers, &trust_mtime)) {
         return NULL;
     }
 
@@ -468,7 +696,7 @@ static PyObject *py_compare_dir(PyObject *self, PyObject *args, PyObject *kwargs
 
     result = komparu_compare_dirs(da, db,
         (size_t)chunk_size, (bool)size_precheck,
-        (bool)quick_check, (bool)follow_symlinks,
+        (bool)quick_check, (bool)trust_mtime, (bool)follow_symlinks,
         (size_t)(max_workers >= 0 ? max_workers : 0),
         &err_msg);
 
@@ -509,17 +737,25 @@ static PyObject *py_compare_archive(PyObject *self, PyObject *args, PyObject *kw
     long long max_entries = -1;
     long long max_entry_name_length = -1;
     int hash_compare = 0;
+    Py_ssize_t parallel_workers = 1;
 
     static char *kwlist[] = {
         "path_a", "path_b", "chunk_size",
         "max_decompressed_size", "max_compression_ratio",
-        "max_entries", "max_entry_name_length", "hash_compare", NULL
+        "max_entries", "max_entry_name_length", "hash_compare",
+        "parallel_workers", NULL
     };
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|nLiLLp", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|nLiLLpn", kwlist,
             &path_a, &path_b, &chunk_size,
             &max_decompressed_size, &max_compression_ratio,
-            &max_entries, &max_entry_name_length, &hash_compare)) {
+            &max_entries, &max_entry_name_length, &hash_compare,
+            &parallel_workers)) {
+        return NULL;
+    }
+
+    if (parallel_workers < 0) {
+        PyErr_SetString(PyExc_ValueError, "parallel_workers must be >= 0");
         return NULL;
     }
 
@@ -565,7 +801,10 @@ static PyObject *py_compare_archive(PyObject *self, PyObject *args, PyObject *kw
     }
 #endif
 
-    if (hash_compare) {
+    if (parallel_workers != 1) {
+        result = komparu_compare_archives_parallel(pa, pb,
+            (size_t)parallel_workers, mds, mcr, me, menl, NULL, &err_msg);
+    } else if (hash_compare) {
         result = komparu_compare_archives_hashed(pa, pb,
             mds, mcr, me, menl, NULL, &err_msg);
     } else {
@@ -613,17 +852,18 @@ static PyObject *py_compare_dir_urls(PyObject *self, PyObject *args, PyObject *k
     int verify_ssl = 1;
     int allow_private = 0;
     const char *proxy = NULL;
+    Py_ssize_t max_workers = 0;  /* 0 = auto */
 
     static char *kwlist[] = {
         "dir_path", "url_map", "chunk_size", "size_precheck", "quick_check",
         "headers", "timeout", "follow_redirects", "verify_ssl", "allow_private",
-        "proxy", NULL
+        "proxy", "max_workers", NULL
     };
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "sO|nppOdpppz", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "sO|nppOdpppzn", kwlist,
             &dir_path, &py_url_map, &chunk_size, &size_precheck, &quick_check,
             &py_headers, &timeout, &follow_redirects, &verify_ssl,
-            &allow_private, &proxy)) {
+            &allow_private, &proxy, &max_workers)) {
         return NULL;
     }
 
@@ -642,54 +882,23 @@ static PyObject *py_compare_dir_urls(PyObject *self, PyObject *args, PyObject *k
         return NULL;
     }
 
-    /* Convert url_map dict to parallel C arrays */
-    Py_ssize_t map_size = PyDict_Size(py_url_map);
-    char **rel_paths = NULL;
-    char **url_strs = NULL;
+    /* Copy url_map into one block — the dict may change once the GIL
+     * is released */
+    const char **views;
+    Py_ssize_t map_size = url_map_views(py_url_map, &views);
+    if (map_size < 0) return NULL;
 
+    const char **rel_paths = NULL;
+    const char **url_strs = NULL;
+    void *url_block = NULL;
     if (map_size > 0) {
-        rel_paths = calloc((size_t)map_size, sizeof(char *));
-        url_strs = calloc((size_t)map_size, sizeof(char *));
-        if (!rel_paths || !url_strs) {
-            free(rel_paths);
-            free(url_strs);
+        url_block = komparu_url_map_copy(views, views + map_size, (size_t)map_size,
+                                         &rel_paths, &url_strs);
+        free(views);
+        if (!url_block) {
             PyErr_NoMemory();
             return NULL;
         }
-
-        PyObject *key, *value;
-        Py_ssize_t pos = 0;
-        Py_ssize_t idx = 0;
-        while (PyDict_Next(py_url_map, &pos, &key, &value)) {
-            const char *k = PyUnicode_AsUTF8(key);
-            const char *v = PyUnicode_AsUTF8(value);
-            if (!k || !v) {
-                /* Free already-duped strings */
-                for (Py_ssize_t j = 0; j < idx; j++) {
-                    free(rel_paths[j]);
-                    free(url_strs[j]);
-                }
-                free(rel_paths);
-                free(url_strs);
-                PyErr_SetString(PyExc_TypeError,
-                                "url_map keys and values must be strings");
-                return NULL;
-            }
-            rel_paths[idx] = strdup(k);
-            url_strs[idx] = strdup(v);
-            if (!rel_paths[idx] || !url_strs[idx]) {
-                /* Cleanup on OOM */
-                for (Py_ssize_t j = 0; j <= idx; j++) {
-                    free(rel_paths[j]);
-                    free(url_strs[j]);
-                }
-                free(rel_paths);
-                free(url_strs);
-                PyErr_NoMemory();
-                return NULL;
-            }
-            idx++;
-        }
     }
 
     /* Build headers */
@@ -698,12 +907,7 @@ static PyObject *py_compare_dir_urls(PyObject *self, PyObject *args, PyObject *k
     const char **header_array = build_header_array(
         py_headers, &header_count, &err_msg);
     if (err_msg) {
-        for (Py_ssize_t j = 0; j < map_size; j++) {
-            free(rel_paths[j]);
-            free(url_strs[j]);
-        }
-        free(rel_paths);
-        free(url_strs);
+        free(url_block);
         PyErr_SetString(PyExc_ValueError, err_msg);
         return NULL;
     }
@@ -714,12 +918,7 @@ static PyObject *py_compare_dir_urls(PyObject *self, PyObject *args, PyObject *k
     if (!dir_copy || (proxy && !proxy_copy)) {
         free(dir_copy);
         free(proxy_copy);
-        for (Py_ssize_t j = 0; j < map_size; j++) {
-            free(rel_paths[j]);
-            free(url_strs[j]);
-        }
-        free(rel_paths);
-        free(url_strs);
+        free(url_block);
         free_header_array(header_array, header_count);
         PyErr_NoMemory();
         return NULL;
@@ -732,8 +931,8 @@ static PyObject *py_compare_dir_urls(PyObject *self, PyObject *args, PyObject *k
 
     result = komparu_compare_dir_urls(
         dir_copy,
-        (const char **)rel_paths,
-        (const char **)url_strs,
+        rel_paths,
+        url_strs,
         (size_t)map_size,
         header_array,
         (size_t)chunk_size,
@@ -744,6 +943,7 @@ static PyObject *py_compare_dir_urls(PyObject *self, PyObject *args, PyObject *k
         (bool)verify_ssl,
         (bool)allow_private,
         proxy_copy,
+        (size_t)max_workers,
         &err_msg);
 
     KOMPARU_GIL_ACQUIRE()
@@ -751,12 +951,7 @@ static PyObject *py_compare_dir_urls(PyObject *self, PyObject *args, PyObject *k
     /* Cleanup C copies */
     free(dir_copy);
     free(proxy_copy);
-    for (Py_ssize_t j = 0; j < map_size; j++) {
-        free(rel_paths[j]);
-        free(url_strs[j]);
-    }
-    free(rel_paths);
-    free(url_strs);
+    free(url_block);
     free_header_array(header_array, header_count);
 
     /* Check for pending signals (e.g., Ctrl+C) raised while GIL was released */
@@ -776,6 +971,102 @@ static PyObject *py_compare_dir_urls(PyObject *self, PyObject *args, PyObject *k
     return py_result;
 }
 
+/* =========================================================================
+ * Python wrapper: fingerprint(source, ...) -> bytes
+ * ========================================================================= */
+
+static PyObject *py_fingerprint(PyObject *self, PyObject *args, PyObject *kwargs) {
+    (void)self;
+
+    const char *source = NULL;
+    Py_ssize_t chunk_size = KOMPARU_DEFAULT_CHUNK_SIZE;
+    PyObject *py_headers = Py_None;
+    double timeout = 30.0;
+    int follow_redirects = 1;
+    int verify_ssl = 1;
+    int allow_private = 0;
+    const char *proxy = NULL;
+    int samples = 0;
+
+    static char *kwlist[] = {
+        "source", "chunk_size", "headers", "timeout", "follow_redirects",
+        "verify_ssl", "allow_private", "proxy", "samples", NULL
+    };
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "s|nOdpppzp", kwlist,
+            &source, &chunk_size, &py_headers, &timeout, &follow_redirects,
+            &verify_ssl, &allow_private, &proxy, &samples)) {
+        return NULL;
+    }
+
+    if (chunk_size <= 0) {
+        PyErr_SetString(PyExc_ValueError, "chunk_size must be positive");
+        return NULL;
+    }
+
+    if (py_headers != Py_None && !PyDict_Check(py_headers)) {
+        PyErr_SetString(PyExc_TypeError, "headers must be a dict or None");
+        return NULL;
+    }
+
+    const char *err_msg = NULL;
+    size_t header_count = 0;
+    const char **header_array = build_header_array(py_headers, &header_count, &err_msg);
+    if (err_msg) {
+        PyErr_SetString(PyExc_ValueError, err_msg);
+        return NULL;
+    }
+
+    char *src = strdup(source);
+    char *proxy_copy = proxy ? strdup(proxy) : NULL;
+    if (!src || (proxy && !proxy_copy)) {
+        free(src);
+        free(proxy_copy);
+        free_header_array(header_array, header_count);
+        PyErr_NoMemory();
+        return NULL;
+    }
+
+    uint64_t digest[3];
+    int rc = -1;
+
+    KOMPARU_GIL_STATE_DECL
+    KOMPARU_GIL_RELEASE()
+
+    komparu_reader_t *reader = open_reader(
+        src, header_array, timeout, follow_redirects, verify_ssl, allow_private, proxy_copy,
+        -1, &err_msg
+    );
+    if (reader) {
+        rc = samples
+            ? komparu_fingerprint_samples(reader, (size_t)chunk_size, digest, &err_msg)
+            : komparu_fingerprint(reader, (size_t)chunk_size, digest, &err_msg);
+        reader->close(reader);
+    }
+    free_header_array(header_array, header_count);
+    free(proxy_copy);
+
+    KOMPARU_GIL_ACQUIRE()
+
+    if (PyErr_CheckSignals() < 0) {
+        free(src);
+        return NULL;
+    }
+
+    if (!reader) {
+        PyErr_Format(is_url(src) ? PyExc_IOError : PyExc_FileNotFoundError,
+                     "cannot open '%s': %s", src, err_msg ? err_msg : "unknown error");
+        free(src);
+        return NULL;
+    }
+    free(src);
+    if (rc != 0) {
+        PyErr_Format(PyExc_IOError, "read error: %s", err_msg ? err_msg : "unknown");
+        return NULL;
+    }
+    return PyBytes_FromStringAndSize((const char *)digest, sizeof(digest));
+}
+
 /* =========================================================================
  * Python wrapper: compare_buffers(buf_a, buf_b) -> bool
  * ========================================================================= */
@@ -813,6 +1104,19 @@ static void async_task_capsule_destructor(PyObject *capsule) {
     if (task) komparu_async_task_free(task);
 }
 
+/* Borrow the channel from an optional capsule argument (None -> NULL). */
+static int channel_from_python(PyObject *obj, komparu_async_chan_t **out) {
+    *out = NULL;
+    if (obj == Py_None) return 0;
+    komparu_async_chan_t *chan = PyCapsule_GetPointer(obj, "komparu.async_chan");
+    if (!chan) {
+        PyErr_SetString(PyExc_TypeError, "channel must be an async channel handle or None");
+        return -1;
+    }
+    *out = chan;
+    return 0;
+}
+
 static PyObject *py_async_compare_start(PyObject *self, PyObject *args, PyObject *kwargs) {
     (void)self;
 
@@ -827,20 +1131,34 @@ static PyObject *py_async_compare_start(PyObject *self, PyObject *args, PyObject
     int verify_ssl = 1;
     int allow_private = 0;
     const char *proxy = NULL;
+    PyObject *py_channel = Py_None;
+    PyObject *py_shared_a = Py_None;
 
     static char *kwlist[] = {
         "source_a", "source_b", "chunk_size", "size_precheck", "quick_check",
         "headers", "timeout", "follow_redirects", "verify_ssl", "allow_private",
-        "proxy", NULL
+        "proxy", "channel", "shared_a", NULL
     };
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|nppOdpppz", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|nppOdpppzOO", kwlist,
             &source_a, &source_b, &chunk_size, &size_precheck, &quick_check,
             &py_headers, &timeout, &follow_redirects, &verify_ssl,
-            &allow_private, &proxy)) {
+            &allow_private, &proxy, &py_channel, &py_shared_a)) {
         return NULL;
     }
 
+    komparu_async_chan_t *chan = NULL;
+    if (channel_from_python(py_channel, &chan) < 0) return NULL;
+
+    komparu_file_map_t *shared_a = NULL;
+    if (py_shared_a != Py_None) {
+        shared_a = PyCapsule_GetPointer(py_shared_a, "komparu.shared_source");
+        if (!shared_a) {
+            PyErr_SetString(PyExc_TypeError, "shared_a must be a shared source handle or None");
+            return NULL;
+        }
+    }
+
     if (chunk_size <= 0) {
         PyErr_SetString(PyExc_ValueError, "chunk_size must be positive");
         return NULL;
@@ -865,7 +1183,7 @@ static PyObject *py_async_compare_start(PyObject *self, PyObject *args, PyObject
         source_a, source_b, header_array,
         (size_t)chunk_size, (bool)size_precheck, (bool)quick_check,
         timeout, (bool)follow_redirects, (bool)verify_ssl, (bool)allow_private,
-        proxy, &err_msg
+        proxy, shared_a, chan, &err_msg
     );
 
     free_header_array(header_array, header_count);
@@ -907,6 +1225,186 @@ static PyObject *py_async_compare_result(PyObject *self, PyObject *arg) {
     Py_RETURN_FALSE;
 }
 
+static PyObject *py_async_fingerprint_start(PyObject *self, PyObject *args, PyObject *kwargs) {
+    (void)self;
+
+    const char *source = NULL;
+    Py_ssize_t chunk_size = KOMPARU_DEFAULT_CHUNK_SIZE;
+    PyObject *py_headers = Py_None;
+    double timeout = 30.0;
+    int follow_redirects = 1;
+    int verify_ssl = 1;
+    int allow_private = 0;
+    const char *proxy = NULL;
+    PyObject *py_channel = Py_None;
+    int samples = 0;
+
+    static char *kwlist[] = {
+        "source", "chunk_size", "headers", "timeout", "follow_redirects",
+        "verify_ssl", "allow_private", "proxy", "channel", "samples", NULL
+    };
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "s|nOdpppzOp", kwlist,
+            &source, &chunk_size, &py_headers, &timeout, &follow_redirects,
+            &verify_ssl, &allow_private, &proxy, &py_channel, &samples)) {
+        return NULL;
+    }
+
+    komparu_async_chan_t *chan = NULL;
+    if (channel_from_python(py_channel, &chan) < 0) return NULL;
+
+    if (chunk_size <= 0) {
+        PyErr_SetString(PyExc_ValueError, "chunk_size must be positive");
+        return NULL;
+    }
+
+    if (py_headers != Py_None && !PyDict_Check(py_headers)) {
+        PyErr_SetString(PyExc_TypeError, "headers must be a dict or None");
+        return NULL;
+    }
+
+    const char *err_msg = NULL;
+    size_t header_count = 0;
+    const char **header_array = build_header_array(py_headers, &header_count, &err_msg);
+    if (err_msg) {
+        PyErr_SetString(PyExc_ValueError, err_msg);
+        return NULL;
+    }
+
+    komparu_async_task_t *task = komparu_async_fingerprint(
+        source, header_array, (size_t)chunk_size,
+        timeout, (bool)follow_redirects, (bool)verify_ssl, (bool)allow_private,
+        proxy, (bool)samples, chan, &err_msg
+    );
+
+    free_header_array(header_array, header_count);
+
+    if (!task) {
+        PyErr_Format(PyExc_RuntimeError, "async fingerprint failed: %s",
+                     err_msg ? err_msg : "unknown error");
+        return NULL;
+    }
+
+    int fd = komparu_async_task_fd(task);
+    PyObject *capsule = PyCapsule_New(task, "komparu.async_task",
+                                      async_task_capsule_destructor);
+    if (!capsule) {
+        komparu_async_task_free(task);
+        return NULL;
+    }
+
+    return Py_BuildValue("(iN)", fd, capsule);
+}
+
+static PyObject *py_async_fingerprint_result(PyObject *self, PyObject *arg) {
+    (void)self;
+
+    komparu_async_task_t *task = PyCapsule_GetPointer(arg, "komparu.async_task");
+    if (!task) {
+        PyErr_SetString(PyExc_ValueError, "invalid async task handle");
+        return NULL;
+    }
+
+    const char *err_msg = NULL;
+    uint64_t digest[3];
+    if (komparu_async_task_digest(task, digest, &err_msg) != 0) {
+        PyErr_Format(PyExc_IOError, "%s", err_msg ? err_msg : "unknown error");
+        return NULL;
+    }
+    return PyBytes_FromStringAndSize((const char *)digest, sizeof(digest));
+}
+
+static PyObject *py_async_stat_start(PyObject *self, PyObject *args, PyObject *kwargs) {
+    (void)self;
+
+    PyObject *py_paths = NULL;
+    PyObject *py_channel = Py_None;
+
+    static char *kwlist[] = {"paths", "channel", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O", kwlist,
+            &py_paths, &py_channel)) {
+        return NULL;
+    }
+
+    komparu_async_chan_t *chan = NULL;
+    if (channel_from_python(py_channel, &chan) < 0) return NULL;
+
+    PyObject *seq = PySequence_Fast(py_paths, "paths must be a sequence of str");
+    if (!seq) return NULL;
+
+    /* The strings stay owned by seq until komparu_async_stat copies them */
+    Py_ssize_t count = PySequence_Fast_GET_SIZE(seq);
+    const char **paths = malloc((size_t)(count ? count : 1) * sizeof(char *));
+    if (!paths) {
+        Py_DECREF(seq);
+        return PyErr_NoMemory();
+    }
+    for (Py_ssize_t i = 0; i < count; i++) {
+        paths[i] = PyUnicode_AsUTF8(PySequence_Fast_GET_ITEM(seq, i));
+        if (!paths[i]) {
+            free(paths);
+            Py_DECREF(seq);
+            return NULL;
+        }
+    }
+
+    const char *err_msg = NULL;
+    komparu_async_task_t *task = komparu_async_stat(paths, (size_t)count, chan, &err_msg);
+    free(paths);
+    Py_DECREF(seq);
+
+    if (!task) {
+        PyErr_Format(PyExc_RuntimeError, "async stat failed: %s",
+                     err_msg ? err_msg : "unknown error");
+        return NULL;
+    }
+
+    int fd = komparu_async_task_fd(task);
+    PyObject *capsule = PyCapsule_New(task, "komparu.async_task",
+                                      async_task_capsule_destructor);
+    if (!capsule) {
+        komparu_async_task_free(task);
+        return NULL;
+    }
+
+    return Py_BuildValue("(iN)", fd, capsule);
+}
+
+static PyObject *py_async_stat_result(PyObject *self, PyObject *arg) {
+    (void)self;
+
+    komparu_async_task_t *task = PyCapsule_GetPointer(arg, "komparu.async_task");
+    if (!task) {
+        PyErr_SetString(PyExc_ValueError, "invalid async task handle");
+        return NULL;
+    }
+
+    size_t count = 0;
+    const komparu_stat_entry_t *stats = komparu_async_task_stats(task, &count);
+
+    PyObject *list = PyList_New((Py_ssize_t)count);
+    if (!list) return NULL;
+    for (size_t i = 0; i < count; i++) {
+        const komparu_stat_entry_t *e = &stats[i];
+        PyObject *item;
+        if (e->ok) {
+            item = Py_BuildValue("(IKKLLL)", (unsigned int)e->mode,
+                                 (unsigned long long)e->dev, (unsigned long long)e->ino,
+                                 (long long)e->size, (long long)e->mtime_ns,
+                                 (long long)e->ctime_ns);
+            if (!item) {
+                Py_DECREF(list);
+                return NULL;
+            }
+        } else {
+            item = Py_NewRef(Py_None);
+        }
+        PyList_SET_ITEM(list, (Py_ssize_t)i, item);
+    }
+    return list;
+}
+
 static PyObject *py_async_compare_dir_start(PyObject *self, PyObject *args, PyObject *kwargs) {
     (void)self;
 
@@ -917,15 +1415,19 @@ static PyObject *py_async_compare_dir_start(PyObject *self, PyObject *args, PyOb
     int quick_check = 1;
     int follow_symlinks = 1;
     Py_ssize_t max_workers = 0;
+    int trust_mtime = 0;
+    PyObject *py_channel = Py_None;
 
     static char *kwlist[] = {
         "dir_a", "dir_b", "chunk_size", "size_precheck",
-        "quick_check", "follow_symlinks", "max_workers", NULL
+        "quick_check", "follow_symlinks", "max_workers", "trust_mtime",
+        "channel", NULL
     };
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|npppn", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|npppnpO", kwlist,
             &dir_a, &dir_b, &chunk_size, &size_precheck,
-            &quick_check, &follow_symlinks, &max_workers)) {
+            &quick_check, &follow_symlinks, &max_workers, &trust_mtime,
+            &py_channel)) {
         return NULL;
     }
 
@@ -934,13 +1436,16 @@ static PyObject *py_async_compare_dir_start(PyObject *self, PyObject *args, PyOb
         return NULL;
     }
 
+    komparu_async_chan_t *chan = NULL;
+    if (channel_from_python(py_channel, &chan) < 0) return NULL;
+
     const char *err_msg = NULL;
     komparu_async_task_t *task = komparu_async_compare_dir(
         dir_a, dir_b,
         (size_t)chunk_size, (bool)size_precheck, (bool)quick_check,
-        (bool)follow_symlinks,
+        (bool)trust_mtime, (bool)follow_symlinks,
         (size_t)(max_workers >= 0 ? max_workers : 0),
-        &err_msg
+        chan, &err_msg
     );
 
     if (!task) {
@@ -997,20 +1502,32 @@ static PyObject *py_async_compare_archive_start(PyObject *self, PyObject *args,
     long long max_entries = -1;
     long long max_entry_name_length = -1;
     int hash_compare = 0;
+    Py_ssize_t parallel_workers = 1;
+    PyObject *py_channel = Py_None;
 
     static char *kwlist[] = {
         "path_a", "path_b", "chunk_size",
         "max_decompressed_size", "max_compression_ratio",
-        "max_entries", "max_entry_name_length", "hash_compare", NULL
+        "max_entries", "max_entry_name_length", "hash_compare",
+        "parallel_workers", "channel", NULL
     };
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|nLiLLp", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|nLiLLpnO", kwlist,
             &path_a, &path_b, &chunk_size,
             &max_decompressed_size, &max_compression_ratio,
-            &max_entries, &max_entry_name_length, &hash_compare)) {
+            &max_entries, &max_entry_name_length, &hash_compare,
+            &parallel_workers, &py_channel)) {
+        return NULL;
+    }
+
+    if (parallel_workers < 0) {
+        PyErr_SetString(PyExc_ValueError, "parallel_workers must be >= 0");
         return NULL;
     }
 
+    komparu_async_chan_t *chan = NULL;
+    if (channel_from_python(py_channel, &chan) < 0) return NULL;
+
     int64_t mds = max_decompressed_size >= 0 ? (int64_t)max_decompressed_size : 0;
     int mcr = max_compression_ratio >= 0 ? max_compression_ratio : 0;
     int64_t me = max_entries >= 0 ? (int64_t)max_entries : 0;
@@ -1019,7 +1536,8 @@ static PyObject *py_async_compare_archive_start(PyObject *self, PyObject *args,
     const char *err_msg = NULL;
     komparu_async_task_t *task = komparu_async_compare_archive(
         path_a, path_b, (size_t)chunk_size,
-        mds, mcr, me, menl, hash_compare, &err_msg);
+        mds, mcr, me, menl, hash_compare,
+        (size_t)parallel_workers, chan, &err_msg);
 
     if (!task) {
         PyErr_Format(PyExc_RuntimeError, "async compare_archive failed: %s",
@@ -1078,20 +1596,24 @@ static PyObject *py_async_compare_dir_urls_start(PyObject *self, PyObject *args,
     int verify_ssl = 1;
     int allow_private = 0;
     const char *proxy = NULL;
+    PyObject *py_channel = Py_None;
 
     static char *kwlist[] = {
         "dir_path", "url_map", "chunk_size", "size_precheck", "quick_check",
         "headers", "timeout", "follow_redirects", "verify_ssl", "allow_private",
-        "proxy", NULL
+        "proxy", "channel", NULL
     };
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "sO|nppOdpppz", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "sO|nppOdpppzO", kwlist,
             &dir_path, &py_url_map, &chunk_size, &size_precheck, &quick_check,
             &py_headers, &timeout, &follow_redirects, &verify_ssl,
-            &allow_private, &proxy)) {
+            &allow_private, &proxy, &py_channel)) {
         return NULL;
     }
 
+    komparu_async_chan_t *chan = NULL;
+    if (channel_from_python(py_channel, &chan) < 0) return NULL;
+
     if (!PyDict_Check(py_url_map)) {
         PyErr_SetString(PyExc_TypeError, "url_map must be a dict");
         return NULL;
@@ -1102,57 +1624,29 @@ static PyObject *py_async_compare_dir_urls_start(PyObject *self, PyObject *args,
         return NULL;
     }
 
-    /* Convert url_map dict to parallel C arrays */
-    Py_ssize_t map_size = PyDict_Size(py_url_map);
-    const char **rel_paths = NULL;
-    const char **url_strs = NULL;
-
-    if (map_size > 0) {
-        rel_paths = calloc((size_t)map_size, sizeof(const char *));
-        url_strs = calloc((size_t)map_size, sizeof(const char *));
-        if (!rel_paths || !url_strs) {
-            free(rel_paths);
-            free(url_strs);
-            PyErr_NoMemory();
-            return NULL;
-        }
-
-        PyObject *key, *value;
-        Py_ssize_t pos = 0;
-        Py_ssize_t idx = 0;
-        while (PyDict_Next(py_url_map, &pos, &key, &value)) {
-            rel_paths[idx] = PyUnicode_AsUTF8(key);
-            url_strs[idx] = PyUnicode_AsUTF8(value);
-            if (!rel_paths[idx] || !url_strs[idx]) {
-                free(rel_paths);
-                free(url_strs);
-                PyErr_SetString(PyExc_TypeError, "url_map keys and values must be strings");
-                return NULL;
-            }
-            idx++;
-        }
-    }
+    /* Borrowed url_map strings — the task copies them into one block */
+    const char **views;
+    Py_ssize_t map_size = url_map_views(py_url_map, &views);
+    if (map_size < 0) return NULL;
 
     /* Build headers */
     const char *err_msg = NULL;
     size_t header_count = 0;
     const char **header_array = build_header_array(py_headers, &header_count, &err_msg);
     if (err_msg) {
-        free(rel_paths);
-        free(url_strs);
+        free(views);
         PyErr_SetString(PyExc_ValueError, err_msg);
         return NULL;
     }
 
     komparu_async_task_t *task = komparu_async_compare_dir_urls(
-        dir_path, rel_paths, url_strs, (size_t)map_size,
+        dir_path, views, views + map_size, (size_t)map_size,
         header_array,
         (size_t)chunk_size, (bool)size_precheck, (bool)quick_check,
         timeout, (bool)follow_redirects, (bool)verify_ssl, (bool)allow_private,
-        proxy, &err_msg);
+        proxy, chan, &err_msg);
 
-    free(rel_paths);
-    free(url_strs);
+    free(views);
     free_header_array(header_array, header_count);
 
     if (!task) {
@@ -1198,6 +1692,144 @@ static PyObject *py_async_compare_dir_urls_result(PyObject *self, PyObject *arg)
  * Module definition
  * ========================================================================= */
 
+/* =========================================================================
+ * Shared source — map a reference file once for many async comparisons
+ * ========================================================================= */
+
+static void shared_source_capsule_destructor(PyObject *capsule) {
+    komparu_file_map_t *map = PyCapsule_GetPointer(capsule, "komparu.shared_source");
+    if (map) komparu_file_map_release(map);
+}
+
+static PyObject *py_async_open_shared_start(PyObject *self, PyObject *args, PyObject *kwargs) {
+    (void)self;
+
+    const char *path = NULL;
+    PyObject *py_channel = Py_None;
+
+    static char *kwlist[] = {"path", "channel", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "s|O", kwlist,
+            &path, &py_channel)) {
+        return NULL;
+    }
+
+    komparu_async_chan_t *chan = NULL;
+    if (channel_from_python(py_channel, &chan) < 0) return NULL;
+
+    const char *err_msg = NULL;
+    komparu_async_task_t *task = komparu_async_open_shared(path, chan, &err_msg);
+    if (!task) {
+        PyErr_Format(PyExc_RuntimeError, "async open_shared failed: %s",
+                     err_msg ? err_msg : "unknown error");
+        return NULL;
+    }
+
+    int fd = komparu_async_task_fd(task);
+    PyObject *capsule = PyCapsule_New(task, "komparu.async_task",
+                                      async_task_capsule_destructor);
+    if (!capsule) {
+        komparu_async_task_free(task);
+        return NULL;
+    }
+
+    return Py_BuildValue("(iN)", fd, capsule);
+}
+
+static PyObject *py_async_open_shared_result(PyObject *self, PyObject *arg) {
+    (void)self;
+
+    komparu_async_task_t *task = PyCapsule_GetPointer(arg, "komparu.async_task");
+    if (!task) {
+        PyErr_SetString(PyExc_ValueError, "invalid async task handle");
+        return NULL;
+    }
+
+    const char *err_msg = NULL;
+    komparu_file_map_t *map = komparu_async_task_take_map(task, &err_msg);
+    if (!map) {
+        PyErr_Format(PyExc_OSError, "%s", err_msg ? err_msg : "unknown error");
+        return NULL;
+    }
+
+    PyObject *capsule = PyCapsule_New(map, "komparu.shared_source",
+                                      shared_source_capsule_destructor);
+    if (!capsule) komparu_file_map_release(map);
+    return capsule;
+}
+
+/* =========================================================================
+ * Completion channel — one notification fd shared by many async tasks
+ * ========================================================================= */
+
+static void async_chan_capsule_destructor(PyObject *capsule) {
+    komparu_async_chan_t *chan = PyCapsule_GetPointer(capsule, "komparu.async_chan");
+    if (chan) komparu_async_chan_release(chan);
+}
+
+static PyObject *py_async_channel_new(PyObject *self, PyObject *Py_UNUSED(ignored)) {
+    (void)self;
+
+    const char *err_msg = NULL;
+    komparu_async_chan_t *chan = komparu_async_chan_new(&err_msg);
+    if (!chan) {
+        PyErr_Format(PyExc_OSError, "cannot create async channel: %s",
+                     err_msg ? err_msg : "unknown error");
+        return NULL;
+    }
+
+    PyObject *capsule = PyCapsule_New(chan, "komparu.async_chan",
+                                      async_chan_capsule_destructor);
+    if (!capsule) komparu_async_chan_release(chan);
+    return capsule;
+}
+
+static PyObject *py_async_channel_fd(PyObject *self, PyObject *arg) {
+    (void)self;
+
+    komparu_async_chan_t *chan = PyCapsule_GetPointer(arg, "komparu.async_chan");
+    if (!chan) return NULL;
+    return PyLong_FromLong(komparu_async_chan_fd(chan));
+}
+
+static PyObject *py_drain_completed(PyObject *self, PyObject *arg) {
+    (void)self;
+
+    komparu_async_chan_t *chan = PyCapsule_GetPointer(arg, "komparu.async_chan");
+    if (!chan) return NULL;
+
+    komparu_async_done_t *done = komparu_async_chan_take(chan);
+
+    PyObject *list = PyList_New(0);
+    if (!list) {
+        komparu_async_done_free(done);
+        return NULL;
+    }
+    for (komparu_async_done_t *d = done; d; d = d->next) {
+        PyObject *v = PyLong_FromUnsignedLongLong(d->id);
+        if (!v || PyList_Append(list, v) < 0) {
+            Py_XDECREF(v);
+            Py_DECREF(list);
+            komparu_async_done_free(done);
+            return NULL;
+        }
+        Py_DECREF(v);
+    }
+    komparu_async_done_free(done);
+    return list;
+}
+
+static PyObject *py_async_task_id(PyObject *self, PyObject *arg) {
+    (void)self;
+
+    komparu_async_task_t *task = PyCapsule_GetPointer(arg, "komparu.async_task");
+    if (!task) {
+        PyErr_SetString(PyExc_ValueError, "invalid async task handle");
+        return NULL;
+    }
+    return PyLong_FromUnsignedLongLong(komparu_async_task_id(task));
+}
+
 static PyMethodDef module_methods[] = {
     {
         "compare",
@@ -1214,7 +1846,7 @@ static PyMethodDef module_methods[] = {
         (PyCFunction)(void(*)(void))py_compare_dir,
         METH_VARARGS | METH_KEYWORDS,
         "compare_dir(dir_a, dir_b, *, chunk_size=65536, size_precheck=True, "
-        "quick_check=True, follow_symlinks=True) -> dict\n\n"
+        "quick_check=True, follow_symlinks=True, trust_mtime=False) -> dict\n\n"
         "Compare two directories recursively.\n"
         "Returns dict with equal, diff, only_left, only_right."
     },
@@ -1222,9 +1854,11 @@ static PyMethodDef module_methods[] = {
         "compare_archive",
         (PyCFunction)(void(*)(void))py_compare_archive,
         METH_VARARGS | METH_KEYWORDS,
-        "compare_archive(path_a, path_b, *, chunk_size=65536, hash_compare=False) -> dict\n\n"
+        "compare_archive(path_a, path_b, *, chunk_size=65536, hash_compare=False,\n"
+        "                parallel_workers=1) -> dict\n\n"
         "Compare two archive files entry-by-entry.\n"
         "hash_compare: use streaming hash (O(entries) memory).\n"
+        "parallel_workers: fingerprint entries on N threads (0 = auto, 1 = off).\n"
         "Returns dict with equal, diff, only_left, only_right."
     },
     {
@@ -1235,6 +1869,17 @@ static PyMethodDef module_methods[] = {
         "Compare local directory against URL mapping.\n"
         "Returns dict with equal, diff, only_left, only_right."
     },
+    {
+        "fingerprint",
+        (PyCFunction)(void(*)(void))py_fingerprint,
+        METH_VARARGS | METH_KEYWORDS,
+        "fingerprint(source, *, chunk_size=65536, headers=None, ...) -> bytes\n\n"
+        "Read a file or URL to the end and return a 24-byte digest\n"
+        "(128-bit content hash, plus the length). Different digests\n"
+        "prove different content; equal digests do not prove equality.\n"
+        "samples=True hashes only the quick check sample points (needs a\n"
+        "known size and seek); such digests only compare with each other."
+    },
     {
         "compare_buffers",
         (PyCFunction)py_compare_buffers,
@@ -1258,6 +1903,35 @@ static PyMethodDef module_methods[] = {
         "async_compare_result(task) -> bool\n\n"
         "Get result of async comparison. Call after fd is readable."
     },
+    {
+        "async_fingerprint_start",
+        (PyCFunction)(void(*)(void))py_async_fingerprint_start,
+        METH_VARARGS | METH_KEYWORDS,
+        "async_fingerprint_start(source, ...) -> (fd, task)\n\n"
+        "Submit async fingerprint to C pool. Returns (notification_fd, task_capsule)."
+    },
+    {
+        "async_fingerprint_result",
+        (PyCFunction)py_async_fingerprint_result,
+        METH_O,
+        "async_fingerprint_result(task) -> bytes\n\n"
+        "Get digest of async fingerprint. Call after fd is readable."
+    },
+    {
+        "async_stat_start",
+        (PyCFunction)(void(*)(void))py_async_stat_start,
+        METH_VARARGS | METH_KEYWORDS,
+        "async_stat_start(paths, channel=None) -> (fd, task)\n\n"
+        "stat() each path in a C pool thread. Returns (notification_fd, task_capsule)."
+    },
+    {
+        "async_stat_result",
+        (PyCFunction)py_async_stat_result,
+        METH_O,
+        "async_stat_result(task) -> list\n\n"
+        "(st_mode, st_dev, st_ino, st_size, st_mtime_ns, st_ctime_ns) per path,\n"
+        "or None for URLs and paths that cannot be stat'ed. Call after fd is readable."
+    },
     {
         "async_compare_dir_start",
         (PyCFunction)(void(*)(void))py_async_compare_dir_start,
@@ -1300,6 +1974,66 @@ static PyMethodDef module_methods[] = {
         "async_compare_dir_urls_result(task) -> dict\n\n"
         "Get result of async dir_urls comparison. Call after fd is readable."
     },
+    {
+        "cancel_flag_new",
+        (PyCFunction)py_cancel_flag_new,
+        METH_NOARGS,
+        "cancel_flag_new() -> flag\n\n"
+        "Flag for compare(cancel=...): once set with cancel_flag_set(), every\n"
+        "comparison given it fails at its next chunk read."
+    },
+    {
+        "cancel_flag_set",
+        (PyCFunction)py_cancel_flag_set,
+        METH_O,
+        "cancel_flag_set(flag) -> None\n\n"
+        "Set a flag from cancel_flag_new(). Thread-safe."
+    },
+    {
+        "async_open_shared_start",
+        (PyCFunction)(void(*)(void))py_async_open_shared_start,
+        METH_VARARGS | METH_KEYWORDS,
+        "async_open_shared_start(path, channel=None) -> (fd, task)\n\n"
+        "Map a local regular file once in a C pool thread. Returns\n"
+        "(notification_fd, task_capsule)."
+    },
+    {
+        "async_open_shared_result",
+        (PyCFunction)py_async_open_shared_result,
+        METH_O,
+        "async_open_shared_result(task) -> handle\n\n"
+        "Get the mapping; pass as shared_a= to async_compare_start to read\n"
+        "it without reopening. Raises OSError if the file cannot be mapped."
+    },
+    {
+        "async_channel_new",
+        (PyCFunction)py_async_channel_new,
+        METH_NOARGS,
+        "async_channel_new() -> channel\n\n"
+        "Create a completion channel: one notification fd shared by every\n"
+        "task started with channel=..."
+    },
+    {
+        "async_channel_fd",
+        (PyCFunction)py_async_channel_fd,
+        METH_O,
+        "async_channel_fd(channel) -> int\n\n"
+        "Notification fd of the channel, for loop.add_reader()."
+    },
+    {
+        "drain_completed",
+        (PyCFunction)py_drain_completed,
+        METH_O,
+        "drain_completed(channel) -> list[int]\n\n"
+        "Ids of tasks completed since the last drain, oldest first. Never blocks."
+    },
+    {
+        "async_task_id",
+        (PyCFunction)py_async_task_id,
+        METH_O,
+        "async_task_id(task) -> int\n\n"
+        "Id reported through the channel when the task completes."
+    },
     {NULL, NULL, 0, NULL}
 };
 
@@ -1341,11 +2075,13 @@ PyMODINIT_FUNC PyInit__core(void) {
                         "failed to initialize curl share handle");
         return NULL;
     }
-    /* Py_AtExit runs in LIFO order: TLS cleanup first, then share,
-     * then curl_global_cleanup last (registered first). */
+    /* Py_AtExit runs in LIFO order: cached pools are joined first, then
+     * TLS cleanup, then share, then curl_global_cleanup last (registered
+     * first). */
     Py_AtExit(komparu_curl_global_cleanup);
     Py_AtExit(komparu_curl_share_cleanup);
     Py_AtExit(komparu_compare_tls_cleanup);
+    Py_AtExit(komparu_pool_cache_cleanup);
 
     return PyModuleDef_Init(&module_def);
 }
@@ -6,6 +6,9 @@
  * - Mutex + condvar for synchronization
  * - Active task counter for pool_wait
  * - Graceful shutdown: drain queue, then join workers
+ * - Idle pool cache: repeated directory/archive comparisons reuse warm
+ *   worker threads (and their thread-local buffers) instead of
+ *   spawning and joining a pool per call
  *
  * pthreads on Linux/macOS, Windows threads (CRITICAL_SECTION +
  * CONDITION_VARIABLE) on Windows.
@@ -15,6 +18,7 @@
 #include "compare.h"
 #include <stdlib.h>
 #include <string.h>
+#include <stdatomic.h>
 #ifdef KOMPARU_WINDOWS
 #include <process.h>  /* _beginthreadex */
 #else
@@ -147,12 +151,17 @@ static void *worker_fn(void *arg) {
  * Public API
  * ========================================================================= */
 
-komparu_pool_t *komparu_pool_create(size_t num_workers) {
+static size_t resolve_num_workers(size_t num_workers) {
     if (num_workers == 0) {
         num_workers = komparu_cpu_count();
         if (num_workers > KOMPARU_MAX_DEFAULT_WORKERS)
             num_workers = KOMPARU_MAX_DEFAULT_WORKERS;
     }
+    return num_workers;
+}
+
+komparu_pool_t *komparu_pool_create(size_t num_workers) {
+    num_workers = resolve_num_workers(num_workers);
 
     komparu_pool_t *pool = calloc(1, sizeof(komparu_pool_t));
     if (!pool) return NULL;
@@ -279,6 +288,53 @@ int komparu_pool_submit(komparu_pool_t *pool, komparu_task_fn fn, void *arg) {
     return 0;
 }
 
+/* A komparu_pool_run() batch, shared by the threads running it */
+typedef struct {
+    komparu_task_fn fn;
+    char *tasks;
+    size_t size;
+    size_t count;
+    _Atomic size_t next;
+} pool_batch_t;
+
+static void batch_runner(void *arg) {
+    pool_batch_t *batch = (pool_batch_t *)arg;
+    for (;;) {
+        size_t k = atomic_fetch_add_explicit(&batch->next, 1, memory_order_relaxed);
+        if (k >= batch->count) break;
+        batch->fn(batch->tasks + k * batch->size);
+    }
+}
+
+void komparu_pool_run(komparu_pool_t *pool, komparu_task_fn fn,
+                      void *tasks, size_t size, size_t count) {
+    pool_batch_t batch = {
+        .fn = fn,
+        .tasks = (char *)tasks,
+        .size = size,
+        .count = count,
+        .next = 0,
+    };
+
+    /* The calling thread is one of the pool's num_workers runners, so
+     * as many tasks run at once as before; a failed submit only leaves
+     * it more of the tasks */
+    size_t helpers = 0;
+    if (pool && count > 1) {
+        helpers = pool->num_workers - 1 < count - 1 ? pool->num_workers - 1 : count - 1;
+    }
+    for (size_t i = 0; i < helpers; i++) {
+        if (KOMPARU_UNLIKELY(komparu_pool_submit(pool, batch_runner, &batch) != 0)) break;
+    }
+
+    batch_runner(&batch);
+
+    /* `batch` lives on this stack until every runner has returned */
+    if (helpers > 0) {
+        while (komparu_pool_wait(pool) != 0) {}
+    }
+}
+
 int komparu_pool_wait(komparu_pool_t *pool) {
     POOL_LOCK(pool);
 
@@ -345,3 +401,86 @@ void komparu_pool_destroy(komparu_pool_t *pool) {
     free(pool->queue);
     free(pool);
 }
+
+/* =========================================================================
+ * Idle pool cache
+ * ========================================================================= */
+
+/* A few sizes cover real use (auto, plus the odd explicit max_workers);
+ * concurrent callers beyond that get a fresh pool as before. */
+#define POOL_CACHE_SLOTS 4
+
+static komparu_pool_t *pool_cache[POOL_CACHE_SLOTS];
+static size_t pool_cache_count;
+
+#ifdef KOMPARU_WINDOWS
+static SRWLOCK pool_cache_lock = SRWLOCK_INIT;
+#define CACHE_LOCK()   AcquireSRWLockExclusive(&pool_cache_lock)
+#define CACHE_UNLOCK() ReleaseSRWLockExclusive(&pool_cache_lock)
+#else
+static pthread_mutex_t pool_cache_mutex = PTHREAD_MUTEX_INITIALIZER;
+static pthread_once_t pool_cache_once = PTHREAD_ONCE_INIT;
+#define CACHE_LOCK()   pthread_mutex_lock(&pool_cache_mutex)
+#define CACHE_UNLOCK() pthread_mutex_unlock(&pool_cache_mutex)
+
+/* A forked child has none of the cached workers: forget the pools (their
+ * memory is lost, their threads never existed in this process). */
+static void pool_cache_atfork_child(void) {
+    pool_cache_count = 0;
+    pthread_mutex_init(&pool_cache_mutex, NULL);
+}
+
+static void pool_cache_register_atfork(void) {
+    (void)pthread_atfork(NULL, NULL, pool_cache_atfork_child);
+}
+#endif
+
+komparu_pool_t *komparu_pool_acquire(size_t num_workers) {
+    num_workers = resolve_num_workers(num_workers);
+
+    CACHE_LOCK();
+    for (size_t i = 0; i < pool_cache_count; i++) {
+        if (pool_cache[i]->num_workers == num_workers) {
+            komparu_pool_t *pool = pool_cache[i];
+            pool_cache[i] = pool_cache[--pool_cache_count];
+            CACHE_UNLOCK();
+            return pool;
+        }
+    }
+    CACHE_UNLOCK();
+
+    return komparu_pool_create(num_workers);
+}
+
+void komparu_pool_release(komparu_pool_t *pool) {
+    if (!pool) return;
+
+    /* Only a pool with nothing left running may go to the next caller */
+    if (komparu_pool_wait(pool) == 0) {
+#ifndef KOMPARU_WINDOWS
+        pthread_once(&pool_cache_once, pool_cache_register_atfork);
+#endif
+        CACHE_LOCK();
+        if (pool_cache_count < POOL_CACHE_SLOTS) {
+            pool_cache[pool_cache_count++] = pool;
+            pool = NULL;
+        }
+        CACHE_UNLOCK();
+    }
+
+    komparu_pool_destroy(pool);
+}
+
+void komparu_pool_cache_cleanup(void) {
+    komparu_pool_t *pools[POOL_CACHE_SLOTS];
+
+    CACHE_LOCK();
+    size_t count = pool_cache_count;
+    memcpy(pools, pool_cache, count * sizeof(*pools));
+    pool_cache_count = 0;
+    CACHE_UNLOCK();
+
+    /* Join outside the lock */
+    for (size_t i = 0; i < count; i++)
+        komparu_pool_destroy(pools[i]);
+}
@@ -34,6 +34,16 @@ komparu_pool_t *komparu_pool_create(size_t num_workers);
  */
 int komparu_pool_submit(komparu_pool_t *pool, komparu_task_fn fn, void *arg);
 
+/**
+ * Run `fn` on each of `count` tasks laid out `size` bytes apart from
+ * `tasks`, on the pool's workers and the calling thread, and wait for
+ * all of them. Each worker takes one queue entry and claims tasks by an
+ * atomic index, so the pool lock is taken per worker, not per task.
+ * A NULL pool runs every task on the calling thread.
+ */
+void komparu_pool_run(komparu_pool_t *pool, komparu_task_fn fn,
+                      void *tasks, size_t size, size_t count);
+
 /**
  * Wait for all submitted tasks to complete.
  *
@@ -46,4 +56,25 @@ int komparu_pool_wait(komparu_pool_t *pool);
  */
 void komparu_pool_destroy(komparu_pool_t *pool);
 
+/**
+ * Take an idle pool with `num_workers` threads (0 = auto, as in
+ * komparu_pool_create) from a small process-wide cache, or create one.
+ * The caller has the pool to itself until komparu_pool_release(), so
+ * komparu_pool_wait() still waits for its own tasks only.
+ *
+ * Returns NULL on error.
+ */
+komparu_pool_t *komparu_pool_acquire(size_t num_workers);
+
+/**
+ * Wait for the pool's tasks, then return it to the cache for the next
+ * komparu_pool_acquire() (destroyed if the cache is full). NULL is a no-op.
+ */
+void komparu_pool_release(komparu_pool_t *pool);
+
+/**
+ * Destroy every cached pool. Registered with Py_AtExit.
+ */
+void komparu_pool_cache_cleanup(void);
+
 #endif /* KOMPARU_POOL_H */
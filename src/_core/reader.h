@@ -10,6 +10,10 @@
 
 #include "compat.h"
 
+/* read_compare() results besides a byte count and -1 */
+#define KOMPARU_READ_MISMATCH   (-2)
+#define KOMPARU_READ_VIEW_FAULT (-3)
+
 /**
  * Abstract reader — a source of bytes.
  *
@@ -27,6 +31,29 @@ typedef struct komparu_reader {
      */
     int64_t (*read)(struct komparu_reader *self, void *buf, size_t size);
 
+    /**
+     * Optional zero-copy read (NULL if unsupported): like read(), but
+     * points *view at up to `size` bytes of the reader's own memory
+     * instead of copying them. The view is valid until the next call and
+     * must only be accessed through komparu_view_memcmp(), which guards
+     * against the backing file shrinking under a mapping.
+     */
+    int64_t (*read_view)(struct komparu_reader *self, const void **view, size_t size);
+
+    /**
+     * Optional (NULL if unsupported): read up to `size` bytes and compare
+     * them against `other`, a view from another reader, as they arrive
+     * instead of landing them in a buffer first. `other` is accessed only
+     * through komparu_view_memcmp().
+     *
+     * Returns:
+     *   >= 0  — number of bytes read, all equal to the start of `other`
+     *   KOMPARU_READ_MISMATCH  — the bytes read differ from `other`
+     *   KOMPARU_READ_VIEW_FAULT — `other` could not be accessed
+     *     -1  — error reading this source
+     */
+    int64_t (*read_compare)(struct komparu_reader *self, const void *other, size_t size);
+
     /**
      * Get total size of the source if known.
      *
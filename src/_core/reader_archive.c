@@ -14,10 +14,17 @@
 
 #include "reader_archive.h"
 #include "compare.h"
+#include "digest.h"
+#include "pool.h"
 #include <archive.h>
 #include <archive_entry.h>
 #include <stdlib.h>
 #include <string.h>
+#include <stdatomic.h>
+#ifndef KOMPARU_WINDOWS
+#include <fcntl.h>
+#include <unistd.h>
+#endif
 
 static _Thread_local char archive_errbuf[512];
 
@@ -30,6 +37,42 @@ static _Thread_local char archive_errbuf[512];
 #define DEFAULT_MAX_ENTRIES        100000
 #define DEFAULT_MAX_NAME_LENGTH    4096
 
+/* libarchive issues one read() per block: whole-archive passes use large
+ * blocks to keep syscalls per entry low, the header probe a small one. */
+#define ARCHIVE_STREAM_BLOCK_SIZE  ((size_t)1024 * 1024)
+#define ARCHIVE_PROBE_BLOCK_SIZE   ((size_t)65536)
+
+/* Open `path` for a whole-archive pass. Where the platform allows, the fd
+ * is opened here so the kernel can be told the pass is sequential: it
+ * then reads ahead in a larger window while libarchive decompresses, and
+ * most block reads are served from the page cache. *fd_out is the fd to
+ * close after archive_read_free() (-1 if libarchive owns the file). */
+static int archive_open_stream(struct archive *a, const char *path, int *fd_out) {
+    *fd_out = -1;
+#if !defined(KOMPARU_WINDOWS) && defined(POSIX_FADV_SEQUENTIAL)
+    int fd = open(path, O_RDONLY | O_CLOEXEC);
+    if (fd >= 0) {
+        (void)posix_fadvise(fd, 0, 0, POSIX_FADV_SEQUENTIAL);
+        int rc = archive_read_open_fd(a, fd, ARCHIVE_STREAM_BLOCK_SIZE);
+        if (rc != ARCHIVE_OK) {
+            close(fd);
+            return rc;
+        }
+        *fd_out = fd;
+        return rc;
+    }
+    /* Fall through: libarchive reports the open error */
+#endif
+    return archive_read_open_filename(a, path, ARCHIVE_STREAM_BLOCK_SIZE);
+}
+
+static void archive_stream_free(struct archive *a, int fd) {
+    archive_read_free(a);
+#ifndef KOMPARU_WINDOWS
+    if (fd >= 0) close(fd);
+#endif
+}
+
 /* =========================================================================
  * Path sanitization — reject dangerous entry names
  * ========================================================================= */
@@ -54,22 +97,28 @@ static bool is_safe_path(const char *path) {
     return true;
 }
 
-/* Normalize path: strip leading ./ and collapse multiple slashes */
+/* Normalize path in one pass: drop "." components (leading ./ included),
+ * collapse repeated slashes and strip trailing ones. A leading / is kept
+ * so that is_safe_path still rejects absolute names; ".." is left for
+ * is_safe_path to reject rather than resolved. */
 static char *normalize_path(const char *path) {
-    /* Skip leading ./ */
-    while (path[0] == '.' && path[1] == '/') {
-        path += 2;
-        while (*path == '/') path++;
-    }
-
-    char *out = strdup(path);
+    char *out = malloc(strlen(path) + 1);
     if (!out) return NULL;
 
-    /* Remove trailing / */
-    size_t len = strlen(out);
-    while (len > 0 && out[len - 1] == '/') {
-        out[--len] = '\0';
+    size_t n = 0;
+    const char *p = path;
+    if (*p == '/') out[n++] = '/';
+    while (*p) {
+        while (*p == '/') p++;
+        const char *start = p;
+        while (*p && *p != '/') p++;
+        size_t clen = (size_t)(p - start);
+        if (clen == 0 || (clen == 1 && start[0] == '.')) continue;
+        if (n > 0 && out[n - 1] != '/') out[n++] = '/';
+        memcpy(out + n, start, clen);
+        n += clen;
     }
+    out[n] = '\0';
 
     return out;
 }
@@ -165,7 +214,8 @@ static int read_archive_entries(
     archive_read_support_filter_all(a);
     archive_read_support_format_all(a);
 
-    int rc = archive_read_open_filename(a, path, 65536);
+    int fd;
+    int rc = archive_open_stream(a, path, &fd);
     if (rc != ARCHIVE_OK) {
         snprintf(archive_errbuf, sizeof(archive_errbuf),
                  "cannot open archive: %s", archive_error_string(a));
@@ -344,14 +394,14 @@ static int read_archive_entries(
     }
 
     archive_read_close(a);
-    archive_read_free(a);
+    archive_stream_free(a, fd);
     return 0;
 
 bomb:
 fail:
     entry_list_free(out);
     archive_read_close(a);
-    archive_read_free(a);
+    archive_stream_free(a, fd);
     return -1;
 }
 
@@ -462,23 +512,6 @@ merge_fail:
     return NULL;
 }
 
-/* =========================================================================
- * FNV-1a 64-bit streaming hash
- * ========================================================================= */
-
-#define FNV1A_64_BASIS_LO  0xcbf29ce484222325ULL
-#define FNV1A_64_BASIS_HI  0x517cc1b727220a95ULL
-#define FNV1A_64_PRIME     0x100000001b3ULL
-
-static inline uint64_t fnv1a_64_update(const void *data, size_t len, uint64_t hash) {
-    const uint8_t *p = (const uint8_t *)data;
-    for (size_t i = 0; i < len; i++) {
-        hash ^= p[i];
-        hash *= FNV1A_64_PRIME;
-    }
-    return hash;
-}
-
 /* =========================================================================
  * Hash-based entry storage — O(entries) memory
  * ========================================================================= */
@@ -524,15 +557,25 @@ static int entry_hash_cmp(const void *a, const void *b) {
 
 /* =========================================================================
  * Read all entries from an archive, computing streaming hashes
+ *
+ * Shard-aware core: regular-file entries are numbered in archive order
+ * and only those with (index % nshards == shard) are hashed; the rest
+ * are skipped. With nshards == 1 every entry is hashed. The
+ * decompressed-size budget is shared across shards of one archive via
+ * an atomic counter so parallel readers enforce the same bomb limit.
  * ========================================================================= */
 
-int read_archive_entries_hashed(
+static int read_archive_shard_hashed(
     const char *path,
+    size_t shard,
+    size_t nshards,
     entry_hash_list_t *out,
     int64_t max_decompressed_size,
     int max_compression_ratio,
     int64_t max_entries,
     int64_t max_entry_name_length,
+    _Atomic int64_t *shared_decompressed,
+    _Atomic bool *abort_flag,
     const char **err_msg
 ) {
     memset(out, 0, sizeof(*out));
@@ -552,7 +595,8 @@ int read_archive_entries_hashed(
     archive_read_support_filter_all(a);
     archive_read_support_format_all(a);
 
-    int rc = archive_read_open_filename(a, path, 65536);
+    int fd;
+    int rc = archive_open_stream(a, path, &fd);
     if (rc != ARCHIVE_OK) {
         snprintf(archive_errbuf, sizeof(archive_errbuf),
                  "cannot open archive: %s", archive_error_string(a));
@@ -561,12 +605,18 @@ int read_archive_entries_hashed(
         return -1;
     }
 
-    int64_t total_decompressed = 0;
+    int64_t local_decompressed = 0;
     int64_t total_compressed = 0;
     int64_t entry_count = 0;
 
     struct archive_entry *entry;
     while (archive_read_next_header(a, &entry) == ARCHIVE_OK) {
+        /* Another shard failed — stop early, its error wins */
+        if (abort_flag && KOMPARU_UNLIKELY(atomic_load_explicit(abort_flag, memory_order_relaxed))) {
+            *err_msg = "aborted";
+            goto fail;
+        }
+
         /* Skip non-regular files (dirs, symlinks, etc.) */
         if (archive_entry_filetype(entry) != AE_IFREG) {
             archive_read_data_skip(a);
@@ -583,6 +633,12 @@ int read_archive_entries_hashed(
             goto bomb;
         }
 
+        /* Entry owned by another shard */
+        if ((size_t)(entry_count - 1) % nshards != shard) {
+            archive_read_data_skip(a);
+            continue;
+        }
+
         const char *raw_name = archive_entry_pathname(entry);
         if (!raw_name) {
             archive_read_data_skip(a);
@@ -616,7 +672,8 @@ int read_archive_entries_hashed(
         int64_t entry_size = archive_entry_size(entry);
         if (entry_size < 0) entry_size = 0;
 
-        if (total_decompressed + entry_size > max_decompressed_size) {
+        if (atomic_load_explicit(shared_decompressed, memory_order_relaxed) + entry_size
+                > max_decompressed_size) {
             snprintf(archive_errbuf, sizeof(archive_errbuf),
                      "archive bomb: decompressed size exceeds %lld bytes",
                      (long long)max_decompressed_size);
@@ -625,9 +682,10 @@ int read_archive_entries_hashed(
             goto bomb;
         }
 
-        /* Stream data blocks through hash functions */
-        uint64_t h_lo = FNV1A_64_BASIS_LO;
-        uint64_t h_hi = FNV1A_64_BASIS_HI;
+        /* Stream data blocks through the content digest. Equal digests
+         * are taken as equal entries, so it has to be collision resistant */
+        komparu_digest_t digest;
+        komparu_digest_init(&digest);
         size_t entry_data_len = 0;
 
         const void *block;
@@ -639,7 +697,10 @@ int read_archive_entries_hashed(
             if (block_size == 0) continue;
 
             /* Bomb check: running total */
-            total_decompressed += (int64_t)block_size;
+            local_decompressed += (int64_t)block_size;
+            int64_t total_decompressed = atomic_fetch_add_explicit(
+                shared_decompressed, (int64_t)block_size, memory_order_relaxed)
+                + (int64_t)block_size;
             if (total_decompressed > max_decompressed_size) {
                 snprintf(archive_errbuf, sizeof(archive_errbuf),
                          "archive bomb: decompressed size exceeds %lld bytes",
@@ -649,9 +710,7 @@ int read_archive_entries_hashed(
                 goto bomb;
             }
 
-            /* Feed block to both hash streams */
-            h_lo = fnv1a_64_update(block, block_size, h_lo);
-            h_hi = fnv1a_64_update(block, block_size, h_hi);
+            komparu_digest_update(&digest, block, block_size);
             entry_data_len += block_size;
         }
 
@@ -664,10 +723,11 @@ int read_archive_entries_hashed(
             goto fail;
         }
 
-        /* Bomb check: compression ratio */
+        /* Bomb check: compression ratio (bytes this reader inflated
+         * vs bytes it pulled from disk) */
         total_compressed = archive_filter_bytes(a, -1);
         if (total_compressed > 0 &&
-            total_decompressed / total_compressed > max_compression_ratio) {
+            local_decompressed / total_compressed > max_compression_ratio) {
             snprintf(archive_errbuf, sizeof(archive_errbuf),
                      "archive bomb: compression ratio exceeds %d:1",
                      max_compression_ratio);
@@ -677,6 +737,8 @@ int read_archive_entries_hashed(
         }
 
         /* Store hash entry */
+        uint64_t h_lo, h_hi;
+        komparu_digest_final(&digest, &h_lo, &h_hi);
         if (entry_hash_list_append(out, safe_name, h_lo, h_hi, entry_data_len) != 0) {
             free(safe_name);
             *err_msg = "out of memory";
@@ -686,84 +748,88 @@ int read_archive_entries_hashed(
         free(safe_name);
     }
 
-    /* Sort entries by name for merge comparison */
-    if (out->count > 1) {
-        qsort(out->entries, out->count, sizeof(entry_hash_t), entry_hash_cmp);
-    }
-
     archive_read_close(a);
-    archive_read_free(a);
+    archive_stream_free(a, fd);
     return 0;
 
 bomb:
 fail:
     entry_hash_list_free(out);
     archive_read_close(a);
-    archive_read_free(a);
+    archive_stream_free(a, fd);
     return -1;
 }
 
-/* =========================================================================
- * Hash-based archive comparison — sorted merge of two hash lists
- * ========================================================================= */
-
-komparu_dir_result_t *komparu_compare_archives_hashed(
-    const char *path_a,
-    const char *path_b,
+int read_archive_entries_hashed(
+    const char *path,
+    entry_hash_list_t *out,
     int64_t max_decompressed_size,
     int max_compression_ratio,
     int64_t max_entries,
     int64_t max_entry_name_length,
-    komparu_dir_result_t *result,
     const char **err_msg
 ) {
-    entry_hash_list_t list_a = {0};
-    entry_hash_list_t list_b = {0};
+    _Atomic int64_t total_decompressed = 0;
 
-    if (read_archive_entries_hashed(path_a, &list_a,
+    if (read_archive_shard_hashed(path, 0, 1, out,
             max_decompressed_size, max_compression_ratio,
-            max_entries, max_entry_name_length, err_msg) != 0) {
-        return NULL;
+            max_entries, max_entry_name_length,
+            &total_decompressed, NULL, err_msg) != 0) {
+        return -1;
     }
 
-    if (read_archive_entries_hashed(path_b, &list_b,
-            max_decompressed_size, max_compression_ratio,
-            max_entries, max_entry_name_length, err_msg) != 0) {
-        entry_hash_list_free(&list_a);
-        return NULL;
+    /* Sort entries by name for merge comparison */
+    if (out->count > 1) {
+        qsort(out->entries, out->count, sizeof(entry_hash_t), entry_hash_cmp);
     }
+    return 0;
+}
 
+/* =========================================================================
+ * Hash-based archive comparison — sorted merge of two hash lists
+ * ========================================================================= */
+
+/* Merge two name-sorted hash lists into result. Frees both lists.
+ * Common entries are equal iff size and digest match; there is no byte
+ * comparison afterwards, which is why the digest is BLAKE2b rather than
+ * komparu_hash_t. On failure frees result too and returns NULL. */
+static komparu_dir_result_t *merge_hash_lists(
+    entry_hash_list_t *list_a,
+    entry_hash_list_t *list_b,
+    komparu_dir_result_t *result,
+    const char **err_msg
+) {
     if (!result) {
         result = komparu_dir_result_new();
         if (!result) {
             *err_msg = "out of memory";
-            entry_hash_list_free(&list_a);
-            entry_hash_list_free(&list_b);
+            entry_hash_list_free(list_a);
+            entry_hash_list_free(list_b);
             return NULL;
         }
     }
 
     /* Sorted merge */
     size_t i = 0, j = 0;
-    while (i < list_a.count && j < list_b.count) {
-        int cmp = strcmp(list_a.entries[i].name, list_b.entries[j].name);
+    while (i < list_a->count && j < list_b->count) {
+        int cmp = strcmp(list_a->entries[i].name, list_b->entries[j].name);
 
         if (cmp < 0) {
-            if (komparu_dir_result_add_only_left(result, list_a.entries[i].name) != 0) {
+            if (komparu_dir_result_add_only_left(result, list_a->entries[i].name) != 0) {
                 *err_msg = "out of memory";
                 goto merge_fail;
             }
             i++;
         } else if (cmp > 0) {
-            if (komparu_dir_result_add_only_right(result, list_b.entries[j].name) != 0) {
+            if (komparu_dir_result_add_only_right(result, list_b->entries[j].name) != 0) {
                 *err_msg = "out of memory";
                 goto merge_fail;
             }
             j++;
         } else {
             /* Same entry name — compare size + hash */
-            entry_hash_t *ea = &list_a.entries[i];
-            entry_hash_t *eb = &list_b.entries[j];
+            entry_hash_t *ea = &list_a->entries[i];
+            entry_hash_t *eb = &list_b->entries[j];
 
             if (ea->size != eb->size) {
                 if (komparu_dir_result_add_diff(result, ea->name, KOMPARU_DIFF_SIZE) != 0) {
@@ -783,27 +849,250 @@ komparu_dir_result_t *komparu_compare_archives_hashed(
         }
     }
 
-    while (i < list_a.count) {
-        if (komparu_dir_result_add_only_left(result, list_a.entries[i].name) != 0) {
+    while (i < list_a->count) {
+        if (komparu_dir_result_add_only_left(result, list_a->entries[i].name) != 0) {
             *err_msg = "out of memory";
             goto merge_fail;
         }
         i++;
     }
 
-    while (j < list_b.count) {
-        if (komparu_dir_result_add_only_right(result, list_b.entries[j].name) != 0) {
+    while (j < list_b->count) {
+        if (komparu_dir_result_add_only_right(result, list_b->entries[j].name) != 0) {
             *err_msg = "out of memory";
             goto merge_fail;
         }
         j++;
     }
 
-    entry_hash_list_free(&list_a);
-    entry_hash_list_free(&list_b);
+    entry_hash_list_free(list_a);
+    entry_hash_list_free(list_b);
     return result;
 
 merge_fail:
+    entry_hash_list_free(list_a);
+    entry_hash_list_free(list_b);
+    komparu_dir_result_free(result);
+    return NULL;
+}
+
+komparu_dir_result_t *komparu_compare_archives_hashed(
+    const char *path_a,
+    const char *path_b,
+    int64_t max_decompressed_size,
+    int max_compression_ratio,
+    int64_t max_entries,
+    int64_t max_entry_name_length,
+    komparu_dir_result_t *result,
+    const char **err_msg
+) {
+    entry_hash_list_t list_a = {0};
+    entry_hash_list_t list_b = {0};
+
+    if (read_archive_entries_hashed(path_a, &list_a,
+            max_decompressed_size, max_compression_ratio,
+            max_entries, max_entry_name_length, err_msg) != 0) {
+        return NULL;
+    }
+
+    if (read_archive_entries_hashed(path_b, &list_b,
+            max_decompressed_size, max_compression_ratio,
+            max_entries, max_entry_name_length, err_msg) != 0) {
+        entry_hash_list_free(&list_a);
+        return NULL;
+    }
+
+    return merge_hash_lists(&list_a, &list_b, result, err_msg);
+}
+
+/* =========================================================================
+ * Parallel hash-based archive comparison
+ *
+ * Both archives are fingerprinted concurrently on a komparu_pool. When an
+ * archive is entry-addressable (uncompressed zip/tar container, so
+ * skipping an entry is a seek rather than a decompression), its entries
+ * are further split round-robin across several readers, each with its
+ * own libarchive handle. Compressed streams (tar.gz, 7z, ...) get a
+ * single reader — skipping inside them costs as much as reading.
+ * ========================================================================= */
+
+typedef struct {
+    const char *path;
+    size_t shard;
+    size_t nshards;
+    int64_t max_decompressed_size;
+    int max_compression_ratio;
+    int64_t max_entries;
+    int64_t max_entry_name_length;
+    _Atomic int64_t *shared_decompressed;
+    _Atomic bool *abort_flag;
+    entry_hash_list_t out;
+    int rc;
+    char err[512];          /* copied out of the worker's TLS errbuf */
+} archive_shard_task_t;
+
+static void archive_shard_task_exec(void *arg) {
+    archive_shard_task_t *t = (archive_shard_task_t *)arg;
+    const char *err = NULL;
+
+    t->rc = read_archive_shard_hashed(t->path, t->shard, t->nshards, &t->out,
+        t->max_decompressed_size, t->max_compression_ratio,
+        t->max_entries, t->max_entry_name_length,
+        t->shared_decompressed, t->abort_flag, &err);
+
+    if (t->rc != 0) {
+        snprintf(t->err, sizeof(t->err), "%s", err ? err : "unknown error");
+        atomic_store_explicit(t->abort_flag, true, memory_order_relaxed);
+    }
+}
+
+/* Probe whether entries can be skipped without decompressing them. */
+static bool archive_is_entry_addressable(const char *path) {
+    struct archive *a = archive_read_new();
+    if (!a) return false;
+
+    archive_read_support_filter_all(a);
+    archive_read_support_format_all(a);
+
+    bool addressable = false;
+    if (archive_read_open_filename(a, path, ARCHIVE_PROBE_BLOCK_SIZE) == ARCHIVE_OK) {
+        struct archive_entry *entry;
+        if (archive_read_next_header(a, &entry) == ARCHIVE_OK) {
+            int base = archive_format(a) & ARCHIVE_FORMAT_BASE_MASK;
+            addressable = archive_filter_code(a, 0) == ARCHIVE_FILTER_NONE &&
+                          (base == ARCHIVE_FORMAT_ZIP || base == ARCHIVE_FORMAT_TAR);
+        }
+        archive_read_close(a);
+    }
+    archive_read_free(a);
+    return addressable;
+}
+
+/* Concatenate shard outputs (moving entry ownership) and sort by name. */
+static int gather_shards(archive_shard_task_t *shards, size_t n, entry_hash_list_t *out) {
+    size_t total = 0;
+    for (size_t k = 0; k < n; k++) total += shards[k].out.count;
+
+    memset(out, 0, sizeof(*out));
+    if (total == 0) return 0;
+
+    out->entries = malloc(total * sizeof(entry_hash_t));
+    if (!out->entries) return -1;
+    out->capacity = total;
+
+    for (size_t k = 0; k < n; k++) {
+        if (shards[k].out.count) {
+            memcpy(out->entries + out->count, shards[k].out.entries,
+                   shards[k].out.count * sizeof(entry_hash_t));
+            out->count += shards[k].out.count;
+        }
+        free(shards[k].out.entries);
+        memset(&shards[k].out, 0, sizeof(shards[k].out));
+    }
+
+    if (out->count > 1) {
+        qsort(out->entries, out->count, sizeof(entry_hash_t), entry_hash_cmp);
+    }
+    return 0;
+}
+
+komparu_dir_result_t *komparu_compare_archives_parallel(
+    const char *path_a,
+    const char *path_b,
+    size_t num_workers,
+    int64_t max_decompressed_size,
+    int max_compression_ratio,
+    int64_t max_entries,
+    int64_t max_entry_name_length,
+    komparu_dir_result_t *result,
+    const char **err_msg
+) {
+    if (num_workers == 0) {
+        num_workers = komparu_cpu_count();
+        if (num_workers > KOMPARU_MAX_DEFAULT_WORKERS)
+            num_workers = KOMPARU_MAX_DEFAULT_WORKERS;
+    }
+    if (num_workers < 2) {
+        return komparu_compare_archives_hashed(path_a, path_b,
+            max_decompressed_size, max_compression_ratio,
+            max_entries, max_entry_name_length, result, err_msg);
+    }
+
+    /* Split the worker budget between the two archives */
+    size_t per_archive = num_workers / 2;
+    size_t na = (per_archive > 1 && archive_is_entry_addressable(path_a)) ? per_archive : 1;
+    size_t nb = (per_archive > 1 && archive_is_entry_addressable(path_b)) ? per_archive : 1;
+
+    archive_shard_task_t *shards = calloc(na + nb, sizeof(archive_shard_task_t));
+    if (!shards) {
+        *err_msg = "out of memory";
+        komparu_dir_result_free(result);
+        return NULL;
+    }
+
+    _Atomic int64_t decompressed_a = 0;
+    _Atomic int64_t decompressed_b = 0;
+    _Atomic bool abort_flag = false;
+
+    for (size_t k = 0; k < na + nb; k++) {
+        archive_shard_task_t *t = &shards[k];
+        bool is_a = k < na;
+        t->path = is_a ? path_a : path_b;
+        t->shard = is_a ? k : k - na;
+        t->nshards = is_a ? na : nb;
+        t->max_decompressed_size = max_decompressed_size;
+        t->max_compression_ratio = max_compression_ratio;
+        t->max_entries = max_entries;
+        t->max_entry_name_length = max_entry_name_length;
+        t->shared_decompressed = is_a ? &decompressed_a : &decompressed_b;
+        t->abort_flag = &abort_flag;
+    }
+
+    komparu_pool_t *pool = komparu_pool_acquire(na + nb < num_workers ? na + nb : num_workers);
+    if (pool) {
+        for (size_t k = 0; k < na + nb; k++) {
+            if (KOMPARU_UNLIKELY(komparu_pool_submit(pool, archive_shard_task_exec, &shards[k]) != 0)) {
+                /* Submit failed — execute remaining shards inline */
+                for (size_t m = k; m < na + nb; m++)
+                    archive_shard_task_exec(&shards[m]);
+                break;
+            }
+        }
+        komparu_pool_release(pool);
+    } else {
+        for (size_t k = 0; k < na + nb; k++)
+            archive_shard_task_exec(&shards[k]);
+    }
+
+    /* Report the first real failure (not a sibling's "aborted") */
+    const char *first_err = NULL;
+    for (size_t k = 0; k < na + nb; k++) {
+        if (shards[k].rc != 0 && (!first_err || strcmp(first_err, "aborted") == 0))
+            first_err = shards[k].err;
+    }
+
+    entry_hash_list_t list_a = {0};
+    entry_hash_list_t list_b = {0};
+
+    if (first_err) {
+        snprintf(archive_errbuf, sizeof(archive_errbuf), "%s", first_err);
+        *err_msg = archive_errbuf;
+        goto fail;
+    }
+
+    if (gather_shards(shards, na, &list_a) != 0 ||
+        gather_shards(shards + na, nb, &list_b) != 0) {
+        *err_msg = "out of memory";
+        goto fail;
+    }
+
+    free(shards);
+    return merge_hash_lists(&list_a, &list_b, result, err_msg);
+
+fail:
+    for (size_t k = 0; k < na + nb; k++)
+        entry_hash_list_free(&shards[k].out);
+    free(shards);
     entry_hash_list_free(&list_a);
     entry_hash_list_free(&list_b);
     komparu_dir_result_free(result);
@@ -46,15 +46,16 @@ komparu_dir_result_t *komparu_compare_archives(
 /* =========================================================================
  * Hash-based archive comparison — O(entries) memory instead of O(data)
  *
- * Computes streaming FNV-1a 128-bit fingerprint (two 64-bit hashes with
- * different bases) of each entry's content. Stores only name + hash + size
- * per entry (~16 bytes vs full file content).
+ * Computes a streaming 128-bit BLAKE2b digest (komparu_digest_t) of each
+ * entry's content. Entries with equal digests are reported equal without
+ * a byte comparison. Stores only name + hash + size per entry (~16 bytes
+ * vs full file content).
  * ========================================================================= */
 
 typedef struct {
     char *name;
-    uint64_t hash_lo;   /* FNV-1a with basis 0xcbf29ce484222325 */
-    uint64_t hash_hi;   /* FNV-1a with basis 0x517cc1b727220a95 */
+    uint64_t hash_lo;   /* komparu_digest_final() words */
+    uint64_t hash_hi;
     size_t size;        /* original decompressed size */
 } entry_hash_t;
 
@@ -96,6 +97,33 @@ komparu_dir_result_t *komparu_compare_archives_hashed(
     const char **err_msg
 );
 
+/**
+ * Compare two archives using hash-based comparison on a worker pool.
+ *
+ * Both archives are fingerprinted concurrently. Uncompressed zip/tar
+ * containers are additionally split across several readers by entry
+ * index; compressed streams use one reader each.
+ *
+ * num_workers: total reader threads (0 = min(CPU cores, 8)).
+ *   Values below 2 fall back to komparu_compare_archives_hashed().
+ *
+ * Same result semantics and bomb limits as the hashed comparison: an
+ * entry pair counts as equal when its sizes and BLAKE2b-128 digests match,
+ * so a differing entry is never reported equal short of a BLAKE2b
+ * collision.
+ */
+komparu_dir_result_t *komparu_compare_archives_parallel(
+    const char *path_a,
+    const char *path_b,
+    size_t num_workers,
+    int64_t max_decompressed_size,
+    int max_compression_ratio,
+    int64_t max_entries,
+    int64_t max_entry_name_length,
+    komparu_dir_result_t *result,
+    const char **err_msg
+);
+
 void entry_hash_list_free(entry_hash_list_t *list);
 
 /**
@@ -7,9 +7,11 @@
  */
 
 #include "reader_file.h"
+#include "compare.h"
 #include <string.h>
 #include <stdlib.h>
 #include <errno.h>
+#include <stdatomic.h>
 
 /* Thread-safe error message buffer */
 static _Thread_local char komparu_errbuf[256];
@@ -57,11 +59,37 @@ static void sigbus_handler(int sig, siginfo_t *info, void *ucontext) {
     }
 }
 
+int komparu_view_memcmp(const void *a, const void *b, size_t size) {
+    sigbus_armed = 1;
+    if (sigsetjmp(sigbus_jmpbuf, 0) != 0) {
+        sigbus_armed = 0;
+        return -1;
+    }
+    int diff = memcmp(a, b, size) != 0;
+    sigbus_armed = 0;
+    return diff;
+}
+
+int komparu_view_hash(struct komparu_hash *h, const void *view, size_t size) {
+    sigbus_armed = 1;
+    if (sigsetjmp(sigbus_jmpbuf, 0) != 0) {
+        sigbus_armed = 0;
+        return -1;
+    }
+    komparu_hash_update(h, view, size);
+    sigbus_armed = 0;
+    return 0;
+}
+
 int komparu_sigbus_init(void) {
     struct sigaction sa;
     sa.sa_sigaction = sigbus_handler;
     sigemptyset(&sa.sa_mask);
-    sa.sa_flags = SA_SIGINFO;
+    /* SA_NODEFER leaves SIGBUS unblocked in the handler, so the jump out
+     * of it needs no saved mask: sigsetjmp(buf, 0) arms protection
+     * without the rt_sigprocmask syscall that saving the mask costs on
+     * every chunk. */
+    sa.sa_flags = SA_SIGINFO | SA_NODEFER;
 
     if (sigaction(SIGBUS, &sa, &old_sigbus_action) != 0) {
         return -1;
@@ -76,6 +104,16 @@ int komparu_sigbus_init(void) {
     return 0;
 }
 
+int komparu_view_memcmp(const void *a, const void *b, size_t size) {
+    /* No Windows reader provides views */
+    return memcmp(a, b, size) != 0;
+}
+
+int komparu_view_hash(struct komparu_hash *h, const void *view, size_t size) {
+    komparu_hash_update(h, view, size);
+    return 0;
+}
+
 #endif /* KOMPARU_WINDOWS */
 
 /* =========================================================================
@@ -89,36 +127,65 @@ typedef struct {
     void *mapped;       /* mmap base address, or NULL if using read() */
     int64_t file_size;
     int64_t offset;     /* Current read position */
+    char *block;        /* Block reads: buffer of block_cap bytes, else NULL */
+    size_t block_cap;
+    int64_t block_start;
+    size_t block_len;   /* Bytes of the file at block_start held in block */
     char source[1024];  /* Source path for error messages */
 } file_ctx_t;
 
 /* ---- read via mmap ---- */
 
-static int64_t file_read_mmap(komparu_reader_t *self, void *buf, size_t size) {
-    file_ctx_t *ctx = (file_ctx_t *)self->ctx;
-
-    if (ctx->offset >= ctx->file_size) {
+/* Copy from a mapping at *offset, advancing it. SIGBUS-protected. */
+static int64_t mapped_read(const void *mapped, int64_t file_size, int64_t *offset,
+                           void *buf, size_t size) {
+    if (*offset >= file_size) {
         return 0; /* EOF */
     }
 
-    size_t remaining = (size_t)(ctx->file_size - ctx->offset);
+    size_t remaining = (size_t)(file_size - *offset);
     size_t to_read = (size < remaining) ? size : remaining;
 
     /* Arm SIGBUS protection before accessing mmap'd memory */
     sigbus_armed = 1;
-    if (sigsetjmp(sigbus_jmpbuf, 1) != 0) {
+    if (sigsetjmp(sigbus_jmpbuf, 0) != 0) {
         /* SIGBUS caught — file was truncated under us */
         sigbus_armed = 0;
         return -1;
     }
 
-    memcpy(buf, (const char *)ctx->mapped + ctx->offset, to_read);
+    memcpy(buf, (const char *)mapped + *offset, to_read);
     sigbus_armed = 0;
 
-    ctx->offset += (int64_t)to_read;
+    *offset += (int64_t)to_read;
     return (int64_t)to_read;
 }
 
+/* Point *view into a mapping at *offset, advancing it. No access yet. */
+static int64_t mapped_view(const void *mapped, int64_t file_size, int64_t *offset,
+                           const void **view, size_t size) {
+    if (*offset >= file_size) {
+        return 0; /* EOF */
+    }
+
+    size_t remaining = (size_t)(file_size - *offset);
+    size_t to_read = (size < remaining) ? size : remaining;
+
+    *view = (const char *)mapped + *offset;
+    *offset += (int64_t)to_read;
+    return (int64_t)to_read;
+}
+
+static int64_t file_read_mmap(komparu_reader_t *self, void *buf, size_t size) {
+    file_ctx_t *ctx = (file_ctx_t *)self->ctx;
+    return mapped_read(ctx->mapped, ctx->file_size, &ctx->offset, buf, size);
+}
+
+static int64_t file_view_mmap(komparu_reader_t *self, const void **view, size_t size) {
+    file_ctx_t *ctx = (file_ctx_t *)self->ctx;
+    return mapped_view(ctx->mapped, ctx->file_size, &ctx->offset, view, size);
+}
+
 static int64_t file_get_size(komparu_reader_t *self) {
     file_ctx_t *ctx = (file_ctx_t *)self->ctx;
     return ctx->file_size;
@@ -160,6 +227,26 @@ static int64_t file_read_fallback(komparu_reader_t *self, void *buf, size_t size
     return (int64_t)n;
 }
 
+/* A file up to KOMPARU_FILE_PREAD_MAX: read at the offset, up to the size
+ * seen on open (as a mapping would), so the end needs no extra read() */
+static int64_t file_read_small(komparu_reader_t *self, void *buf, size_t size) {
+    file_ctx_t *ctx = (file_ctx_t *)self->ctx;
+    if (ctx->offset >= ctx->file_size) {
+        return 0; /* EOF */
+    }
+    size_t remaining = (size_t)(ctx->file_size - ctx->offset);
+    if (size > remaining) size = remaining;
+    ssize_t n;
+    do {
+        n = pread(ctx->fd, buf, size, (off_t)ctx->offset);
+    } while (n < 0 && errno == EINTR);
+    if (n < 0) {
+        return -1;
+    }
+    ctx->offset += n;
+    return (int64_t)n;
+}
+
 static int file_seek_fallback(komparu_reader_t *self, int64_t offset) {
     file_ctx_t *ctx = (file_ctx_t *)self->ctx;
     off_t result = lseek(ctx->fd, (off_t)offset, SEEK_SET);
@@ -179,6 +266,83 @@ static void file_close_fallback(komparu_reader_t *self) {
     free(self);
 }
 
+/* ---- read in blocks (large files not in the page cache) ---- */
+
+/* View of `size` bytes at the offset, read into the block when it does
+ * not hold them. A read continuing the previous block (or starting the
+ * file) fetches a whole KOMPARU_FILE_BLOCK_SIZE; one after a seek, such
+ * as a quick check sample, fetches only what it needs. */
+static int64_t file_view_block(komparu_reader_t *self, const void **view, size_t size) {
+    file_ctx_t *ctx = (file_ctx_t *)self->ctx;
+    if (ctx->offset >= ctx->file_size) {
+        return 0; /* EOF */
+    }
+    size_t remaining = (size_t)(ctx->file_size - ctx->offset);
+    if (size > remaining) size = remaining;
+
+    int64_t block_end = ctx->block_start + (int64_t)ctx->block_len;
+    if (ctx->offset < ctx->block_start || ctx->offset + (int64_t)size > block_end) {
+        size_t len = size;
+        if ((ctx->offset == 0 || ctx->offset == block_end) && len < KOMPARU_FILE_BLOCK_SIZE) {
+            len = KOMPARU_FILE_BLOCK_SIZE;
+        }
+        if (len > ctx->block_cap) {
+            char *block = malloc(len);
+            if (!block) return -1;
+            free(ctx->block);
+            ctx->block = block;
+            ctx->block_cap = len;
+        }
+        ctx->block_len = 0;
+        ssize_t n;
+        do {
+            n = pread(ctx->fd, ctx->block, len, (off_t)ctx->offset);
+        } while (n < 0 && errno == EINTR);
+        if (n < 0) return -1;
+        ctx->block_start = ctx->offset;
+        ctx->block_len = (size_t)n;
+        /* Truncated since open: serve what is left */
+        if ((size_t)n < size) {
+            if (n == 0) return 0;
+            size = (size_t)n;
+        }
+    }
+
+    *view = ctx->block + (ctx->offset - ctx->block_start);
+    ctx->offset += (int64_t)size;
+    return (int64_t)size;
+}
+
+static int64_t file_read_block(komparu_reader_t *self, void *buf, size_t size) {
+    const void *view;
+    int64_t n = file_view_block(self, &view, size);
+    if (n > 0) memcpy(buf, view, (size_t)n);
+    return n;
+}
+
+static void file_close_block(komparu_reader_t *self) {
+    file_ctx_t *ctx = (file_ctx_t *)self->ctx;
+    free(ctx->block);
+    file_close_fallback(self);
+}
+
+/* Whether less than a quarter of a mapped file is in the page cache */
+static bool mostly_uncached(void *mapped, size_t size) {
+    size_t page = (size_t)sysconf(_SC_PAGESIZE);
+    size_t pages = (size + page - 1) / page;
+    unsigned char *vec = malloc(pages);
+    if (!vec) return false;
+    size_t resident = pages;
+    if (mincore(mapped, size, (void *)vec) == 0) {
+        resident = 0;
+        for (size_t i = 0; i < pages; i++) {
+            resident += vec[i] & 1;
+        }
+    }
+    free(vec);
+    return resident < pages / 4;
+}
+
 /* ---- constructor ---- */
 
 komparu_reader_t *komparu_reader_file_open(const char *path, const char **err_msg) {
@@ -197,6 +361,13 @@ komparu_reader_t *komparu_reader_file_open(const char *path, const char **err_ms
         return NULL;
     }
 
+    return komparu_reader_file_from_fd(fd, &st, path, err_msg);
+}
+
+komparu_reader_t *komparu_reader_file_from_fd(int fd, const struct stat *st_in,
+                                              const char *path, const char **err_msg) {
+    const struct stat st = *st_in;
+
     /* Reject non-regular files (directories, devices, pipes, sockets) */
     if (!S_ISREG(st.st_mode)) {
         *err_msg = "not a regular file";
@@ -224,14 +395,39 @@ komparu_reader_t *komparu_reader_file_open(const char *path, const char **err_ms
     reader->source_name = ctx->source;
     reader->get_size = file_get_size;
 
+    /* A small file is read with pread(): one syscall and a copy cost less
+     * than mmap(), madvise(), munmap() and the page faults in between */
+    if (st.st_size > 0 && st.st_size <= KOMPARU_FILE_PREAD_MAX) {
+        ctx->mapped = NULL;
+        reader->read = file_read_small;
+        reader->seek = file_seek;
+        reader->close = file_close_fallback;
+        return reader;
+    }
+
     /* Try mmap for non-empty files */
     if (st.st_size > 0) {
         void *mapped = mmap(NULL, (size_t)st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
         if (mapped != MAP_FAILED) {
+            /* A large file that is not cached is read with pread() in
+             * large blocks: faulting a cold mapping in page by page is
+             * slower than the disk. A cached file keeps the mapping,
+             * which reads it without a copy. */
+            if (st.st_size >= KOMPARU_FILE_BLOCK_MIN &&
+                mostly_uncached(mapped, (size_t)st.st_size)) {
+                munmap(mapped, (size_t)st.st_size);
+                ctx->mapped = NULL;
+                reader->read = file_read_block;
+                reader->read_view = file_view_block;
+                reader->seek = file_seek;
+                reader->close = file_close_block;
+                return reader;
+            }
             /* Advise sequential access */
             madvise(mapped, (size_t)st.st_size, MADV_SEQUENTIAL);
             ctx->mapped = mapped;
             reader->read = file_read_mmap;
+            reader->read_view = file_view_mmap;
             reader->seek = file_seek;
             reader->close = file_close_mmap;
             return reader;
@@ -247,6 +443,137 @@ komparu_reader_t *komparu_reader_file_open(const char *path, const char **err_ms
     return reader;
 }
 
+/* =========================================================================
+ * Shared read-only mapping
+ * ========================================================================= */
+
+struct komparu_file_map {
+    int fd;
+    void *mapped;
+    int64_t file_size;
+    _Atomic size_t refcount;
+    char source[1024];
+};
+
+typedef struct {
+    komparu_file_map_t *map;
+    int64_t offset;
+} shared_ctx_t;
+
+komparu_file_map_t *komparu_file_map_open(const char *path, const char **err_msg) {
+    int fd = open(path, O_RDONLY);
+    if (fd < 0) {
+        komparu_strerror(errno, komparu_errbuf, sizeof(komparu_errbuf));
+        *err_msg = komparu_errbuf;
+        return NULL;
+    }
+
+    struct stat st;
+    if (fstat(fd, &st) != 0) {
+        komparu_strerror(errno, komparu_errbuf, sizeof(komparu_errbuf));
+        *err_msg = komparu_errbuf;
+        close(fd);
+        return NULL;
+    }
+    if (!S_ISREG(st.st_mode) || st.st_size == 0) {
+        *err_msg = "not a non-empty regular file";
+        close(fd);
+        return NULL;
+    }
+
+    komparu_file_map_t *map = calloc(1, sizeof(*map));
+    if (!map) {
+        *err_msg = "out of memory";
+        close(fd);
+        return NULL;
+    }
+
+    void *mapped = mmap(NULL, (size_t)st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+    if (mapped == MAP_FAILED) {
+        komparu_strerror(errno, komparu_errbuf, sizeof(komparu_errbuf));
+        *err_msg = komparu_errbuf;
+        free(map);
+        close(fd);
+        return NULL;
+    }
+    madvise(mapped, (size_t)st.st_size, MADV_SEQUENTIAL);
+
+    map->fd = fd;
+    map->mapped = mapped;
+    map->file_size = (int64_t)st.st_size;
+    atomic_init(&map->refcount, 1);
+    snprintf(map->source, sizeof(map->source), "%s", path);
+    return map;
+}
+
+void komparu_file_map_retain(komparu_file_map_t *map) {
+    atomic_fetch_add_explicit(&map->refcount, 1, memory_order_relaxed);
+}
+
+void komparu_file_map_release(komparu_file_map_t *map) {
+    if (!map) return;
+    if (atomic_fetch_sub_explicit(&map->refcount, 1, memory_order_acq_rel) != 1)
+        return;
+    munmap(map->mapped, (size_t)map->file_size);
+    close(map->fd);
+    free(map);
+}
+
+static int64_t shared_read(komparu_reader_t *self, void *buf, size_t size) {
+    shared_ctx_t *ctx = (shared_ctx_t *)self->ctx;
+    return mapped_read(ctx->map->mapped, ctx->map->file_size, &ctx->offset, buf, size);
+}
+
+static int64_t shared_view(komparu_reader_t *self, const void **view, size_t size) {
+    shared_ctx_t *ctx = (shared_ctx_t *)self->ctx;
+    return mapped_view(ctx->map->mapped, ctx->map->file_size, &ctx->offset, view, size);
+}
+
+static int64_t shared_get_size(komparu_reader_t *self) {
+    shared_ctx_t *ctx = (shared_ctx_t *)self->ctx;
+    return ctx->map->file_size;
+}
+
+static int shared_seek(komparu_reader_t *self, int64_t offset) {
+    shared_ctx_t *ctx = (shared_ctx_t *)self->ctx;
+    if (offset < 0 || offset > ctx->map->file_size) {
+        return -1;
+    }
+    ctx->offset = offset;
+    return 0;
+}
+
+static void shared_close(komparu_reader_t *self) {
+    shared_ctx_t *ctx = (shared_ctx_t *)self->ctx;
+    komparu_file_map_release(ctx->map);
+    free(ctx);
+    free(self);
+}
+
+komparu_reader_t *komparu_reader_file_from_map(komparu_file_map_t *map, const char **err_msg) {
+    komparu_reader_t *reader = calloc(1, sizeof(komparu_reader_t));
+    shared_ctx_t *ctx = calloc(1, sizeof(shared_ctx_t));
+    if (!reader || !ctx) {
+        *err_msg = "out of memory";
+        free(reader);
+        free(ctx);
+        return NULL;
+    }
+
+    komparu_file_map_retain(map);
+    ctx->map = map;
+    ctx->offset = 0;
+
+    reader->ctx = ctx;
+    reader->source_name = map->source;
+    reader->read = shared_read;
+    reader->read_view = shared_view;
+    reader->get_size = shared_get_size;
+    reader->seek = shared_seek;
+    reader->close = shared_close;
+    return reader;
+}
+
 #else /* KOMPARU_WINDOWS */
 
 /* =========================================================================
@@ -384,4 +711,23 @@ komparu_reader_t *komparu_reader_file_open(const char *path, const char **err_ms
     return reader;
 }
 
+/* Shared mappings are POSIX-only for now; callers fall back to
+ * komparu_reader_file_open() per comparison. */
+
+komparu_file_map_t *komparu_file_map_open(const char *path, const char **err_msg) {
+    (void)path;
+    *err_msg = "shared file mapping not supported on this platform";
+    return NULL;
+}
+
+void komparu_file_map_retain(komparu_file_map_t *map) { (void)map; }
+
+void komparu_file_map_release(komparu_file_map_t *map) { (void)map; }
+
+komparu_reader_t *komparu_reader_file_from_map(komparu_file_map_t *map, const char **err_msg) {
+    (void)map;
+    *err_msg = "shared file mapping not supported on this platform";
+    return NULL;
+}
+
 #endif /* KOMPARU_WINDOWS */
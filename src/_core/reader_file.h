@@ -18,4 +18,58 @@
  */
 int komparu_sigbus_init(void);
 
+/**
+ * memcmp() for reader views: a SIGBUS from a file truncated under its
+ * mapping is caught instead of killing the process.
+ *
+ * Returns 0 if equal, 1 if different, -1 if a mapping became unreadable.
+ */
+int komparu_view_memcmp(const void *a, const void *b, size_t size);
+
+struct komparu_hash;
+
+/**
+ * komparu_hash_update() for reader views, with the same SIGBUS guard.
+ *
+ * Returns 0 on success, -1 if the mapping became unreadable.
+ */
+int komparu_view_hash(struct komparu_hash *h, const void *view, size_t size);
+
+/* =========================================================================
+ * Shared read-only mapping — map a file once, read it from many readers
+ * ========================================================================= */
+
+typedef struct komparu_file_map komparu_file_map_t;
+
+/**
+ * Map a regular, non-empty file read-only (refcount 1).
+ * Returns NULL if the file cannot be opened or mapped, or on platforms
+ * without shared mapping support; callers fall back to per-reader opens.
+ */
+komparu_file_map_t *komparu_file_map_open(const char *path, const char **err_msg);
+
+/** Take another reference. Thread-safe. */
+void komparu_file_map_retain(komparu_file_map_t *map);
+
+/** Drop a reference; unmapped and closed when the last one goes. */
+void komparu_file_map_release(komparu_file_map_t *map);
+
+/**
+ * Create a reader over a shared mapping with its own read offset.
+ * The reader holds a reference on the map until closed.
+ */
+komparu_reader_t *komparu_reader_file_from_map(komparu_file_map_t *map, const char **err_msg);
+
+#ifndef KOMPARU_WINDOWS
+#include <sys/stat.h>
+
+/**
+ * Create a reader over an fd the caller opened and fstat'ed itself (to
+ * check identity or size before reading). Takes ownership of fd: it is
+ * closed on failure as well.
+ */
+komparu_reader_t *komparu_reader_file_from_fd(int fd, const struct stat *st,
+                                              const char *path, const char **err_msg);
+#endif
+
 #endif /* KOMPARU_READER_FILE_H */
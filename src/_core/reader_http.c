@@ -2,15 +2,21 @@
  * reader_http.c — HTTP Range reader using libcurl easy interface (sync).
  *
  * Strategy:
- * - HEAD request on open() to detect size and validate connectivity
+ * - Ranged GET of the first KOMPARU_HTTP_PREFETCH_SIZE bytes on open():
+ *   size, Range support and connectivity from one round trip, and the
+ *   body is kept for the first reads (a small file needs no other request)
  * - Per-read Range GET requests (one curl_easy_perform per read call)
+ * - A server without Range support is read through one GET, driven by a
+ *   multi handle and paused between reads; closing aborts it
  * - Direct buffer write (curl callback writes into user buffer)
+ * - Against a mapped source, the callback compares in place (read_compare)
  * - Seek = change offset, next read uses new Range header
  * - SSRF protection via CURLOPT_OPENSOCKETFUNCTION (blocks private IPs)
  * - Connection reuse via TCP keepalive on the same CURL handle
  */
 
 #include "reader_http.h"
+#include "reader_file.h"
 #include "curl_share.h"
 #include <curl/curl.h>
 #include <stdlib.h>
@@ -135,28 +141,74 @@ static size_t write_callback(void *contents, size_t size, size_t nmemb, void *us
     return total;
 }
 
-/* Discard callback for HEAD requests */
-static size_t discard_callback(void *contents, size_t size, size_t nmemb, void *userp) {
-    (void)contents;
-    (void)userp;
-    return size * nmemb;
+/* =========================================================================
+ * Compare callback — check the body against another reader's view as it
+ * arrives, so it is never copied into a buffer
+ * ========================================================================= */
+
+typedef struct {
+    const char *other;  /* View from the other reader */
+    size_t size;        /* Bytes of `other` available */
+    size_t received;    /* Bytes compared so far */
+    int64_t result;     /* 0, KOMPARU_READ_MISMATCH or KOMPARU_READ_VIEW_FAULT */
+} compare_ctx_t;
+
+static size_t compare_callback(void *contents, size_t size, size_t nmemb, void *userp) {
+    size_t total = size * nmemb;
+    compare_ctx_t *cctx = (compare_ctx_t *)userp;
+
+    size_t n = cctx->size - cctx->received;
+    if (n > total) n = total;
+
+    /* After a verdict the rest of the body is drained rather than
+     * aborted, so the connection stays reusable */
+    if (n > 0 && cctx->result == 0) {
+        int diff = komparu_view_memcmp(cctx->other + cctx->received, contents, n);
+        if (KOMPARU_UNLIKELY(diff != 0)) {
+            cctx->result = diff < 0 ? KOMPARU_READ_VIEW_FAULT : KOMPARU_READ_MISMATCH;
+        }
+    }
+    cctx->received += n;
+    return total;
+}
+
+/* Probe body: fills the prefetch buffer, aborting a response larger than
+ * it (a server that ignored the Range header) instead of downloading it */
+static size_t probe_write_callback(void *contents, size_t size, size_t nmemb, void *userp) {
+    size_t total = size * nmemb;
+    write_ctx_t *wctx = (write_ctx_t *)userp;
+
+    if (total > wctx->buf_size - wctx->written) {
+        wctx->overflow = true;
+        return 0;  /* CURLE_WRITE_ERROR */
+    }
+
+    memcpy(wctx->buf + wctx->written, contents, total);
+    wctx->written += total;
+    return total;
 }
 
-/* Header callback for HEAD requests — detect Accept-Ranges */
-static size_t head_header_callback(char *buffer, size_t size, size_t nitems, void *userp) {
+/* Probe headers: total size N from "Content-Range: bytes a-b/N" (or the
+ * unsatisfied-range form, star-slash-N; -1 if absent or unknown). Reset
+ * for every response, so only the last one of a redirect chain counts. */
+static size_t probe_header_callback(char *buffer, size_t size, size_t nitems, void *userp) {
     size_t total = size * nitems;
-    bool *range_flag = (bool *)userp;
-    const char *end = buffer + total;
-
-    /* Need at least "Accept-Ranges: bytes" (20 chars + CRLF) */
-    if (total >= 22 &&
-        (buffer[0] == 'A' || buffer[0] == 'a') &&
-        (buffer[1] == 'c' || buffer[1] == 'C') &&
-        strncasecmp(buffer, "Accept-Ranges:", 14) == 0) {
-        const char *val = buffer + 14;
-        while (val < end && (*val == ' ' || *val == '\t')) val++;
-        if (val + 5 <= end && strncasecmp(val, "bytes", 5) == 0) {
-            *range_flag = true;
+    int64_t *range_total = (int64_t *)userp;
+
+    if (total >= 5 && strncmp(buffer, "HTTP/", 5) == 0) {
+        *range_total = -1;
+    } else if (total > 14 && strncasecmp(buffer, "Content-Range:", 14) == 0) {
+        const char *slash = memchr(buffer, '/', total);
+        if (slash) {
+            int64_t n = 0;
+            const char *p = slash + 1;
+            const char *end = buffer + total;
+            bool digits = false;
+            while (p < end && *p >= '0' && *p <= '9' && n <= (INT64_MAX - 9) / 10) {
+                n = n * 10 + (*p++ - '0');
+                digits = true;
+            }
+            *range_total = digits ? n : -1;
         }
     }
 
@@ -167,6 +219,13 @@ static size_t head_header_callback(char *buffer, size_t size, size_t nitems, voi
  * HTTP reader context
  * ========================================================================= */
 
+/* Idle keep-alive connections kept across readers (all hosts) */
+#define KOMPARU_HTTP_MAX_CONNECTS 64
+
+/* Bytes fetched by the probe on open; matches the default chunk size, so
+ * the first read of a typical comparison is already in memory */
+#define KOMPARU_HTTP_PREFETCH_SIZE KOMPARU_DEFAULT_CHUNK_SIZE
+
 typedef struct {
     CURL *easy;
     char *url;                  /* Owned copy of URL */
@@ -177,6 +236,23 @@ typedef struct {
     bool range_supported;       /* Server supports Range requests */
     bool allow_private;         /* Allow SSRF (private network redirects) */
 
+    char *prefetch;             /* Body bytes [0, prefetch_len) from the probe */
+    size_t prefetch_len;
+
+    /* Full GET of a server without Range support, spread over reads */
+    CURLM *stream;              /* NULL until the first streamed read */
+    bool stream_paused;         /* Write callback paused the transfer */
+    bool stream_done;
+    CURLcode stream_result;
+    size_t (*stream_cb)(void *, size_t, size_t, void *); /* Current read's sink */
+    void *stream_data;
+    const size_t *stream_received;
+    size_t stream_want;
+    char *spill;                /* Bytes received past the last read */
+    size_t spill_len;
+    size_t spill_off;
+    size_t spill_cap;
+
     char curl_errbuf[CURL_ERROR_SIZE]; /* Per-handle curl error buffer */
 } http_ctx_t;
 
@@ -205,23 +281,127 @@ static int http_seek(komparu_reader_t *self, int64_t offset) {
     return 0;
 }
 
-static int64_t http_read(komparu_reader_t *self, void *buf, size_t size) {
-    if (size == 0) return 0;
+/* Streamed body: hands the current read what it still wants and keeps the
+ * rest of this block for the next read. A read that is already full
+ * pauses the transfer; libcurl delivers the block again on unpause. */
+static size_t stream_write_callback(void *contents, size_t size, size_t nmemb, void *userp) {
+    size_t total = size * nmemb;
+    http_ctx_t *ctx = (http_ctx_t *)userp;
 
-    http_ctx_t *ctx = (http_ctx_t *)self->ctx;
+    size_t want = ctx->stream_want - *ctx->stream_received;
+    if (want == 0) {
+        ctx->stream_paused = true;
+        return CURL_WRITEFUNC_PAUSE;
+    }
+    size_t n = total < want ? total : want;
+    ctx->stream_cb(contents, 1, n, ctx->stream_data);
+
+    size_t rest = total - n;
+    if (rest > 0) {
+        if (rest > ctx->spill_cap) {
+            char *spill = realloc(ctx->spill, rest);
+            if (!spill) return 0;  /* CURLE_WRITE_ERROR */
+            ctx->spill = spill;
+            ctx->spill_cap = rest;
+        }
+        memcpy(ctx->spill, (char *)contents + n, rest);
+        ctx->spill_len = rest;
+        ctx->spill_off = 0;
+    }
+    return total;
+}
 
-    /* EOF check if size is known */
-    if (ctx->file_size >= 0 && ctx->offset >= ctx->file_size) {
-        return 0;
+/*
+ * Read up to `size` bytes of a server without Range support from its one
+ * full GET, started on the first call and resumed by later ones. Same
+ * contract as http_get.
+ */
+static int64_t http_stream_get(http_ctx_t *ctx, size_t size,
+                               size_t (*callback)(void *, size_t, size_t, void *), void *data,
+                               const size_t *received) {
+    /* Leftover of the block that completed the previous read */
+    if (ctx->spill_off < ctx->spill_len) {
+        size_t n = ctx->spill_len - ctx->spill_off;
+        if (n > size) n = size;
+        callback(ctx->spill + ctx->spill_off, 1, n, data);
+        ctx->spill_off += n;
+    }
+
+    if (*received < size && !ctx->stream_done) {
+        ctx->stream_cb = callback;
+        ctx->stream_data = data;
+        ctx->stream_received = received;
+        ctx->stream_want = size;
+
+        if (!ctx->stream) {
+            if (ctx->offset > 0) {
+                snprintf(http_errbuf, sizeof(http_errbuf),
+                         "server does not support Range requests");
+                return -1;
+            }
+            ctx->stream = curl_multi_init();
+            if (!ctx->stream) {
+                snprintf(http_errbuf, sizeof(http_errbuf), "out of memory");
+                return -1;
+            }
+            curl_easy_setopt(ctx->easy, CURLOPT_HTTPGET, 1L);
+            curl_easy_setopt(ctx->easy, CURLOPT_RANGE, NULL);
+            curl_easy_setopt(ctx->easy, CURLOPT_FAILONERROR, 1L);
+            curl_easy_setopt(ctx->easy, CURLOPT_WRITEFUNCTION, stream_write_callback);
+            curl_easy_setopt(ctx->easy, CURLOPT_WRITEDATA, ctx);
+            curl_multi_add_handle(ctx->stream, ctx->easy);
+        } else if (ctx->stream_paused) {
+            ctx->stream_paused = false;
+            curl_easy_pause(ctx->easy, CURLPAUSE_CONT);
+        }
+
+        while (*received < size && !ctx->stream_done) {
+            int running = 0;
+            if (curl_multi_perform(ctx->stream, &running) != CURLM_OK) {
+                snprintf(http_errbuf, sizeof(http_errbuf), "HTTP read error: multi perform failed");
+                return -1;
+            }
+            int queued;
+            CURLMsg *msg;
+            while ((msg = curl_multi_info_read(ctx->stream, &queued))) {
+                if (msg->msg == CURLMSG_DONE) {
+                    ctx->stream_done = true;
+                    ctx->stream_result = msg->data.result;
+                }
+            }
+            if (*received < size && !ctx->stream_done && !ctx->stream_paused) {
+                curl_multi_poll(ctx->stream, NULL, 0, 1000, NULL);
+            }
+        }
+        ctx->stream_cb = NULL;
     }
 
-    /* Guard: non-Range server can only do one full GET from offset 0 */
-    if (!ctx->range_supported && ctx->offset > 0) {
+    if (*received < size && ctx->stream_done && ctx->stream_result != CURLE_OK) {
         snprintf(http_errbuf, sizeof(http_errbuf),
-                 "server does not support Range requests");
+                 "HTTP read error: %s",
+                 ctx->curl_errbuf[0] ? ctx->curl_errbuf : curl_easy_strerror(ctx->stream_result));
         return -1;
     }
 
+    ctx->offset += (int64_t)*received;
+    return (int64_t)*received;
+}
+
+/*
+ * One Range GET of up to `size` bytes at the current offset, handed to
+ * `callback`. `received` points at the byte count the callback keeps.
+ * Returns that count (the offset advances by it), 0 at EOF, or -1.
+ */
+static int64_t http_get(http_ctx_t *ctx, size_t size,
+                        size_t (*callback)(void *, size_t, size_t, void *), void *data,
+                        const size_t *received) {
+    if (size == 0) return 0;
+
+    /* EOF check if size is known */
+    if (ctx->file_size >= 0 && ctx->offset >= ctx->file_size) {
+        return 0;
+    }
+
     /* Clamp read size to remaining bytes if size known */
     if (ctx->file_size >= 0) {
         int64_t remaining = ctx->file_size - ctx->offset;
@@ -230,30 +410,21 @@ static int64_t http_read(komparu_reader_t *self, void *buf, size_t size) {
         }
     }
 
-    /* Set up direct buffer write */
-    write_ctx_t wctx = {
-        .buf = (char *)buf,
-        .buf_size = size,
-        .written = 0,
-        .overflow = false,
-    };
+    if (!ctx->range_supported) {
+        return http_stream_get(ctx, size, callback, data, received);
+    }
 
     curl_easy_setopt(ctx->easy, CURLOPT_NOBODY, 0L);
     curl_easy_setopt(ctx->easy, CURLOPT_HTTPGET, 1L);
-    curl_easy_setopt(ctx->easy, CURLOPT_WRITEFUNCTION, write_callback);
-    curl_easy_setopt(ctx->easy, CURLOPT_WRITEDATA, &wctx);
-
-    if (ctx->range_supported) {
-        /* Configure Range header: "start-end" (inclusive) */
-        char range_str[64];
-        snprintf(range_str, sizeof(range_str), "%lld-%lld",
-                 (long long)ctx->offset,
-                 (long long)(ctx->offset + (int64_t)size - 1));
-        curl_easy_setopt(ctx->easy, CURLOPT_RANGE, range_str);
-    } else {
-        /* No Range — full GET, only valid from current sequential position */
-        curl_easy_setopt(ctx->easy, CURLOPT_RANGE, NULL);
-    }
+    curl_easy_setopt(ctx->easy, CURLOPT_WRITEFUNCTION, callback);
+    curl_easy_setopt(ctx->easy, CURLOPT_WRITEDATA, data);
+
+    /* Configure Range header: "start-end" (inclusive) */
+    char range_str[64];
+    snprintf(range_str, sizeof(range_str), "%lld-%lld",
+             (long long)ctx->offset,
+             (long long)(ctx->offset + (int64_t)size - 1));
+    curl_easy_setopt(ctx->easy, CURLOPT_RANGE, range_str);
 
     CURLcode res = curl_easy_perform(ctx->easy);
 
@@ -268,21 +439,11 @@ static int64_t http_read(komparu_reader_t *self, void *buf, size_t size) {
 
     if (response_code == 206) {
         /* Partial Content — Range supported, as expected */
-        ctx->offset += (int64_t)wctx.written;
-        return (int64_t)wctx.written;
+        ctx->offset += (int64_t)*received;
+        return (int64_t)*received;
     }
 
     if (response_code == 200) {
-        /*
-         * Server ignored Range and sent full file.
-         * This is only acceptable for the very first read from offset 0
-         * when requesting the entire file.
-         */
-        if (ctx->offset == 0) {
-            ctx->range_supported = false;
-            ctx->offset += (int64_t)wctx.written;
-            return (int64_t)wctx.written;
-        }
         /* Requested a range but got full file — can't do random access */
         snprintf(http_errbuf, sizeof(http_errbuf),
                  "server does not support Range requests");
@@ -300,13 +461,74 @@ static int64_t http_read(komparu_reader_t *self, void *buf, size_t size) {
     return -1;
 }
 
+/* Serve the start of a read from the probe body: points *src at up to
+ * `size` prefetched bytes at the current offset and returns their count */
+static size_t prefetch_take(http_ctx_t *ctx, size_t size, const char **src) {
+    if (ctx->offset >= (int64_t)ctx->prefetch_len) return 0;
+    size_t n = ctx->prefetch_len - (size_t)ctx->offset;
+    if (n > size) n = size;
+    *src = ctx->prefetch + ctx->offset;
+    ctx->offset += (int64_t)n;
+    return n;
+}
+
+static int64_t http_read(komparu_reader_t *self, void *buf, size_t size) {
+    http_ctx_t *ctx = (http_ctx_t *)self->ctx;
+
+    const char *src;
+    size_t n = prefetch_take(ctx, size, &src);
+    if (n > 0) memcpy(buf, src, n);
+    if (n == size) return (int64_t)n;
+
+    /* Set up direct buffer write */
+    write_ctx_t wctx = {
+        .buf = (char *)buf + n,
+        .buf_size = size - n,
+        .written = 0,
+        .overflow = false,
+    };
+    int64_t m = http_get(ctx, size - n, write_callback, &wctx, &wctx.written);
+    return m < 0 ? m : (int64_t)n + m;
+}
+
+static int64_t http_read_compare(komparu_reader_t *self, const void *other, size_t size) {
+    http_ctx_t *ctx = (http_ctx_t *)self->ctx;
+
+    const char *src;
+    size_t n = prefetch_take(ctx, size, &src);
+    if (n > 0) {
+        int diff = komparu_view_memcmp(other, src, n);
+        if (KOMPARU_UNLIKELY(diff != 0)) {
+            return diff < 0 ? KOMPARU_READ_VIEW_FAULT : KOMPARU_READ_MISMATCH;
+        }
+        if (n == size) return (int64_t)n;
+    }
+
+    compare_ctx_t cctx = {
+        .other = (const char *)other + n,
+        .size = size - n,
+        .received = 0,
+        .result = 0,
+    };
+    int64_t m = http_get(ctx, size - n, compare_callback, &cctx, &cctx.received);
+    if (m < 0) return m;
+    return cctx.result ? cctx.result : (int64_t)n + m;
+}
+
 static void http_close(komparu_reader_t *self) {
     if (!self) return;
 
     http_ctx_t *ctx = (http_ctx_t *)self->ctx;
     if (ctx) {
+        if (ctx->stream) {
+            /* Aborts an unfinished body instead of draining it */
+            curl_multi_remove_handle(ctx->stream, ctx->easy);
+            curl_multi_cleanup(ctx->stream);
+        }
         if (ctx->headers) curl_slist_free_all(ctx->headers);
         if (ctx->easy) curl_easy_cleanup(ctx->easy);
+        free(ctx->spill);
+        free(ctx->prefetch);
         free(ctx->url);
         free(ctx);
     }
@@ -357,6 +579,23 @@ komparu_reader_t *komparu_reader_http_open_ex(
     bool allow_private,
     const char *proxy,
     const char **err_msg
+) {
+    return komparu_reader_http_open_sized(
+        url, headers, timeout, follow_redirects, verify_ssl, allow_private, proxy,
+        -1, err_msg
+    );
+}
+
+komparu_reader_t *komparu_reader_http_open_sized(
+    const char *url,
+    const char **headers,
+    double timeout,
+    bool follow_redirects,
+    bool verify_ssl,
+    bool allow_private,
+    const char *proxy,
+    int64_t expected_size,
+    const char **err_msg
 ) {
     /* Allocate structures */
     komparu_reader_t *reader = calloc(1, sizeof(komparu_reader_t));
@@ -424,6 +663,10 @@ komparu_reader_t *komparu_reader_http_open_ex(
     curl_easy_setopt(ctx->easy, CURLOPT_TCP_KEEPALIVE, 1L);
     curl_easy_setopt(ctx->easy, CURLOPT_TCP_KEEPIDLE, 60L);
     curl_easy_setopt(ctx->easy, CURLOPT_TCP_KEEPINTVL, 30L);
+    /* Idle connections the shared cache may keep. curl_easy_perform()
+     * caps it at 4 by default, so past 4 concurrent readers of one host
+     * nearly every request closed a connection and opened a new one */
+    curl_easy_setopt(ctx->easy, CURLOPT_MAXCONNECTS, (long)KOMPARU_HTTP_MAX_CONNECTS);
 
     /* ---- Custom headers ---- */
     if (headers) {
@@ -446,15 +689,38 @@ komparu_reader_t *komparu_reader_http_open_ex(
 #endif
 
     /* =========================================================================
-     * HEAD request to detect size, Range support, and validate connectivity
+     * Probe: a ranged GET of the first bytes detects size, Range support
+     * and connectivity in the round trip a HEAD request would take, and
+     * its body serves the first reads
      * ========================================================================= */
-    bool head_range_supported = false;
+    size_t probe_size = KOMPARU_HTTP_PREFETCH_SIZE;
+    if (expected_size >= 0 && expected_size < (int64_t)probe_size) {
+        /* Bytes past the other side's size can only show a mismatch the
+         * size already shows; an empty other side asks for "0-0" */
+        probe_size = expected_size > 0 ? (size_t)expected_size : 1;
+    }
+    ctx->prefetch = malloc(probe_size);
+    if (!ctx->prefetch) {
+        *err_msg = "out of memory";
+        goto fail;
+    }
 
-    curl_easy_setopt(ctx->easy, CURLOPT_NOBODY, 1L);
-    curl_easy_setopt(ctx->easy, CURLOPT_WRITEFUNCTION, discard_callback);
-    curl_easy_setopt(ctx->easy, CURLOPT_WRITEDATA, NULL);
-    curl_easy_setopt(ctx->easy, CURLOPT_HEADERFUNCTION, head_header_callback);
-    curl_easy_setopt(ctx->easy, CURLOPT_HEADERDATA, &head_range_supported);
+    write_ctx_t probe = {
+        .buf = ctx->prefetch,
+        .buf_size = probe_size,
+        .written = 0,
+        .overflow = false,
+    };
+    int64_t range_total = -1;
+    char range_str[64];
+    snprintf(range_str, sizeof(range_str), "0-%zu", probe_size - 1);
+
+    curl_easy_setopt(ctx->easy, CURLOPT_HTTPGET, 1L);
+    curl_easy_setopt(ctx->easy, CURLOPT_RANGE, range_str);
+    curl_easy_setopt(ctx->easy, CURLOPT_WRITEFUNCTION, probe_write_callback);
+    curl_easy_setopt(ctx->easy, CURLOPT_WRITEDATA, &probe);
+    curl_easy_setopt(ctx->easy, CURLOPT_HEADERFUNCTION, probe_header_callback);
+    curl_easy_setopt(ctx->easy, CURLOPT_HEADERDATA, &range_total);
 
     CURLcode res = curl_easy_perform(ctx->easy);
 
@@ -462,12 +728,13 @@ komparu_reader_t *komparu_reader_http_open_ex(
     curl_easy_setopt(ctx->easy, CURLOPT_HEADERFUNCTION, NULL);
     curl_easy_setopt(ctx->easy, CURLOPT_HEADERDATA, NULL);
 
-    if (res != CURLE_OK) {
+    /* An aborted oversized body is not a failure: the server answered */
+    if (res != CURLE_OK && !(res == CURLE_WRITE_ERROR && probe.overflow)) {
         if (res == CURLE_COULDNT_CONNECT && ctx->curl_errbuf[0] == '\0') {
             *err_msg = "connection blocked by SSRF protection or network error";
         } else {
             snprintf(http_errbuf, sizeof(http_errbuf),
-                     "HTTP HEAD failed: %s",
+                     "HTTP request failed: %s",
                      ctx->curl_errbuf[0] ? ctx->curl_errbuf : curl_easy_strerror(res));
             *err_msg = http_errbuf;
         }
@@ -485,26 +752,40 @@ komparu_reader_t *komparu_reader_http_open_ex(
         goto fail;
     }
 
-    if (response_code >= 400) {
+    if (response_code == 206 && !probe.overflow) {
+        /* Partial Content: Content-Range carries the total size */
+        ctx->range_supported = true;
+        ctx->file_size = range_total;
+        ctx->prefetch_len = probe.written;
+    } else if (response_code == 416) {
+        /* Nothing at offset 0: an empty resource */
+        ctx->range_supported = true;
+        ctx->file_size = range_total >= 0 ? range_total : 0;
+    } else if (response_code >= 400) {
         snprintf(http_errbuf, sizeof(http_errbuf),
                  "HTTP error: status %ld", response_code);
         *err_msg = http_errbuf;
         goto fail;
+    } else {
+        /* Range ignored. A body that fit is the whole resource; a larger
+         * one was aborted and is streamed by one full GET on read. */
+        curl_off_t content_length = -1;
+        curl_easy_getinfo(ctx->easy, CURLINFO_CONTENT_LENGTH_DOWNLOAD_T, &content_length);
+        ctx->range_supported = false;
+        if (probe.overflow) {
+            ctx->file_size = (int64_t)content_length; /* -1 if unknown */
+        } else {
+            ctx->file_size = (int64_t)probe.written;
+            ctx->prefetch_len = probe.written;
+        }
     }
-
-    /* Extract Content-Length */
-    curl_off_t content_length = -1;
-    curl_easy_getinfo(ctx->easy, CURLINFO_CONTENT_LENGTH_DOWNLOAD_T, &content_length);
-    ctx->file_size = (int64_t)content_length; /* -1 if unknown */
-
-    /* Set Range support based on Accept-Ranges header from HEAD response */
-    ctx->range_supported = head_range_supported;
     ctx->offset = 0;
 
     /* ---- Wire up reader interface ---- */
     reader->ctx = ctx;
     reader->source_name = ctx->url; /* Points into ctx, freed in http_close */
     reader->read = http_read;
+    reader->read_compare = http_read_compare;
     reader->get_size = http_get_size;
     reader->seek = http_seek;
     reader->close = http_close;
@@ -514,6 +795,7 @@ komparu_reader_t *komparu_reader_http_open_ex(
 fail:
     if (ctx->headers) curl_slist_free_all(ctx->headers);
     if (ctx->easy) curl_easy_cleanup(ctx->easy);
+    free(ctx->prefetch);
     free(ctx->url);
     free(ctx);
     free(reader);
@@ -39,4 +39,23 @@ komparu_reader_t *komparu_reader_http_open_ex(
     const char **err_msg
 );
 
+/**
+ * Same as komparu_reader_http_open_ex, for a source that will be compared
+ * with one of `expected_size` bytes (-1 if unknown). Opening fetches the
+ * start of the body along with the size; it fetches no more than
+ * expected_size bytes (at least 1), so a size mismatch found right after
+ * opening has cost at most that much transfer.
+ */
+komparu_reader_t *komparu_reader_http_open_sized(
+    const char *url,
+    const char **headers,
+    double timeout,
+    bool follow_redirects,
+    bool verify_ssl,
+    bool allow_private,
+    const char *proxy,
+    int64_t expected_size,
+    const char **err_msg
+);
+
 #endif /* KOMPARU_READER_HTTP_H */
@@ -2,14 +2,46 @@
 
 from __future__ import annotations
 
+from array import array
+from collections.abc import Callable, Sequence
+from typing import Any
+
 from komparu._types import Source, CompareResult
-from komparu._config import get_config
 from komparu._core import compare as _compare_c
 from komparu._core import compare_dir as _compare_dir_c
 from komparu._core import compare_archive as _compare_archive_c
 from komparu._core import compare_dir_urls as _compare_dir_urls_c
-from komparu._validate import validate_path, validate_chunk_size, validate_timeout, validate_max_workers
-from komparu._helpers import resolve_headers, build_dir_result, filter_dir_result
+from komparu._core import fingerprint as _fingerprint_c
+from komparu._core import cancel_flag_new, cancel_flag_set
+from komparu._validate import (
+    validate_path,
+    validate_chunk_size,
+    validate_timeout,
+    validate_max_workers,
+    validate_parallel_workers,
+)
+from komparu._helpers import (
+    CompareArgs,
+    resolve_compare_args,
+    local_stats,
+    resolve_pair,
+    split_duplicates,
+    resolve_headers,
+    FINGERPRINT_CACHED_MIN_SOURCES,
+    FINGERPRINT_MIN_SOURCES,
+    build_compare_result,
+    group_roots,
+    group_by_digest,
+    lookup_fingerprints,
+    drop_unique_samples,
+    record_fingerprints,
+    pairs_against_first,
+    pairs_within,
+    split_by_size,
+    split_mismatches,
+    build_dir_result,
+    filter_dir_result,
+)
 
 from komparu._types import DirResult  # noqa: F401 — re-export for type annotations
 
@@ -18,7 +50,7 @@ def compare(
     source_a: str | Source,
     source_b: str | Source,
     *,
-    chunk_size: int = 65536,
+    chunk_size: int | None = None,
     size_precheck: bool = True,
     quick_check: bool = True,
     headers: dict[str, str] | None = None,
@@ -31,7 +63,8 @@ def compare(
 
     :param source_a: File path, URL, or Source object.
     :param source_b: File path, URL, or Source object.
-    :param chunk_size: Chunk size in bytes.
+    :param chunk_size: Chunk size in bytes (None = config value, sized
+        to the sources when ``auto_chunk`` is on and it is the default).
     :param size_precheck: Compare sizes before content.
     :param quick_check: Sample key offsets before full scan.
     :param headers: Global HTTP headers for URL sources.
@@ -43,33 +76,65 @@ def compare(
     """
     validate_path(source_a, "source_a")
     validate_path(source_b, "source_b")
-    validate_chunk_size(chunk_size)
     validate_timeout(timeout)
 
-    cfg = get_config()
-
     path_a = source_a.url if isinstance(source_a, Source) else source_a
     path_b = source_b.url if isinstance(source_b, Source) else source_b
 
-    global_h = headers if headers is not None else (cfg.headers or None)
-    h_a = resolve_headers(source_a, global_h)
-    h_b = resolve_headers(source_b, global_h)
-    h = h_a or h_b or global_h
-
-    p = proxy if proxy is not None else cfg.proxy
+    chunk_size, same = resolve_pair(path_a, path_b, chunk_size, *local_stats((path_a, path_b)))
+    validate_chunk_size(chunk_size)
+    if same:
+        return True
 
-    return _compare_c(
-        path_a, path_b,
+    resolved = resolve_compare_args(
         chunk_size=chunk_size,
         size_precheck=size_precheck,
         quick_check=quick_check,
-        headers=h if h else None,
+        headers=headers,
         timeout=timeout,
         follow_redirects=follow_redirects,
         verify_ssl=verify_ssl,
-        allow_private=cfg.allow_private_redirects,
-        proxy=p,
+        proxy=proxy,
     )
+    global_h = resolved.headers
+    return _compare_resolved(path_a, path_b, _pair_args(
+        resolve_headers(source_a, global_h), resolve_headers(source_b, global_h), resolved))
+
+
+def _compare_resolved(path_a: str, path_b: str, resolved: CompareArgs,
+                      cancel: Any = None) -> bool:
+    """Compare two paths with fully resolved options.
+
+    Skips validation, config lookup and Source unpacking; per-Source
+    headers are merged beforehand by :func:`_pair_args`.
+
+    :param cancel: Flag from ``_core.cancel_flag_new()``; once set, the
+        comparison fails with IOError at its next chunk.
+    """
+    return _compare_c(path_a, path_b, *resolved, cancel=cancel)
+
+
+def _pair_args(
+    headers_a: dict[str, str] | None,
+    headers_b: dict[str, str] | None,
+    resolved: CompareArgs,
+) -> CompareArgs:
+    """Options of one pair from each side's ``resolve_headers`` result.
+
+    Per-Source headers win over the resolved global headers.
+    """
+    h = headers_a or headers_b
+    return resolved if h is resolved.headers else resolved._replace(headers=h or None)
+
+
+def _unpack_sources(
+    sources: list[str | Source],
+    global_headers: dict[str, str] | None,
+) -> tuple[list[str], list[dict[str, str] | None]]:
+    """Paths and merged headers of every source, computed once per batch."""
+    names = [s.url if isinstance(s, Source) else s for s in sources]
+    headers = [resolve_headers(s, global_headers) for s in sources]
+    return names, headers
 
 
 def compare_dir(
@@ -82,6 +147,7 @@ def compare_dir(
     follow_symlinks: bool = True,
     max_workers: int = 0,
     ignore: list[str] | None = None,
+    trust_mtime: bool = False,
 ) -> DirResult:
     """Compare two directories recursively.
 
@@ -93,6 +159,8 @@ def compare_dir(
     :param follow_symlinks: Follow symbolic links during traversal.
     :param max_workers: Thread pool size (0=auto, 1=sequential).
     :param ignore: Glob patterns to exclude (matched per path component).
+    :param trust_mtime: Treat files with equal size and modification time
+        as equal without reading them (rsync-style; off by default).
     :returns: DirResult with equal, diff, only_left, only_right.
     """
     validate_path(dir_a, "dir_a")
@@ -107,6 +175,7 @@ def compare_dir(
         quick_check=quick_check,
         follow_symlinks=follow_symlinks,
         max_workers=max_workers,
+        trust_mtime=trust_mtime,
     )
     result = build_dir_result(raw)
     if ignore:
@@ -124,6 +193,7 @@ def compare_archive(
     max_archive_entries: int = 100_000,
     max_entry_name_length: int = 4096,
     hash_compare: bool = False,
+    parallel_workers: int = 1,
 ) -> DirResult:
     """Compare two archive files entry-by-entry.
 
@@ -135,13 +205,18 @@ def compare_archive(
     :param max_archive_entries: Max number of archive entries (bomb limit).
     :param max_entry_name_length: Max entry path length (bomb limit).
     :param hash_compare: Use hash-based comparison (O(entries) memory instead
-        of O(total_decompressed)). Computes streaming FNV-1a 128-bit fingerprint
+        of O(total_decompressed)). Computes a streaming 128-bit BLAKE2b digest
         of each entry instead of storing full content.
+    :param parallel_workers: Fingerprint entries on a C thread pool
+        (0 = auto, 1 = off). Both archives are read concurrently;
+        uncompressed zip/tar are also split across readers by entry.
+        Implies hash-based comparison.
     :returns: DirResult with equal, diff, only_left, only_right.
     """
     validate_path(path_a, "path_a")
     validate_path(path_b, "path_b")
     validate_chunk_size(chunk_size)
+    validate_parallel_workers(parallel_workers)
 
     raw = _compare_archive_c(
         path_a, path_b,
@@ -151,6 +226,7 @@ def compare_archive(
         max_entries=max_archive_entries,
         max_entry_name_length=max_entry_name_length,
         hash_compare=hash_compare,
+        parallel_workers=parallel_workers,
     )
     return build_dir_result(raw)
 
@@ -184,33 +260,43 @@ def compare_all(
     if len(sources) < 2:
         return True
 
-    kwargs: dict = {
-        "chunk_size": chunk_size,
-        "size_precheck": size_precheck,
-        "quick_check": quick_check,
-        "headers": headers,
-        "timeout": timeout,
-        "follow_redirects": follow_redirects,
-        "verify_ssl": verify_ssl,
-        "proxy": proxy,
-    }
+    for i, s in enumerate(sources):
+        validate_path(s, f"sources[{i}]")
 
-    ref = sources[0]
-    others = sources[1:]
+    resolved = resolve_compare_args(
+        chunk_size=chunk_size,
+        size_precheck=size_precheck,
+        quick_check=quick_check,
+        headers=headers,
+        timeout=timeout,
+        follow_redirects=follow_redirects,
+        verify_ssl=verify_ssl,
+        proxy=proxy,
+    )
+
+    names, hdrs = _unpack_sources(sources, resolved.headers)
+    ref, ref_h = names[0], hdrs[0]
+    jobs = [(ref, names[k], _pair_args(ref_h, hdrs[k], resolved))
+            for k in range(1, len(sources))]
 
-    if max_workers == 1 or len(others) == 1:
-        return all(compare(ref, s, **kwargs) for s in others)
+    if max_workers == 1 or len(jobs) == 1:
+        return all(_compare_resolved(*job) for job in jobs)
 
     from concurrent.futures import ThreadPoolExecutor, as_completed
 
-    pool_size = max_workers if max_workers > 0 else min(len(others), 8)
+    pool_size = max_workers if max_workers > 0 else min(len(jobs), 8)
+    # Set once the answer is known: comparisons still running stop at
+    # their next chunk instead of holding the pool shutdown until they
+    # have read both files to the end.
+    cancel = cancel_flag_new()
     with ThreadPoolExecutor(max_workers=pool_size) as pool:
-        futures = [pool.submit(compare, ref, s, **kwargs) for s in others]
+        futures = [pool.submit(_compare_resolved, *job, cancel) for job in jobs]
         try:
             for f in as_completed(futures):
                 if not f.result():
                     return False
         finally:
+            cancel_flag_set(cancel)
             for f in futures:
                 f.cancel()
         return True
@@ -240,76 +326,98 @@ def compare_many(
     validate_timeout(timeout)
     validate_max_workers(max_workers)
 
-    kwargs: dict = {
-        "chunk_size": chunk_size,
-        "size_precheck": size_precheck,
-        "quick_check": quick_check,
-        "headers": headers,
-        "timeout": timeout,
-        "follow_redirects": follow_redirects,
-        "verify_ssl": verify_ssl,
-        "proxy": proxy,
-    }
-
     n = len(sources)
     if n < 2:
         names = [s.url if isinstance(s, Source) else s for s in sources]
         return CompareResult(all_equal=True, groups=[set(names)], diff={})
 
-    pairs: list[tuple[int, int]] = []
-    for i in range(n):
-        for j in range(i + 1, n):
-            pairs.append((i, j))
+    for i, s in enumerate(sources):
+        validate_path(s, f"sources[{i}]")
+
+    resolved = resolve_compare_args(
+        chunk_size=chunk_size,
+        size_precheck=size_precheck,
+        quick_check=quick_check,
+        headers=headers,
+        timeout=timeout,
+        follow_redirects=follow_redirects,
+        verify_ssl=verify_ssl,
+        proxy=proxy,
+    )
+
+    names, hdrs = _unpack_sources(sources, resolved.headers)
 
-    def _cmp_pair(pair: tuple[int, int]) -> tuple[int, int, bool]:
-        i, j = pair
-        return i, j, compare(sources[i], sources[j], **kwargs)
+    def _cmp_pair(i: int, j: int) -> bool:
+        return _compare_resolved(names[i], names[j], _pair_args(hdrs[i], hdrs[j], resolved))
 
-    if max_workers == 1 or len(pairs) == 1:
-        results = [_cmp_pair(p) for p in pairs]
-    else:
+    def _fingerprint(i: int) -> bytes:
+        r = resolved
+        return _fingerprint_c(names[i], r.chunk_size, hdrs[i] or None, r.timeout,
+                              r.follow_redirects, r.verify_ssl, r.allow_private, r.proxy)
+
+    def _sample(i: int) -> bytes:
+        r = resolved
+        return _fingerprint_c(names[i], r.chunk_size, None, r.timeout, r.follow_redirects,
+                              r.verify_ssl, r.allow_private, r.proxy, samples=True)
+
+    def _map(fn: Callable[..., Any], *items: Sequence[Any]) -> list[Any]:
+        count = len(items[0])
+        if max_workers == 1 or count <= 1:
+            return list(map(fn, *items))
         from concurrent.futures import ThreadPoolExecutor
 
-        pool_size = max_workers if max_workers > 0 else min(len(pairs), 8)
+        pool_size = max_workers if max_workers > 0 else min(count, 8)
         with ThreadPoolExecutor(max_workers=pool_size) as pool:
-            results = list(pool.map(_cmp_pair, pairs))
-
-    names = [s.url if isinstance(s, Source) else s for s in sources]
-    diff: dict[tuple[str, str], bool] = {}
-    for i, j, eq in results:
-        diff[(names[i], names[j])] = eq
-
-    all_equal = all(eq for _, _, eq in results)
-
-    parent = list(range(n))
-
-    def find(x: int) -> int:
-        while parent[x] != x:
-            parent[x] = parent[parent[x]]
-            x = parent[x]
-        return x
-
-    def union(x: int, y: int) -> None:
-        px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
-
-    for i, j, eq in results:
-        if eq:
-            union(i, j)
-
-    group_map: dict[int, set[str]] = {}
-    for i in range(n):
-        root = find(i)
-        if root not in group_map:
-            group_map[root] = set()
-        group_map[root].add(names[i])
-
-    return CompareResult(
-        all_equal=all_equal,
-        groups=list(group_map.values()),
-        diff=diff,
-    )
+            return list(pool.map(fn, *items))
+
+    # Every comparison made: pair indices and results, in parallel
+    pis = array("i")
+    pjs = array("i")
+    eqs: list[bool] = []
+
+    def _run(firsts: array, seconds: array) -> tuple[array, array, list[bool]]:
+        round_eqs = _map(_cmp_pair, firsts, seconds)
+        pis.extend(firsts)
+        pjs.extend(seconds)
+        eqs.extend(round_eqs)
+        return firsts, seconds, round_eqs
+
+    # Sources naming the same local file are equal without reading it;
+    # only one representative per file takes part in the comparisons.
+    reps, dups = split_duplicates(local_stats(names))
+
+    # Byte equality is transitive: comparing everything against sources[0]
+    # settles every pair touching its group, so only the sources that
+    # differ from it need comparing among themselves.
+    groups = split_mismatches(*_run(*pairs_against_first([reps])))
+    remaining = groups[0] if groups else []
+    if len(remaining) >= FINGERPRINT_CACHED_MIN_SOURCES:
+        # Comparing m leftovers pairwise reads each one m-1 times; one
+        # fingerprint each buckets them so only bucket members are
+        # compared. A size no other leftover has rules a local file out.
+        stats = local_stats(names, remaining)
+        candidates, _ = split_by_size(stats, remaining)
+        keys, digests, missing = lookup_fingerprints(stats, candidates)
+        if not missing or len(remaining) >= FINGERPRINT_MIN_SOURCES:
+            if (missing and len(missing) == len(candidates)
+                    and not any("://" in names[i] for i in candidates)):
+                # Nothing cached: quick check samples rule out most
+                # same-size files before any of them is read in full
+                candidates, keys, digests, missing = drop_unique_samples(
+                    candidates, keys, digests, _map(_sample, candidates), resolved.chunk_size)
+            computed = _map(_fingerprint, [candidates[k] for k in missing])
+            digests = record_fingerprints(keys, digests, missing, computed)
+            buckets = group_by_digest(candidates, digests)
+            # Equal digests over different bytes: compare those pairwise
+            groups = split_mismatches(*_run(*pairs_against_first(buckets)))
+    _run(*pairs_within(groups))
+    for i, first in dups:
+        pis.append(i)
+        pjs.append(first)
+        eqs.append(True)
+
+    # The pairs not compared directly follow from the grouping
+    return build_compare_result(names, group_roots(n, pis, pjs, eqs))
 
 
 def compare_dir_urls(
@@ -333,28 +441,23 @@ def compare_dir_urls(
 
     :param dir_path: Path to local directory.
     :param url_map: Mapping of relative_path -> URL.
+    :param max_workers: Concurrent URL comparisons (0=auto, 1=sequential).
     :param proxy: Proxy URL (e.g. http://host:port, socks5://host:port).
     :returns: DirResult with equal, diff, only_left, only_right.
     """
     validate_path(dir_path, "dir_path")
     validate_chunk_size(chunk_size)
     validate_timeout(timeout)
+    validate_max_workers(max_workers)
 
-    cfg = get_config()
-
-    h = headers if headers is not None else (cfg.headers or None)
-    p = proxy if proxy is not None else cfg.proxy
-
-    raw = _compare_dir_urls_c(
-        dir_path, url_map,
+    raw = _compare_dir_urls_c(dir_path, url_map, *resolve_compare_args(
         chunk_size=chunk_size,
         size_precheck=size_precheck,
         quick_check=quick_check,
-        headers=h if h else None,
+        headers=headers,
         timeout=timeout,
         follow_redirects=follow_redirects,
         verify_ssl=verify_ssl,
-        allow_private=cfg.allow_private_redirects,
-        proxy=p,
-    )
+        proxy=proxy,
+    ), max_workers=max_workers)
     return build_dir_result(raw)
@@ -15,6 +15,7 @@ class KomparuConfig:
 
     # I/O
     chunk_size: int = 65536
+    auto_chunk: bool = True  # compare(): size chunks from source while chunk_size is default
     max_workers: int = 0  # 0 = auto (min(cpu, 8))
     timeout: float = 30.0
     follow_redirects: bool = True
@@ -49,6 +50,9 @@ def configure(**kwargs) -> None:
     """Update global configuration.
 
     :param chunk_size: Chunk size in bytes (default 65536).
+    :param auto_chunk: Let ``compare()`` pick chunk_size from source type
+        and file size when the caller does not pass one and the global
+        chunk_size is left at its default.
     :param max_workers: Thread pool workers (0 = auto).
     :param timeout: HTTP timeout in seconds.
     :param follow_redirects: Follow HTTP redirects.
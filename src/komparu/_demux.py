@@ -0,0 +1,220 @@
+"""Completion demultiplexer for komparu.aio.
+
+One C completion channel per event loop: its fd is registered with
+``loop.add_reader()`` once, worker threads push finished task ids onto
+the channel, and a single wakeup resolves every future whose task is done.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from komparu._core import (
+    async_channel_new,
+    async_channel_fd,
+    async_task_id,
+    drain_completed,
+)
+
+
+class _Batch:
+    """State of one :meth:`Demux.map` call: one future for many tasks."""
+
+    __slots__ = ("future", "start", "get_result", "trailing", "stop", "todo", "results", "inflight")
+
+    def __init__(self, future: asyncio.Future[list[Any]], start: Callable[..., tuple[int, Any]],
+                 get_result: Callable[[Any], Any], trailing: tuple[Any, ...],
+                 stop: Callable[[Any], bool] | None,
+                 todo: Iterator[tuple[int, tuple[Any, ...]]], size: int | None) -> None:
+        self.future = future
+        self.start = start
+        self.get_result = get_result
+        self.trailing = trailing
+        self.stop = stop
+        self.todo = todo
+        # None when only the stopping value matters (Demux.until)
+        self.results: list[Any] | None = None if size is None else [None] * size
+        self.inflight: set[int] = set()
+
+
+class Demux:
+    """Route C task completions of one event loop to their futures."""
+
+    __slots__ = ("_channel", "_pending", "__weakref__")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._channel = async_channel_new()
+        # task id -> (future, task handle, result getter)
+        #          | (batch, task handle, result index)
+        self._pending: dict[int, tuple[Any, Any, Any]] = {}
+        # The loop keeps the demux alive through this callback; the demux
+        # holds no reference back, so both are collected together.
+        loop.add_reader(async_channel_fd(self._channel), self._drain)
+
+    def _drain(self) -> None:
+        pending = self._pending
+        for task_id in drain_completed(self._channel):
+            entry = pending.pop(task_id, None)
+            if entry is None:
+                continue  # awaiting coroutine was cancelled
+            future, task, get_result = entry
+            if future.__class__ is _Batch:
+                self._complete(future, task_id, task, get_result)
+                continue
+            if future.done():
+                continue
+            try:
+                future.set_result(get_result(task))
+            except Exception as e:
+                future.set_exception(e)
+
+    async def submit(self, start: Callable[..., tuple[int, Any]],
+                     get_result: Callable[[Any], Any], *args: Any, **kwargs: Any) -> Any:
+        """Start a C task via ``start`` and await ``get_result(task)``.
+
+        :param start: One of the ``_core.async_*_start`` functions.
+        :param get_result: Matching ``_core.async_*_result`` function.
+        :returns: Whatever ``get_result`` returns for the finished task.
+        """
+        _, task = start(*args, channel=self._channel, **kwargs)
+        task_id, future = self._register(task, get_result)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # _drain already removed the entry of a finished task; on
+            # cancellation this drops the last task reference, which
+            # orphans the C task; the worker frees it when done.
+            self._pending.pop(task_id, None)
+            raise
+
+    async def submit_args(self, start: Callable[..., tuple[int, Any]],
+                          get_result: Callable[[Any], Any], args: tuple[Any, ...]) -> Any:
+        """Like :meth:`submit`, but ``args`` fills every parameter of
+        ``start`` before ``channel``, so the call is purely positional.
+        """
+        _, task = start(*args, self._channel)
+        task_id, future = self._register(task, get_result)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self._pending.pop(task_id, None)
+            raise
+
+    async def map(self, start: Callable[..., tuple[int, Any]], get_result: Callable[[Any], Any],
+                  args: Iterable[tuple[Any, ...]], limit: int, *,
+                  count: int | None = None,
+                  trailing: tuple[Any, ...] = (),
+                  stop: Callable[[Any], bool] | None = None) -> list[Any]:
+        """Run one C task per argument tuple, at most ``limit`` at a time.
+
+        Completions are collected by the batch itself, so the whole call
+        awaits one future instead of a future and a coroutine per task;
+        each completion starts the next task from the drain callback.
+
+        :param start: One of the ``_core.async_*_start`` functions.
+        :param get_result: Matching ``_core.async_*_result`` function.
+        :param args: Positional arguments of ``start`` before ``channel``.
+        :param limit: Max tasks in flight.
+        :param count: Number of tuples in ``args``. Lets ``args`` be a lazy
+            iterator, so argument tuples are only built as tasks start.
+        :param trailing: Arguments of ``start`` after ``channel``.
+        :param stop: Called with each result; True ends the batch at once.
+            Tasks still running are orphaned, which makes them stop at
+            their next chunk.
+        :returns: ``get_result`` values in ``args`` order (None for the
+            tasks not run or not finished because of ``stop``).
+        """
+        if count is None:
+            args = list(args)
+            count = len(args)
+        if not count:
+            return []
+        return await self._run_batch(start, get_result, args, limit, count, trailing, stop)
+
+    async def until(self, start: Callable[..., tuple[int, Any]], get_result: Callable[[Any], Any],
+                    args: Iterable[tuple[Any, ...]], limit: int, *,
+                    trailing: tuple[Any, ...] = (),
+                    stop: Callable[[Any], bool]) -> Any:
+        """Like :meth:`map`, but keep no results: only the first value
+        for which ``stop`` is true matters.
+
+        Memory stays constant in the number of tasks, and ``args`` is
+        consumed lazily without a ``count``.
+
+        :returns: The value that stopped the batch, or None if every task
+            finished without one.
+        """
+        return await self._run_batch(start, get_result, args, limit, None, trailing, stop)
+
+    async def _run_batch(self, start: Callable[..., tuple[int, Any]],
+                         get_result: Callable[[Any], Any], args: Iterable[tuple[Any, ...]],
+                         limit: int, count: int | None, trailing: tuple[Any, ...],
+                         stop: Callable[[Any], bool] | None) -> Any:
+        batch = _Batch(asyncio.get_running_loop().create_future(), start, get_result,
+                       trailing, stop, iter(enumerate(args)), count)
+        try:
+            for _ in range(limit):
+                if not self._start_next(batch):
+                    break
+            if not batch.inflight:
+                return batch.results  # nothing to run (until() with no args)
+            return await batch.future
+        finally:
+            # Only non-empty after stop, an error or cancellation: orphan
+            # the remaining tasks like submit() does.
+            for task_id in batch.inflight:
+                self._pending.pop(task_id, None)
+
+    def _start_next(self, batch: _Batch) -> bool:
+        item = next(batch.todo, None)
+        if item is None:
+            return False
+        index, args = item
+        _, task = batch.start(*args, self._channel, *batch.trailing)
+        task_id = async_task_id(task)
+        self._pending[task_id] = (batch, task, index)
+        batch.inflight.add(task_id)
+        return True
+
+    def _complete(self, batch: _Batch, task_id: int, task: Any, index: int) -> None:
+        batch.inflight.discard(task_id)
+        future = batch.future
+        if future.done():
+            return
+        try:
+            value = batch.get_result(task)
+            results = batch.results
+            if results is not None:
+                results[index] = value
+            if batch.stop is not None and batch.stop(value):
+                future.set_result(value if results is None else results)
+                return
+            self._start_next(batch)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        if not batch.inflight:
+            future.set_result(batch.results)
+
+    def _register(self, task: Any, get_result: Callable[[Any], Any]) -> tuple[int, asyncio.Future[Any]]:
+        task_id = async_task_id(task)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[task_id] = (future, task, get_result)
+        return task_id, future
+
+
+_demuxes: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Demux] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_demux() -> Demux:
+    """Demux of the running event loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    demux = _demuxes.get(loop)
+    if demux is None:
+        demux = _demuxes[loop] = Demux(loop)
+    return demux
@@ -2,10 +2,24 @@
 
 from __future__ import annotations
 
-from fnmatch import fnmatch
-from pathlib import PurePosixPath
+import os
+import re
+import stat
+import sys
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from fnmatch import translate
+from collections.abc import Callable, Sequence
+from itertools import combinations, compress, starmap
+from operator import eq
+from typing import NamedTuple
 
-from komparu._types import DiffReason, DirResult, Source
+from komparu._config import KomparuConfig, get_config
+from komparu._types import (
+    _DIFF_BY_CODE, CompareResult, DiffReason, DirResult, PairDiff, PathDiff, PathSet, Source,
+)
 
 
 def resolve_headers(source: str | Source, global_headers: dict[str, str] | None) -> dict[str, str] | None:
@@ -19,28 +33,476 @@ def resolve_headers(source: str | Source, global_headers: dict[str, str] | None)
     return global_headers
 
 
-def _path_matches_ignore(path: str, patterns: list[str]) -> bool:
-    """Check if any component of *path* matches any ignore pattern."""
-    parts = PurePosixPath(path).parts
-    return any(fnmatch(part, pat) for part in parts for pat in patterns)
+class CompareArgs(NamedTuple):
+    """Resolved options of the ``_core`` compare and compare_dir_urls calls.
+
+    Fields follow the C keyword order after the two leading arguments
+    (``path_a, path_b`` or ``dir_path, url_map``) of ``compare``,
+    ``compare_dir_urls`` and their ``async_*_start`` variants, so every
+    caller passes ``(a, b, *args)`` positionally without a kwargs dict.
+    """
+
+    chunk_size: int
+    size_precheck: bool
+    quick_check: bool
+    headers: dict[str, str] | None
+    timeout: float
+    follow_redirects: bool
+    verify_ssl: bool
+    allow_private: bool
+    proxy: str | None
+
+
+def resolve_compare_args(
+    *,
+    chunk_size: int,
+    size_precheck: bool,
+    quick_check: bool,
+    headers: dict[str, str] | None,
+    timeout: float,
+    follow_redirects: bool,
+    verify_ssl: bool,
+    proxy: str | None,
+) -> CompareArgs:
+    """Merge per-call compare options with the global config, once.
+
+    The single place where ``None`` falls back to ``configure()`` values;
+    the result is shared by every pair of a batch call.
+    """
+    cfg = get_config()
+    return CompareArgs(
+        chunk_size,
+        size_precheck,
+        quick_check,
+        (headers if headers is not None else cfg.headers) or None,
+        timeout,
+        follow_redirects,
+        verify_ssl,
+        cfg.allow_private_redirects,
+        proxy if proxy is not None else cfg.proxy,
+    )
+
+
+class FileStat(NamedTuple):
+    """The ``stat()`` fields the helpers read, from ``_core.async_stat_result``.
+
+    Stands in for :class:`os.stat_result` when the stat ran in a C pool
+    thread, so the event loop makes no filesystem call.
+    """
+
+    st_mode: int
+    st_dev: int
+    st_ino: int
+    st_size: int
+    st_mtime_ns: int
+    st_ctime_ns: int
+
+
+AnyStat = os.stat_result | FileStat
+
+
+def local_stat(path: str) -> os.stat_result | None:
+    """``os.stat()`` of a local path; None for URLs and paths that cannot be stat'ed."""
+    if "://" in path:
+        return None
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def local_stats(
+    paths: Sequence[str], indices: Sequence[int] | None = None,
+) -> list[os.stat_result | None]:
+    """:func:`local_stat` of every path, for the helpers taking ``stats``.
+
+    With ``indices``, only those paths are stat'ed; the rest are None.
+    """
+    if indices is None:
+        return [local_stat(path) for path in paths]
+    stats: list[os.stat_result | None] = [None] * len(paths)
+    for i in indices:
+        stats[i] = local_stat(paths[i])
+    return stats
+
+
+def file_identity(st: AnyStat | None) -> tuple[int, int] | None:
+    """``(st_dev, st_ino)`` of a local regular file, or None.
+
+    None for URLs, non-regular files and paths that cannot be stat'ed;
+    those are left to the C comparison and its error reporting.
+    """
+    if st is None or not stat.S_ISREG(st.st_mode):
+        return None
+    return st.st_dev, st.st_ino
+
+
+def pair_needs_stat(path_a: str, path_b: str, chunk_size: int | None) -> bool:
+    """Whether :func:`resolve_pair` sizes chunks from the sources' stats.
+
+    The async API only stats a pair when this is True; the C comparison
+    short-circuits a pair naming one file by itself.
+    """
+    if chunk_size is not None or "://" in path_a or "://" in path_b:
+        return False
+    cfg = get_config()
+    return cfg.auto_chunk and cfg.chunk_size == KomparuConfig.chunk_size
+
+
+def resolve_pair(
+    path_a: str, path_b: str, chunk_size: int | None,
+    st_a: AnyStat | None, st_b: AnyStat | None,
+) -> tuple[int, bool]:
+    """Chunk size of one ``compare()`` call, and whether it can be skipped.
+
+    Both decisions share one stat per local path, taken by the caller
+    (None for URLs and unknown stats). ``None`` chunk_size falls back to
+    the config. With ``auto_chunk`` on and the configured
+    chunk_size left at its default it is sized to the sources instead:
+    URLs get 64 KiB (one Range request per chunk), local files 256 KiB
+    when the larger side is >= 4 MiB, 16 KiB when it is under 256 KiB,
+    and the configured size otherwise or when either side cannot be
+    stat'ed. A chunk_size set with ``configure()`` always wins.
+
+    :returns: ``(chunk_size, same)``, where ``same`` is True when both
+        paths name one local regular file (repeated path, symlink or hard
+        link), which is equal without reading it.
+    """
+    same = (st_a is not None and st_b is not None
+            and stat.S_ISREG(st_a.st_mode) and stat.S_ISREG(st_b.st_mode)
+            and st_a.st_ino == st_b.st_ino and st_a.st_dev == st_b.st_dev)
+    if chunk_size is None:
+        cfg = get_config()
+        if not cfg.auto_chunk or cfg.chunk_size != KomparuConfig.chunk_size:
+            chunk_size = cfg.chunk_size
+        elif "://" in path_a or "://" in path_b:
+            chunk_size = _AUTO_CHUNK_HTTP
+        elif st_a is None or st_b is None:
+            chunk_size = cfg.chunk_size
+        else:
+            chunk_size = _chunk_for_size(max(st_a.st_size, st_b.st_size), cfg.chunk_size)
+    return chunk_size, same
+
+
+def split_duplicates(stats: Sequence[AnyStat | None]) -> tuple[list[int], list[tuple[int, int]]]:
+    """Separate sources that name an already seen local regular file.
+
+    :param stats: Each source's stat, None for URLs and unknown stats.
+    :returns: ``(representatives, duplicates)``: indices that need
+        comparing (index 0 is always first), and ``(index, representative)``
+        pairs that are equal by file identity.
+    """
+    seen: dict[tuple[int, int], int] = {}
+    reps: list[int] = []
+    dups: list[tuple[int, int]] = []
+    for i, st in enumerate(stats):
+        ident = file_identity(st)
+        if ident is not None:
+            first = seen.setdefault(ident, i)
+            if first != i:
+                dups.append((i, first))
+                continue
+        reps.append(i)
+    return reps, dups
+
+
+# compare_many fingerprints the sources left after the first round once
+# there are this many, instead of comparing all of them pairwise.
+FINGERPRINT_MIN_SOURCES = 8
+
+
+def split_by_size(
+    stats: Sequence[AnyStat | None], indices: list[int],
+) -> tuple[list[int], list[int]]:
+    """Split sources into ones that may equal another and ones that cannot.
+
+    :param stats: Each source's stat, None for URLs and unknown stats.
+    :returns: ``(candidates, unique)``: URLs, unreadable paths and local
+        files sharing their size with another one; and local files whose
+        size no other source in ``indices`` has.
+    """
+    sizes: dict[int, list[int]] = {}
+    candidates: list[int] = []
+    for i in indices:
+        st = stats[i]
+        if st is None:
+            candidates.append(i)
+            continue
+        sizes.setdefault(st.st_size, []).append(i)
+    unique: list[int] = []
+    for members in sizes.values():
+        (candidates if len(members) > 1 else unique).extend(members)
+    return candidates, unique
+
+
+# With every leftover's fingerprint already cached, bucketing costs no
+# reads, so it pays off from this many leftovers.
+FINGERPRINT_CACHED_MIN_SOURCES = 3
+
+# Fingerprints of local files, keyed by (st_dev, st_ino, st_size,
+# st_mtime_ns, st_ctime_ns): any write changes the key, so repeated
+# compare_many calls skip re-reading unchanged files. LRU, shared by
+# threads and event loops.
+_FINGERPRINT_CACHE_SIZE = 4096
+# A file written within this window could change again inside the same
+# timestamp tick without changing its key (git's "racy clean" problem),
+# so it is not cached.
+_FINGERPRINT_MIN_AGE_NS = 2_000_000_000
+
+_fingerprint_cache: OrderedDict[tuple[int, ...], bytes] = OrderedDict()
+_fingerprint_lock = threading.Lock()
+
+
+def lookup_fingerprints(
+    stats: Sequence[AnyStat | None], indices: list[int],
+) -> tuple[list[tuple[int, ...] | None], list[bytes | None], list[int]]:
+    """Cached fingerprints of the sources in ``indices``.
+
+    :param stats: Each source's stat, None for URLs and unknown stats.
+    :returns: ``(keys, digests, missing)``: each source's cache key (None
+        for URLs, unreadable or recently written files), its cached digest
+        or None, and the positions in ``indices`` still to fingerprint.
+    """
+    now = time.time_ns()
+    keys: list[tuple[int, ...] | None] = []
+    for i in indices:
+        st = stats[i]
+        key = None
+        if (st is not None and stat.S_ISREG(st.st_mode)
+                and now - max(st.st_mtime_ns, st.st_ctime_ns) >= _FINGERPRINT_MIN_AGE_NS):
+            key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+        keys.append(key)
+
+    digests: list[bytes | None] = []
+    with _fingerprint_lock:
+        cache = _fingerprint_cache
+        for key in keys:
+            digest = cache.get(key) if key is not None else None
+            if digest is not None:
+                cache.move_to_end(key)
+            digests.append(digest)
+    missing = [k for k, digest in enumerate(digests) if digest is None]
+    return keys, digests, missing
+
+
+def record_fingerprints(
+    keys: list[tuple[int, ...] | None], digests: list[bytes | None],
+    missing: list[int], computed: list[bytes],
+) -> list[bytes]:
+    """Fill the ``missing`` digests with ``computed`` ones and cache them.
+
+    :returns: ``digests``, now complete.
+    """
+    with _fingerprint_lock:
+        cache = _fingerprint_cache
+        for k, digest in zip(missing, computed):
+            digests[k] = digest
+            key = keys[k]
+            if key is not None:
+                cache[key] = digest
+        while len(cache) > _FINGERPRINT_CACHE_SIZE:
+            cache.popitem(last=False)
+    return digests  # type: ignore[return-value]
+
+
+def drop_unique_samples(
+    indices: list[int], keys: list[tuple[int, ...] | None], digests: list[bytes | None],
+    samples: list[bytes], chunk_size: int,
+) -> tuple[list[int], list[tuple[int, ...] | None], list[bytes | None], list[int]]:
+    """Drop the sources whose sample fingerprint no other source shares.
+
+    Takes the results of :func:`lookup_fingerprints` and each source's
+    ``fingerprint(samples=True)`` digest. A source within one chunk was
+    read in full for its sample digest, which is then recorded as its
+    fingerprint.
+
+    :returns: ``(indices, keys, digests, missing)`` of the sources kept.
+    """
+    counts = Counter(samples)
+    kept = [k for k, sample in enumerate(samples) if counts[sample] > 1]
+    kept_keys = [keys[k] for k in kept]
+    kept_digests = [digests[k] for k in kept]
+    whole: list[int] = []
+    missing: list[int] = []
+    for pos, k in enumerate(kept):
+        if kept_digests[pos] is None:
+            if int.from_bytes(samples[k][16:], sys.byteorder) <= chunk_size:
+                whole.append(pos)
+            else:
+                missing.append(pos)
+    record_fingerprints(kept_keys, kept_digests, whole, [samples[kept[pos]] for pos in whole])
+    return [indices[k] for k in kept], kept_keys, kept_digests, missing
+
+
+def group_by_digest(indices: list[int], digests: list[bytes]) -> list[list[int]]:
+    """Bucket source indices by fingerprint, in first-seen order."""
+    buckets: dict[bytes, list[int]] = {}
+    for i, digest in zip(indices, digests):
+        buckets.setdefault(digest, []).append(i)
+    return list(buckets.values())
+
+
+# Pairs to compare are kept as two parallel int arrays (first and second
+# source index) and their results as a parallel list of bools, rather
+# than one (i, j, equal) tuple per pair.
+
+
+def pairs_against_first(groups: list[list[int]]) -> tuple[array, array]:
+    """Every member of each group paired with the group's first member."""
+    firsts = array("i")
+    seconds = array("i")
+    for group in groups:
+        firsts.extend([group[0]] * (len(group) - 1))
+        seconds.extend(group[1:])
+    return firsts, seconds
+
+
+def pairs_within(groups: list[list[int]]) -> tuple[array, array]:
+    """All ``(i, j)`` pairs inside each group."""
+    firsts = array("i")
+    seconds = array("i")
+    for group in groups:
+        for a, i in enumerate(group):
+            rest = group[a + 1:]
+            firsts.extend([i] * len(rest))
+            seconds.extend(rest)
+    return firsts, seconds
+
+
+def split_mismatches(firsts: Sequence[int], seconds: Sequence[int],
+                     eqs: Sequence[bool]) -> list[list[int]]:
+    """Per group, the sources that differ from its first member.
+
+    Takes the pairs of :func:`pairs_against_first` and their results.
+    """
+    by_first: dict[int, list[int]] = {}
+    for i, j, eq in zip(firsts, seconds, eqs):
+        if not eq:
+            by_first.setdefault(i, []).append(j)
+    return list(by_first.values())
+
+
+def group_roots(n: int, firsts: Sequence[int], seconds: Sequence[int],
+                eqs: Sequence[bool]) -> list[int]:
+    """Union-find root of each of ``n`` sources from pair results.
+
+    Path halving plus linking by size keep every tree shallow, so a
+    long run of merges cannot degrade into a linear chain.
+    """
+    parent = array("i", range(n))
+    size = array("i", [1]) * n
+
+    def find(x: int) -> int:
+        p = parent
+        while p[x] != x:
+            p[x] = p[p[x]]
+            x = p[x]
+        return x
+
+    for i, j in compress(zip(firsts, seconds), eqs):
+        pi, pj = find(i), find(j)
+        if pi != pj:
+            if size[pi] < size[pj]:
+                pi, pj = pj, pi
+            parent[pj] = pi
+            size[pi] += size[pj]
+
+    return [find(i) for i in range(n)]
+
+
+_PAIR_DIFF_MIN_SOURCES = 32
+
+
+def build_compare_result(names: list[str], roots: Sequence[int]) -> CompareResult:
+    """Build a CompareResult from each source's union-find root.
+
+    Every pair follows from the grouping. Up to 31 sources (or with
+    repeated names) ``diff`` is a plain dict; beyond that it is a
+    :class:`PairDiff` view over ``roots`` instead of n(n-1)/2 tuple keys.
+    """
+    # Lists while scanning (no throwaway set per source), sets at the end
+    group_map: dict[int, list[str]] = {}
+    for name, root in zip(names, roots):
+        members = group_map.get(root)
+        if members is None:
+            group_map[root] = [name]
+        else:
+            members.append(name)
+
+    n = len(names)
+    diff: dict[tuple[str, str], bool] | PairDiff
+    if n >= _PAIR_DIFF_MIN_SOURCES and len(set(names)) == n:
+        diff = PairDiff(names, roots)
+    else:
+        # Same (i, j) order as nested loops, driven entirely from C
+        diff = dict(zip(combinations(names, 2), starmap(eq, combinations(roots, 2))))
+
+    return CompareResult(all_equal=len(group_map) == 1,
+                         groups=[set(members) for members in group_map.values()], diff=diff)
+
+
+_AUTO_CHUNK_LARGE_FILE = 4 * 1024 * 1024   # >= 4 MiB -> large reads
+_AUTO_CHUNK_SMALL_FILE = 256 * 1024        # < 256 KiB -> small buffers
+_AUTO_CHUNK_LARGE = 262144
+_AUTO_CHUNK_SMALL = 16384
+_AUTO_CHUNK_HTTP = 65536
+
+
+def _chunk_for_size(size: int, default: int) -> int:
+    if size >= _AUTO_CHUNK_LARGE_FILE:
+        return _AUTO_CHUNK_LARGE
+    if size < _AUTO_CHUNK_SMALL_FILE:
+        return _AUTO_CHUNK_SMALL
+    return default
+
+
+def _ignore_matcher(patterns: list[str]) -> Callable[[str], bool]:
+    """Predicate: does any component of a path match any ignore pattern.
+
+    The patterns are translated once into one regex; paths are always
+    ``/``-separated relative paths here, so they are split on ``/``.
+    """
+    match = re.compile("|".join(f"(?:{translate(pat)})" for pat in patterns)).match
+
+    def ignored(path: str) -> bool:
+        return any(match(part) for part in path.split("/") if part and part != ".")
+
+    return ignored
+
+
+def _filter_paths(
+    paths: set[str] | PathSet, ignored: Callable[[str], bool],
+) -> set[str] | PathSet:
+    """Drop ignored paths, keeping a :class:`PathSet` a PathSet."""
+    if isinstance(paths, PathSet):
+        return PathSet(tuple(p for p in paths._paths if not ignored(p)))
+    return {p for p in paths if not ignored(p)}
+
+
+def _filter_diff(
+    diff: dict[str, DiffReason] | PathDiff, ignored: Callable[[str], bool],
+) -> dict[str, DiffReason] | PathDiff:
+    """Drop ignored paths, keeping a :class:`PathDiff` a PathDiff."""
+    if isinstance(diff, PathDiff):
+        kept = [k for k, p in enumerate(diff._paths) if not ignored(p)]
+        return PathDiff(tuple(diff._paths[k] for k in kept), bytes(diff._codes[k] for k in kept))
+    return {k: v for k, v in diff.items() if not ignored(k)}
 
 
 def filter_dir_result(result: DirResult, ignore: list[str]) -> DirResult:
     """Remove entries whose path matches any ignore glob pattern.
 
     Each component of the relative path is tested against every pattern
-    using :func:`fnmatch.fnmatch`.  If any component matches, the entry
-    is excluded.  The ``equal`` flag is recomputed after filtering.
+    with :func:`fnmatch.fnmatch` rules.  If any component matches, the
+    entry is excluded.  The ``equal`` flag is recomputed after filtering.
     """
     if not ignore:
         return result
 
-    diff = {k: v for k, v in result.diff.items()
-            if not _path_matches_ignore(k, ignore)}
-    only_left = {p for p in result.only_left
-                 if not _path_matches_ignore(p, ignore)}
-    only_right = {p for p in result.only_right
-                  if not _path_matches_ignore(p, ignore)}
+    ignored = _ignore_matcher(ignore)
+    diff = _filter_diff(result.diff, ignored)
+    only_left = _filter_paths(result.only_left, ignored)
+    only_right = _filter_paths(result.only_right, ignored)
 
     # If the original result was equal and nothing was filtered away,
     # keep it.  Otherwise recompute: equal iff no remaining diffs.
@@ -48,8 +510,7 @@ def filter_dir_result(result: DirResult, ignore: list[str]) -> DirResult:
         not diff and not only_left and not only_right
     )
 
-    errors = {p for p in result.errors
-              if not _path_matches_ignore(p, ignore)}
+    errors = {p for p in result.errors if not ignored(p)}
 
     return DirResult(equal=equal, diff=diff,
                      only_left=only_left, only_right=only_right,
@@ -58,11 +519,17 @@ def filter_dir_result(result: DirResult, ignore: list[str]) -> DirResult:
 
 def build_dir_result(raw: dict) -> DirResult:
     """Convert C extension dict to DirResult."""
-    diff = {k: DiffReason(v) for k, v in raw["diff"].items()}
+    diff: dict[str, DiffReason] | PathDiff
+    if isinstance(raw["diff"], tuple):
+        diff = PathDiff(*raw["diff"])
+    else:
+        by_code = _DIFF_BY_CODE
+        diff = {k: by_code[v] for k, v in raw["diff"].items()}
+    only_left, only_right = raw["only_left"], raw["only_right"]
     return DirResult(
         equal=raw["equal"],
         diff=diff,
-        only_left=raw["only_left"],
-        only_right=raw["only_right"],
+        only_left=PathSet(only_left) if isinstance(only_left, tuple) else only_left,
+        only_right=PathSet(only_right) if isinstance(only_right, tuple) else only_right,
         errors=raw.get("errors", set()),
     )
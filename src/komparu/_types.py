@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Mapping, Sequence, Set
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -39,37 +42,173 @@ class Source:
         if not self.url:
             raise ValueError("Source.url cannot be empty")
 
+    def __hash__(self) -> int:
+        # headers is a dict (unhashable) and is left out; equal Sources
+        # still hash equal since eq compares a superset of these fields.
+        return hash((
+            self.url, self.timeout, self.follow_redirects,
+            self.verify_ssl, self.proxy,
+        ))
+
+
+class PathDiff(Mapping[str, DiffReason]):
+    """Read-only ``DirResult.diff`` for more than 10,000 differences.
+
+    Same keys and values as the dict it stands in for, held as a sorted
+    tuple of paths and one reason code byte per path. Lookups bisect the
+    paths, so there is no hash table and no value object per entry.
+    """
+
+    __slots__ = ("_paths", "_codes")
+
+    def __init__(self, paths: tuple[str, ...], codes: bytes) -> None:
+        self._paths = paths
+        self._codes = codes
+
+    def __getitem__(self, key: str) -> DiffReason:
+        paths = self._paths
+        try:
+            i = bisect_left(paths, key)
+        except TypeError:
+            raise KeyError(key) from None
+        if i == len(paths) or paths[i] != key:
+            raise KeyError(key)
+        return _DIFF_BY_CODE[self._codes[i]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __repr__(self) -> str:
+        return f"PathDiff({len(self._paths)} paths)"
+
+
+class PathSet(Set[str]):
+    """Read-only ``only_left``/``only_right`` for more than 10,000 paths.
+
+    Compares equal to the set it stands in for and supports ``in`` and
+    the set operators, held as a sorted tuple of paths. Membership
+    bisects the paths, so there is no hash table. Operators return a
+    plain ``set``.
+    """
+
+    __slots__ = ("_paths",)
+
+    def __init__(self, paths: tuple[str, ...]) -> None:
+        self._paths = paths
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable[str]) -> set[str]:
+        return set(it)
+
+    def __contains__(self, key: object) -> bool:
+        paths = self._paths
+        try:
+            i = bisect_left(paths, key)  # type: ignore[arg-type]
+        except TypeError:
+            return False
+        return i != len(paths) and paths[i] == key
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __repr__(self) -> str:
+        return f"PathSet({len(self._paths)} paths)"
+
+
+# Indexed by the KOMPARU_DIFF_* codes in compare.h
+_DIFF_BY_CODE: tuple[DiffReason, ...] = (
+    DiffReason.CONTENT_MISMATCH,
+    DiffReason.SIZE_MISMATCH,
+    DiffReason.MISSING,
+    DiffReason.TYPE_MISMATCH,
+    DiffReason.READ_ERROR,
+)
+
 
 @dataclass(frozen=True, slots=True)
 class DirResult:
     """Result of directory or archive comparison.
 
     :param equal: True if all files are identical.
-    :param diff: Files with different content, keyed by relative path.
-    :param only_left: Files only in the first source.
-    :param only_right: Files only in the second source.
+    :param diff: Files with different content, keyed by relative path. A
+        read-only :class:`PathDiff` mapping instead of a dict when there
+        are more than 10,000 of them.
+    :param only_left: Files only in the first source. A read-only
+        :class:`PathSet` instead of a set when there are more than 10,000
+        of them.
+    :param only_right: Files only in the second source. A read-only
+        :class:`PathSet` instead of a set when there are more than 10,000
+        of them.
     :param errors: Paths skipped due to permission denied (EACCES/EPERM).
     """
 
     equal: bool
-    diff: dict[str, DiffReason]
-    only_left: set[str]
-    only_right: set[str]
+    diff: dict[str, DiffReason] | PathDiff
+    only_left: set[str] | PathSet
+    only_right: set[str] | PathSet
     errors: set[str] = field(default_factory=set)
 
 
+class PairDiff(Mapping[tuple[str, str], bool]):
+    """Read-only pairwise results derived from ``compare_many`` groups.
+
+    Same keys as the dict it stands in for, ``(sources[i], sources[j])``
+    for i < j, but each lookup compares the group ids of the two sources,
+    so memory is O(n) instead of n(n-1)/2 tuple keys.
+    """
+
+    __slots__ = ("_names", "_index", "_roots")
+
+    def __init__(self, names: list[str], roots: Sequence[int]) -> None:
+        self._names = names
+        self._index = {name: i for i, name in enumerate(names)}
+        self._roots = array("i", roots)
+
+    def __getitem__(self, key: tuple[str, str]) -> bool:
+        try:
+            a, b = key
+            i = self._index[a]
+            j = self._index[b]
+        except (TypeError, ValueError, KeyError):
+            raise KeyError(key) from None
+        if i >= j:
+            raise KeyError(key)
+        return self._roots[i] == self._roots[j]
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        names = self._names
+        for i, a in enumerate(names):
+            for j in range(i + 1, len(names)):
+                yield a, names[j]
+
+    def __len__(self) -> int:
+        n = len(self._names)
+        return n * (n - 1) // 2
+
+    def __repr__(self) -> str:
+        return f"PairDiff({len(self._names)} sources, {len(self)} pairs)"
+
+
 @dataclass(frozen=True, slots=True)
 class CompareResult:
     """Result of multi-source comparison.
 
     :param all_equal: True if all sources are identical.
     :param groups: Groups of identical sources.
-    :param diff: Pairwise comparison results.
+    :param diff: Pairwise comparison results. A read-only
+        :class:`PairDiff` mapping instead of a dict for 32 or more
+        distinct sources.
     """
 
     all_equal: bool
     groups: list[set[str]]
-    diff: dict[tuple[str, str], bool]
+    diff: dict[tuple[str, str], bool] | PairDiff
 
 
 # ---- Errors ----
@@ -28,3 +28,15 @@ def validate_max_workers(max_workers: int) -> None:
         raise ValueError("max_workers must be non-negative")
     if max_workers > 256:
         raise ValueError("max_workers must be <= 256")
+
+
+def validate_parallel_workers(parallel_workers: int) -> None:
+    if parallel_workers < 0:
+        raise ValueError("parallel_workers must be non-negative")
+    if parallel_workers > 256:
+        raise ValueError("parallel_workers must be <= 256")
+
+
+def validate_concurrency(concurrency: int | None) -> None:
+    if concurrency is not None and concurrency < 1:
+        raise ValueError("concurrency must be positive")
@@ -1,8 +1,9 @@
 """komparu.aio — native async API.
 
 All I/O runs in C threads (pool + libcurl/mmap). No Python HTTP
-libraries. Completion notification via eventfd/pipe integrated
-with asyncio.loop.add_reader(). Event loop never blocks.
+libraries. Completions are delivered through one eventfd/pipe per
+event loop, registered once with asyncio.loop.add_reader(). Event
+loop never blocks.
 
 Usage::
 
@@ -16,10 +17,13 @@ Usage::
 
 from __future__ import annotations
 
-import asyncio
-from typing import Any
+import itertools
+import operator
+import os
+from array import array
 
 from komparu._config import get_config
+from komparu._demux import get_demux
 from komparu._core import (
     async_compare_start,
     async_compare_result,
@@ -29,37 +33,90 @@ from komparu._core import (
     async_compare_archive_result,
     async_compare_dir_urls_start,
     async_compare_dir_urls_result,
+    async_fingerprint_start,
+    async_fingerprint_result,
+    async_open_shared_start,
+    async_open_shared_result,
+    async_stat_start,
+    async_stat_result,
 )
 from komparu._types import CompareResult, DirResult, Source
-from komparu._validate import validate_path, validate_chunk_size, validate_timeout, validate_max_workers
-from komparu._helpers import build_dir_result, filter_dir_result
+from komparu._validate import (
+    validate_path,
+    validate_chunk_size,
+    validate_timeout,
+    validate_max_workers,
+    validate_parallel_workers,
+    validate_concurrency,
+)
+from komparu._helpers import (
+    CompareArgs,
+    FileStat,
+    resolve_compare_args,
+    pair_needs_stat,
+    resolve_pair,
+    split_duplicates,
+    FINGERPRINT_CACHED_MIN_SOURCES,
+    FINGERPRINT_MIN_SOURCES,
+    build_compare_result,
+    group_roots,
+    group_by_digest,
+    lookup_fingerprints,
+    drop_unique_samples,
+    record_fingerprints,
+    pairs_against_first,
+    pairs_within,
+    split_by_size,
+    split_mismatches,
+    build_dir_result,
+    filter_dir_result,
+)
 
 
 def _source_path(source: str | Source) -> str:
     return source.url if isinstance(source, Source) else source
 
 
-async def _await_task(fd: int, get_result):
-    """Register notification fd with asyncio and await completion."""
-    loop = asyncio.get_running_loop()
-    future = loop.create_future()
-
-    def _on_ready():
-        loop.remove_reader(fd)
-        if future.done():
-            return
-        try:
-            result = get_result()
-            future.set_result(result)
-        except Exception as e:
-            future.set_exception(e)
+async def _open_shared(path: str) -> object | None:
+    """Map a local reference file once for a batch (None = fall back).
 
-    loop.add_reader(fd, _on_ready)
+    The open and mmap run in a C pool thread, like the comparisons.
+    """
+    if path.startswith(("http://", "https://")):
+        return None
     try:
-        return await future
-    finally:
-        # Ensure reader is removed even if the coroutine is cancelled
-        loop.remove_reader(fd)
+        return await get_demux().submit(
+            async_open_shared_start, async_open_shared_result, path)
+    except OSError:
+        return None  # empty, special or unreadable: per-pair opens report it
+
+
+async def _stat_sources(
+    paths: list[str], indices: list[int] | None = None,
+) -> list[FileStat | None]:
+    """Stat of every path, taken in a C pool thread, not on the loop.
+
+    None for URLs and paths that cannot be stat'ed, like ``local_stats``;
+    with ``indices``, only those paths are stat'ed and the rest are None.
+    """
+    if indices is None:
+        indices = list(range(len(paths)))
+    stats: list[FileStat | None] = [None] * len(paths)
+    if all("://" in paths[i] for i in indices):
+        return stats
+    raw = await get_demux().submit(
+        async_stat_start, async_stat_result, [paths[i] for i in indices])
+    for i, st in zip(indices, raw):
+        if st is not None:
+            stats[i] = FileStat._make(st)
+    return stats
+
+
+def _concurrency_limit(concurrency: int | None) -> int:
+    """In-flight comparison cap for batch calls (None = config/CPU based)."""
+    if concurrency is not None:
+        return concurrency
+    return get_config().max_workers or (os.cpu_count() or 4) * 2
 
 
 # =========================================================================
@@ -71,7 +128,7 @@ async def compare(
     source_a: str | Source,
     source_b: str | Source,
     *,
-    chunk_size: int = 65536,
+    chunk_size: int | None = None,
     size_precheck: bool = True,
     quick_check: bool = True,
     headers: dict[str, str] | None = None,
@@ -86,36 +143,43 @@ async def compare(
 
     :param source_a: File path, URL, or Source object.
     :param source_b: File path, URL, or Source object.
+    :param chunk_size: Chunk size in bytes (None = config value, sized
+        to the sources when ``auto_chunk`` is on and it is the default).
     :param proxy: Proxy URL (e.g. http://host:port, socks5://host:port).
     :returns: True if sources are byte-identical.
     """
     validate_path(source_a, "source_a")
     validate_path(source_b, "source_b")
-    validate_chunk_size(chunk_size)
     validate_timeout(timeout)
 
-    cfg = get_config()
-
     path_a = _source_path(source_a)
     path_b = _source_path(source_b)
 
-    h = headers if headers is not None else (cfg.headers or None)
-    p = proxy if proxy is not None else cfg.proxy
+    # Only sizing chunks needs the stats, and they are taken in a pool
+    # thread; the C task short-circuits a pair naming one file itself.
+    stats = ([None, None] if not pair_needs_stat(path_a, path_b, chunk_size)
+             else await _stat_sources([path_a, path_b]))
+    chunk_size, same = resolve_pair(path_a, path_b, chunk_size, *stats)
+    validate_chunk_size(chunk_size)
+    if same:
+        return True
 
-    fd, task = async_compare_start(
-        path_a, path_b,
+    return await _compare_resolved(path_a, path_b, resolve_compare_args(
         chunk_size=chunk_size,
         size_precheck=size_precheck,
         quick_check=quick_check,
-        headers=h if h else None,
+        headers=headers,
         timeout=timeout,
         follow_redirects=follow_redirects,
         verify_ssl=verify_ssl,
-        allow_private=cfg.allow_private_redirects,
-        proxy=p,
-    )
+        proxy=proxy,
+    ))
 
-    return await _await_task(fd, lambda: async_compare_result(task))
+
+async def _compare_resolved(path_a: str, path_b: str, resolved: CompareArgs) -> bool:
+    """Compare with options already merged by ``resolve_compare_args``."""
+    return await get_demux().submit_args(
+        async_compare_start, async_compare_result, (path_a, path_b, *resolved))
 
 
 async def compare_dir(
@@ -128,6 +192,7 @@ async def compare_dir(
     follow_symlinks: bool = True,
     max_workers: int = 0,
     ignore: list[str] | None = None,
+    trust_mtime: bool = False,
 ) -> DirResult:
     """Compare two directories recursively (async).
 
@@ -136,6 +201,8 @@ async def compare_dir(
     :param dir_a: Path to first directory.
     :param dir_b: Path to second directory.
     :param ignore: Glob patterns to exclude (matched per path component).
+    :param trust_mtime: Treat files with equal size and modification time
+        as equal without reading them.
     :returns: DirResult with equal, diff, only_left, only_right.
     """
     validate_path(dir_a, "dir_a")
@@ -143,16 +210,16 @@ async def compare_dir(
     validate_chunk_size(chunk_size)
     validate_max_workers(max_workers)
 
-    fd, task = async_compare_dir_start(
+    raw = await get_demux().submit(
+        async_compare_dir_start, async_compare_dir_result,
         dir_a, dir_b,
         chunk_size=chunk_size,
         size_precheck=size_precheck,
         quick_check=quick_check,
         follow_symlinks=follow_symlinks,
         max_workers=max_workers,
+        trust_mtime=trust_mtime,
     )
-
-    raw = await _await_task(fd, lambda: async_compare_dir_result(task))
     result = build_dir_result(raw)
     if ignore:
         result = filter_dir_result(result, ignore)
@@ -169,6 +236,7 @@ async def compare_archive(
     max_archive_entries: int = 100_000,
     max_entry_name_length: int = 4096,
     hash_compare: bool = False,
+    parallel_workers: int = 1,
 ) -> DirResult:
     """Compare two archive files entry-by-entry (async).
 
@@ -177,12 +245,16 @@ async def compare_archive(
 
     :param hash_compare: Use hash-based comparison (O(entries) memory
         instead of O(total_decompressed)).
+    :param parallel_workers: Fingerprint entries on a C thread pool
+        (0 = auto, 1 = off). Implies hash-based comparison.
     """
     validate_path(path_a, "path_a")
     validate_path(path_b, "path_b")
     validate_chunk_size(chunk_size)
+    validate_parallel_workers(parallel_workers)
 
-    fd, task = async_compare_archive_start(
+    raw = await get_demux().submit(
+        async_compare_archive_start, async_compare_archive_result,
         path_a, path_b,
         chunk_size=chunk_size,
         max_decompressed_size=max_decompressed_size,
@@ -190,9 +262,8 @@ async def compare_archive(
         max_entries=max_archive_entries,
         max_entry_name_length=max_entry_name_length,
         hash_compare=hash_compare,
+        parallel_workers=parallel_workers,
     )
-
-    raw = await _await_task(fd, lambda: async_compare_archive_result(task))
     return build_dir_result(raw)
 
 
@@ -207,32 +278,52 @@ async def compare_all(
     follow_redirects: bool = True,
     verify_ssl: bool = True,
     proxy: str | None = None,
+    concurrency: int | None = None,
 ) -> bool:
     """Check if all sources are identical (async).
 
-    Compares source[0] against all others concurrently.
+    Compares source[0] against all others concurrently and returns on
+    the first mismatch, cancelling the comparisons still running. A
+    local source[0] is memory-mapped once and shared by every comparison.
+
+    :param concurrency: Max comparisons in flight (None = config
+        ``max_workers``, or 2 x CPU count when that is 0).
     """
     validate_chunk_size(chunk_size)
     validate_timeout(timeout)
+    validate_concurrency(concurrency)
 
     if len(sources) < 2:
         return True
 
-    kwargs: dict[str, Any] = {
-        "chunk_size": chunk_size,
-        "size_precheck": size_precheck,
-        "quick_check": quick_check,
-        "headers": headers,
-        "timeout": timeout,
-        "follow_redirects": follow_redirects,
-        "verify_ssl": verify_ssl,
-        "proxy": proxy,
-    }
+    for i, s in enumerate(sources):
+        validate_path(s, f"sources[{i}]")
 
-    ref = sources[0]
-    coros = [compare(ref, s, **kwargs) for s in sources[1:]]
-    results = await asyncio.gather(*coros)
-    return all(results)
+    resolved = resolve_compare_args(
+        chunk_size=chunk_size,
+        size_precheck=size_precheck,
+        quick_check=quick_check,
+        headers=headers,
+        timeout=timeout,
+        follow_redirects=follow_redirects,
+        verify_ssl=verify_ssl,
+        proxy=proxy,
+    )
+
+    ref = _source_path(sources[0])
+    # The reference is read by every comparison: map it once and let each
+    # C task read from the shared mapping instead of reopening it.
+    shared = await _open_shared(ref)
+
+    # Only a mismatch matters, so no per-source result list is kept
+    mismatch = await get_demux().until(
+        async_compare_start, async_compare_result,
+        ((ref, _source_path(s), *resolved) for s in itertools.islice(sources, 1, None)),
+        _concurrency_limit(concurrency),
+        trailing=() if shared is None else (shared,),
+        stop=operator.not_,  # first mismatch decides; the rest is cancelled
+    )
+    return mismatch is None
 
 
 async def compare_many(
@@ -246,24 +337,19 @@ async def compare_many(
     follow_redirects: bool = True,
     verify_ssl: bool = True,
     proxy: str | None = None,
+    concurrency: int | None = None,
 ) -> CompareResult:
     """Detailed pairwise comparison of multiple sources (async).
 
-    All pairs compared concurrently via asyncio.gather().
+    Pairs are compared concurrently as one batch of C tasks, at most
+    ``concurrency`` at a time.
+
+    :param concurrency: Max comparisons in flight (None = config
+        ``max_workers``, or 2 x CPU count when that is 0).
     """
     validate_chunk_size(chunk_size)
     validate_timeout(timeout)
-
-    kwargs: dict[str, Any] = {
-        "chunk_size": chunk_size,
-        "size_precheck": size_precheck,
-        "quick_check": quick_check,
-        "headers": headers,
-        "timeout": timeout,
-        "follow_redirects": follow_redirects,
-        "verify_ssl": verify_ssl,
-        "proxy": proxy,
-    }
+    validate_concurrency(concurrency)
 
     n = len(sources)
     names = [_source_path(s) for s in sources]
@@ -271,40 +357,84 @@ async def compare_many(
     if n < 2:
         return CompareResult(all_equal=True, groups=[set(names)], diff={})
 
-    pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
-
-    async def _cmp(i: int, j: int) -> tuple[int, int, bool]:
-        return i, j, await compare(sources[i], sources[j], **kwargs)
-
-    results = await asyncio.gather(*[_cmp(i, j) for i, j in pairs])
-
-    diff: dict[tuple[str, str], bool] = {}
-    for i, j, eq in results:
-        diff[(names[i], names[j])] = eq
-
-    all_equal = all(eq for _, _, eq in results)
-
-    # Union-find for grouping
-    parent = list(range(n))
-
-    def find(x: int) -> int:
-        while parent[x] != x:
-            parent[x] = parent[parent[x]]
-            x = parent[x]
-        return x
+    for i, s in enumerate(sources):
+        validate_path(s, f"sources[{i}]")
 
-    for i, j, eq in results:
-        if eq:
-            pi, pj = find(i), find(j)
-            if pi != pj:
-                parent[pi] = pj
-
-    group_map: dict[int, set[str]] = {}
-    for i in range(n):
-        root = find(i)
-        group_map.setdefault(root, set()).add(names[i])
+    resolved = resolve_compare_args(
+        chunk_size=chunk_size,
+        size_precheck=size_precheck,
+        quick_check=quick_check,
+        headers=headers,
+        timeout=timeout,
+        follow_redirects=follow_redirects,
+        verify_ssl=verify_ssl,
+        proxy=proxy,
+    )
 
-    return CompareResult(all_equal=all_equal, groups=list(group_map.values()), diff=diff)
+    demux = get_demux()
+    limit = _concurrency_limit(concurrency)
+
+    # Every comparison made: pair indices and results, in parallel
+    pis = array("i")
+    pjs = array("i")
+    eqs: list[bool] = []
+
+    async def _run(firsts: array, seconds: array) -> tuple[array, array, list[bool]]:
+        round_eqs = await demux.map(
+            async_compare_start, async_compare_result,
+            ((names[i], names[j], *resolved) for i, j in zip(firsts, seconds)), limit,
+            count=len(firsts))
+        pis.extend(firsts)
+        pjs.extend(seconds)
+        eqs.extend(round_eqs)
+        return firsts, seconds, round_eqs
+
+    # Sources naming the same local file are equal without reading it;
+    # only one representative per file takes part in the comparisons.
+    reps, dups = split_duplicates(await _stat_sources(names))
+
+    # Byte equality is transitive: comparing everything against sources[0]
+    # settles every pair touching its group, so only the sources that
+    # differ from it need comparing among themselves.
+    groups = split_mismatches(*await _run(*pairs_against_first([reps])))
+    remaining = groups[0] if groups else []
+    if len(remaining) >= FINGERPRINT_CACHED_MIN_SOURCES:
+        # Comparing m leftovers pairwise reads each one m-1 times; one
+        # fingerprint each buckets them so only bucket members are
+        # compared. A size no other leftover has rules a local file out.
+        stats = await _stat_sources(names, remaining)
+        candidates, _ = split_by_size(stats, remaining)
+        keys, digests, missing = lookup_fingerprints(stats, candidates)
+        if not missing or len(remaining) >= FINGERPRINT_MIN_SOURCES:
+            r = resolved
+            if (missing and len(missing) == len(candidates)
+                    and not any("://" in names[i] for i in candidates)):
+                # Nothing cached: quick check samples rule out most
+                # same-size files before any of them is read in full
+                samples = await demux.map(
+                    async_fingerprint_start, async_fingerprint_result,
+                    [(names[i], r.chunk_size, None, r.timeout, r.follow_redirects,
+                      r.verify_ssl, r.allow_private, r.proxy) for i in candidates],
+                    limit, trailing=(True,))
+                candidates, keys, digests, missing = drop_unique_samples(
+                    candidates, keys, digests, samples, r.chunk_size)
+            computed = await demux.map(
+                async_fingerprint_start, async_fingerprint_result,
+                [(names[candidates[k]], r.chunk_size, r.headers, r.timeout,
+                  r.follow_redirects, r.verify_ssl, r.allow_private, r.proxy)
+                 for k in missing], limit)
+            digests = record_fingerprints(keys, digests, missing, computed)
+            buckets = group_by_digest(candidates, digests)
+            # Equal digests over different bytes: compare those pairwise
+            groups = split_mismatches(*await _run(*pairs_against_first(buckets)))
+    await _run(*pairs_within(groups))
+    for i, first in dups:
+        pis.append(i)
+        pjs.append(first)
+        eqs.append(True)
+
+    # The pairs not compared directly follow from the grouping
+    return build_compare_result(names, group_roots(n, pis, pjs, eqs))
 
 
 async def compare_dir_urls(
@@ -329,25 +459,19 @@ async def compare_dir_urls(
     validate_chunk_size(chunk_size)
     validate_timeout(timeout)
 
-    cfg = get_config()
-
-    h = headers if headers is not None else (cfg.headers or None)
-    p = proxy if proxy is not None else cfg.proxy
-
-    fd, task = async_compare_dir_urls_start(
-        dir_path, url_map,
+    resolved = resolve_compare_args(
         chunk_size=chunk_size,
         size_precheck=size_precheck,
         quick_check=quick_check,
-        headers=h if h else None,
+        headers=headers,
         timeout=timeout,
         follow_redirects=follow_redirects,
         verify_ssl=verify_ssl,
-        allow_private=cfg.allow_private_redirects,
-        proxy=p,
+        proxy=proxy,
     )
-
-    raw = await _await_task(fd, lambda: async_compare_dir_urls_result(task))
+    raw = await get_demux().submit_args(
+        async_compare_dir_urls_start, async_compare_dir_urls_result,
+        (dir_path, url_map, *resolved))
     return build_dir_result(raw)
 
 
@@ -28,6 +28,40 @@ def make_file(tmp_path: Path):
     return _make
 
 
+_M64 = (1 << 64) - 1
+_LANE_P1 = 0x9E3779B185EBCA87
+_LANE_P2 = 0xC2B2AE3D27D4EB4F
+
+
+def _lane_round(acc: int, word: int) -> int:
+    acc = (acc + word * _LANE_P2) & _M64
+    return ((acc << 31 | acc >> 33) & _M64) * _LANE_P1 & _M64
+
+
+@pytest.fixture
+def hash_collision() -> tuple[bytes, bytes]:
+    """Two different 64-byte inputs with the same fast content hash.
+
+    The XXH64 round used by each lane of ``komparu_hash_t`` is invertible
+    in its input word, so the second stripe of ``right`` is solved to
+    bring all four lanes back to the state ``left`` ends in.
+    """
+    p1_inv = pow(_LANE_P1, -1, 1 << 64)
+    p2_inv = pow(_LANE_P2, -1, 1 << 64)
+    seeds = [(_LANE_P1 + _LANE_P2) & _M64, _LANE_P2, 0, -_LANE_P1 & _M64]
+    left = bytes(range(64))
+    words = [int.from_bytes(left[i:i + 8], "little") for i in range(0, 64, 8)]
+    forged = [w ^ 0xFF for w in words[:4]]
+    for lane in range(4):
+        target = _lane_round(_lane_round(seeds[lane], words[lane]), words[lane + 4])
+        acc = _lane_round(seeds[lane], forged[lane])
+        mixed = target * p1_inv & _M64
+        mixed = (mixed >> 31 | mixed << 33) & _M64
+        forged.append((mixed - acc) * p2_inv & _M64)
+    right = b"".join(w.to_bytes(8, "little") for w in forged)
+    return left, right
+
+
 @pytest.fixture
 def make_files(make_file):
     """Factory fixture: create multiple files, return dict of paths."""
@@ -11,6 +11,7 @@ from pathlib import Path
 import pytest
 
 import komparu
+import komparu._demux
 import komparu.aio
 from komparu import CompareResult, DiffReason
 
@@ -22,6 +23,20 @@ def allow_localhost():
     komparu.reset_config()
 
 
+@pytest.fixture
+def loop_stats(monkeypatch):
+    """Paths passed to os.stat from Python; stats in C pool threads are not seen."""
+    calls: list[str] = []
+    real_stat = os.stat
+
+    def _stat(path, *args, **kwargs):
+        calls.append(os.fspath(path))
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", _stat)
+    return calls
+
+
 # =========================================================================
 # compare — async file comparison
 # =========================================================================
@@ -102,6 +117,30 @@ class TestAsyncCompare:
         with pytest.raises((FileNotFoundError, IOError)):
             await komparu.aio.compare(str(a), str(tmp_path / "missing.bin"))
 
+    @pytest.mark.asyncio
+    async def test_no_stat_on_loop(self, tmp_path: Path, loop_stats):
+        """Auto chunk sizing and the same-file check stat in C threads."""
+        a = tmp_path / "a.bin"
+        b = tmp_path / "b.bin"
+        a.write_bytes(b"x" * 1000)
+        b.write_bytes(b"x" * 1000)
+        assert await komparu.aio.compare(str(a), str(b)) is True
+        assert await komparu.aio.compare(str(a), str(a)) is True
+        assert await komparu.aio.compare(str(a), str(b), chunk_size=64) is True
+        assert loop_stats == []
+
+    @pytest.mark.asyncio
+    async def test_pool_stats_match_os_stat(self, tmp_path: Path):
+        from komparu.aio import _stat_sources
+
+        a = tmp_path / "a.bin"
+        a.write_bytes(b"data")
+        st = os.stat(a)
+        stats = await _stat_sources([str(a), str(tmp_path / "missing"), "https://x/f"])
+        assert stats[1:] == [None, None]
+        assert tuple(stats[0]) == (st.st_mode, st.st_dev, st.st_ino, st.st_size,
+                                   st.st_mtime_ns, st.st_ctime_ns)
+
     @pytest.mark.asyncio
     async def test_http_identical(self, tmp_path: Path, httpserver):
         content = b"http content"
@@ -145,6 +184,49 @@ class TestAsyncConcurrent:
         results = await asyncio.gather(*coros)
         assert all(results)
 
+    @pytest.mark.asyncio
+    async def test_many_concurrent_share_one_reader(self, tmp_path: Path):
+        """Hundreds of in-flight tasks complete through the loop's single channel."""
+        import asyncio
+
+        a = tmp_path / "a.bin"
+        b = tmp_path / "b.bin"
+        a.write_bytes(b"x" * 4096)
+        b.write_bytes(b"x" * 4095 + b"y")
+
+        coros = [
+            komparu.aio.compare(str(a), str(a if i % 2 else b), quick_check=False)
+            for i in range(300)
+        ]
+        results = await asyncio.gather(*coros)
+        assert results == [bool(i % 2) for i in range(300)]
+        assert not komparu._demux.get_demux()._pending
+
+    @pytest.mark.asyncio
+    async def test_cancelled_task_does_not_leak(self, tmp_path: Path):
+        """Cancelling an await drops its pending entry; later tasks still resolve."""
+        import asyncio
+
+        content = os.urandom(1024)
+        p = tmp_path / "f.bin"
+        q = tmp_path / "g.bin"
+        p.write_bytes(content)
+        q.write_bytes(content)
+
+        t = asyncio.ensure_future(komparu.aio.compare(str(p), str(q)))
+        await asyncio.sleep(0)
+        t.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await t
+        assert not komparu._demux.get_demux()._pending
+        assert await komparu.aio.compare(str(p), str(q))
+
+    def test_drain_completed_empty_channel(self):
+        """Draining a channel with nothing finished returns no ids."""
+        from komparu._core import async_channel_new, drain_completed
+
+        assert drain_completed(async_channel_new()) == []
+
 
 # =========================================================================
 # compare_dir — async directory comparison
@@ -214,6 +296,17 @@ class TestAsyncCompareDir:
         assert result.only_left == {"only_a.txt"}
         assert result.only_right == {"only_b.txt"}
 
+    @pytest.mark.asyncio
+    async def test_trust_mtime(self, make_dir):
+        a = make_dir("a", {"f.bin": b"alpha"})
+        b = make_dir("b", {"f.bin": b"bravo"})
+        st = os.stat(a / "f.bin")
+        os.utime(b / "f.bin", ns=(st.st_atime_ns, st.st_mtime_ns))
+        result = await komparu.aio.compare_dir(str(a), str(b))
+        assert result.equal is False
+        result = await komparu.aio.compare_dir(str(a), str(b), trust_mtime=True)
+        assert result.equal is True
+
     @pytest.mark.asyncio
     async def test_nested_dirs(self, make_dir):
         files = {
@@ -498,6 +591,34 @@ class TestAsyncCompareAll:
         paths.append(str(p))
         assert await komparu.aio.compare_all(paths) is False
 
+    @pytest.mark.asyncio
+    async def test_stops_at_first_mismatch(self, tmp_path: Path, monkeypatch):
+        """No comparison starts after a mismatch has been seen."""
+        import komparu.aio as aio
+
+        starts = 0
+        real = aio.async_compare_start
+
+        def counting(*args):
+            nonlocal starts
+            starts += 1
+            return real(*args)
+
+        monkeypatch.setattr(aio, "async_compare_start", counting)
+        ref = tmp_path / "ref.bin"
+        ref.write_bytes(b"same")
+        diff = tmp_path / "diff.bin"
+        diff.write_bytes(b"different")
+        paths = [str(ref), str(diff)]
+        for i in range(20):
+            p = tmp_path / f"f{i}.bin"
+            p.write_bytes(b"same")
+            paths.append(str(p))
+
+        assert await komparu.aio.compare_all(paths, concurrency=1) is False
+        assert starts == 1
+        assert not komparu._demux.get_demux()._pending
+
     @pytest.mark.asyncio
     async def test_single(self, tmp_path: Path):
         p = tmp_path / "only.bin"
@@ -521,6 +642,65 @@ class TestAsyncCompareAll:
 # =========================================================================
 
 
+class TestAsyncCompareAllSharedRef:
+    """compare_all maps a local reference once for all comparisons."""
+
+    @pytest.mark.asyncio
+    async def test_shared_ref_identical_and_different(self, tmp_path: Path):
+        content = os.urandom(200_000)
+        paths = []
+        for i in range(6):
+            p = tmp_path / f"f{i}.bin"
+            p.write_bytes(content)
+            paths.append(str(p))
+        assert await komparu.aio.compare_all(paths, quick_check=False) is True
+
+        (tmp_path / "f5.bin").write_bytes(content[:-1] + b"\x00")
+        assert await komparu.aio.compare_all(paths, quick_check=False) is False
+
+    @pytest.mark.asyncio
+    async def test_empty_ref_falls_back(self, tmp_path: Path):
+        """An empty reference cannot be mapped; per-pair opens are used."""
+        a = tmp_path / "a.bin"
+        b = tmp_path / "b.bin"
+        a.write_bytes(b"")
+        b.write_bytes(b"")
+        assert await komparu.aio.compare_all([str(a), str(b)]) is True
+
+    @pytest.mark.asyncio
+    async def test_missing_ref_reports_error(self, tmp_path: Path):
+        b = tmp_path / "b.bin"
+        b.write_bytes(b"data")
+        with pytest.raises((FileNotFoundError, IOError)):
+            await komparu.aio.compare_all([str(tmp_path / "missing.bin"), str(b)])
+
+    @pytest.mark.asyncio
+    async def test_open_shared_rejects_directory(self, tmp_path: Path):
+        from komparu._core import async_open_shared_result, async_open_shared_start
+        from komparu._demux import get_demux
+
+        with pytest.raises(OSError, match="cannot map"):
+            await get_demux().submit(
+                async_open_shared_start, async_open_shared_result, str(tmp_path))
+
+    @pytest.mark.asyncio
+    async def test_shared_ref_opened_off_loop(self, tmp_path: Path, monkeypatch):
+        """The reference is opened and mapped by a pool task, not the loop."""
+        import komparu.aio as aio
+
+        calls = []
+        real = aio.async_open_shared_start
+        monkeypatch.setattr(aio, "async_open_shared_start",
+                            lambda *a, **kw: calls.append(a) or real(*a, **kw))
+        paths = []
+        for i in range(3):
+            p = tmp_path / f"f{i}.bin"
+            p.write_bytes(b"data")
+            paths.append(str(p))
+        assert await aio.compare_all(paths) is True
+        assert calls == [(paths[0],)]
+
+
 class TestAsyncCompareMany:
     @pytest.mark.asyncio
     async def test_all_identical(self, tmp_path: Path):
@@ -569,6 +749,194 @@ class TestAsyncCompareMany:
         assert result.all_equal is True
         assert len(result.groups) == 1
 
+    @pytest.mark.asyncio
+    async def test_concurrency_bound(self, tmp_path: Path, monkeypatch):
+        """No more than ``concurrency`` comparisons are in flight."""
+        import asyncio
+        import komparu.aio as aio
+
+        peak = 0
+        real = aio.async_compare_start
+
+        def tracking(*args):
+            nonlocal peak
+            # Tasks in flight once this one starts
+            peak = max(peak, len(komparu._demux.get_demux()._pending) + 1)
+            return real(*args)
+
+        monkeypatch.setattr(aio, "async_compare_start", tracking)
+        paths = []
+        for i in range(8):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(f"content_{i}".encode())
+            paths.append(str(p))
+
+        result = await komparu.aio.compare_many(paths, concurrency=3)
+        assert len(result.groups) == 8
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_many_mismatches_bucketed_by_fingerprint(self, tmp_path: Path, loop_stats):
+        """Leftovers grouped by fingerprint give the same groups and diff.
+
+        Their sizes and cache keys come from a pool stat, not the loop.
+        """
+        contents = [b"base"] + [b"g%d" % (i % 4) for i in range(12)] + [b"x"]
+        paths = []
+        for i, c in enumerate(contents):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(c)
+            paths.append(str(p))
+        result = await komparu.aio.compare_many(paths, concurrency=3)
+        assert sorted(len(g) for g in result.groups) == [1, 1, 3, 3, 3, 3]
+        assert result.diff == {
+            (paths[i], paths[j]): contents[i] == contents[j]
+            for i in range(14) for j in range(i + 1, 14)
+        }
+        assert not komparu._demux.get_demux()._pending
+        assert loop_stats == []
+
+    @pytest.mark.asyncio
+    async def test_batch_error_leaves_nothing_pending(self, tmp_path: Path):
+        """A failing comparison fails the batch and orphans its other tasks."""
+        paths = []
+        for i in range(6):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(b"same")
+            paths.append(str(p))
+        paths.insert(3, str(tmp_path / "missing.txt"))
+
+        with pytest.raises((FileNotFoundError, IOError)):
+            await komparu.aio.compare_many(paths, concurrency=2)
+        assert not komparu._demux.get_demux()._pending
+        assert (await komparu.aio.compare_many(paths[:3])).all_equal
+
+    @pytest.mark.asyncio
+    async def test_batch_results_in_order(self, tmp_path: Path):
+        from komparu._core import async_compare_start, async_compare_result
+        from komparu._demux import get_demux
+        from komparu._helpers import resolve_compare_args
+
+        resolved = resolve_compare_args(
+            chunk_size=65536, size_precheck=True, quick_check=True, headers=None,
+            timeout=30.0, follow_redirects=True, verify_ssl=True, proxy=None)
+
+        a = tmp_path / "a.txt"
+        a.write_bytes(b"same")
+        args = []
+        expected = []
+        for i in range(20):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(b"same" if i % 3 else b"diff")
+            args.append((str(a), str(p), *resolved))
+            expected.append(bool(i % 3))
+        demux = get_demux()
+        assert await demux.map(async_compare_start, async_compare_result, args, 4) == expected
+        assert await demux.map(async_compare_start, async_compare_result, [], 4) == []
+
+        # A lazy iterator with its count is consumed as tasks start
+        built = started = 0
+
+        def lazy():
+            nonlocal built
+            for item in args:
+                built += 1
+                yield item
+
+        def start(*call_args):
+            nonlocal started
+            assert built <= started + 1
+            started += 1
+            return async_compare_start(*call_args)
+
+        results = await demux.map(start, async_compare_result, lazy(), 4, count=len(args))
+        assert results == expected
+        assert built == started == len(args)
+
+    @pytest.mark.asyncio
+    async def test_batch_until(self, tmp_path: Path):
+        """until() keeps no results: the stopping value, or None."""
+        import operator
+
+        from komparu._core import async_compare_start, async_compare_result
+        from komparu._demux import get_demux
+        from komparu._helpers import resolve_compare_args
+
+        resolved = resolve_compare_args(
+            chunk_size=65536, size_precheck=True, quick_check=True, headers=None,
+            timeout=30.0, follow_redirects=True, verify_ssl=True, proxy=None)
+
+        a = tmp_path / "a.txt"
+        a.write_bytes(b"same")
+        same = tmp_path / "same.txt"
+        same.write_bytes(b"same")
+        diff = tmp_path / "diff.txt"
+        diff.write_bytes(b"diff")
+
+        demux = get_demux()
+        all_same = ((str(a), str(same), *resolved) for _ in range(20))
+        assert await demux.until(
+            async_compare_start, async_compare_result, all_same, 4, stop=operator.not_) is None
+        one_diff = ((str(a), str(diff if i == 7 else same), *resolved) for i in range(20))
+        assert await demux.until(
+            async_compare_start, async_compare_result, one_diff, 4, stop=operator.not_) is False
+        assert await demux.until(
+            async_compare_start, async_compare_result, iter(()), 4, stop=operator.not_) is None
+        assert not demux._pending
+
+    @pytest.mark.asyncio
+    async def test_concurrency_invalid(self, tmp_path: Path):
+        p = tmp_path / "f.txt"
+        p.write_bytes(b"x")
+        with pytest.raises(ValueError, match="concurrency must be positive"):
+            await komparu.aio.compare_many([str(p), str(p)], concurrency=0)
+
+    @pytest.mark.asyncio
+    async def test_diff_complete_with_representative(self, tmp_path: Path):
+        """Every pair is reported, including pairs inferred from sources[0]."""
+        contents = [b"x", b"y", b"x", b"y", b"z"]
+        paths = []
+        for i, c in enumerate(contents):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(c)
+            paths.append(str(p))
+
+        result = await komparu.aio.compare_many(paths)
+        assert len(result.diff) == 10
+        for i in range(5):
+            for j in range(i + 1, 5):
+                assert result.diff[(paths[i], paths[j])] is (contents[i] == contents[j])
+        assert sorted(len(g) for g in result.groups) == [1, 2, 2]
+
+    @pytest.mark.asyncio
+    async def test_same_file_sources(self, tmp_path: Path):
+        a = tmp_path / "a.txt"
+        a.write_bytes(b"same")
+        b = tmp_path / "b.txt"
+        b.write_bytes(b"diff")
+        link = tmp_path / "link.txt"
+        link.symlink_to(a)
+
+        assert await komparu.aio.compare(str(a), str(link)) is True
+        result = await komparu.aio.compare_many([str(a), str(b), str(link)])
+        assert result.diff[(str(a), str(link))] is True
+        assert result.diff[(str(b), str(link))] is False
+        assert sorted(len(g) for g in result.groups) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_same_file_sources_no_stat_on_loop(self, tmp_path: Path, loop_stats):
+        a = tmp_path / "a.txt"
+        a.write_bytes(b"same")
+        b = tmp_path / "b.txt"
+        b.write_bytes(b"diff")
+        link = tmp_path / "link.txt"
+        link.symlink_to(a)
+
+        result = await komparu.aio.compare_many([str(a), str(b), str(link)])
+        assert result.diff[(str(a), str(link))] is True
+        assert sorted(len(g) for g in result.groups) == [1, 2]
+        assert loop_stats == []
+
 
 # =========================================================================
 # compare_dir_urls — async
@@ -728,6 +1096,22 @@ class TestAsyncCompareDirUrls:
         )
         assert result.equal is True
 
+    @pytest.mark.asyncio
+    async def test_large_file_without_range(self, make_dir, httpserver):
+        """A server ignoring Range is streamed at the default chunk size."""
+        large_content = os.urandom(256 * 1024)
+        changed = large_content[:-1] + bytes([large_content[-1] ^ 0xFF])
+        d = make_dir("local", {"same.bin": large_content, "changed.bin": large_content})
+        httpserver.expect_request("/same.bin").respond_with_data(large_content)
+        httpserver.expect_request("/changed.bin").respond_with_data(changed)
+        url_map = {
+            "same.bin": httpserver.url_for("/same.bin"),
+            "changed.bin": httpserver.url_for("/changed.bin"),
+        }
+        result = await komparu.aio.compare_dir_urls(str(d), url_map)
+        assert result.equal is False
+        assert set(result.diff) == {"changed.bin"}
+
     @pytest.mark.asyncio
     async def test_concurrent_dir_urls(self, make_dir, httpserver):
         """Multiple async compare_dir_urls calls running concurrently."""
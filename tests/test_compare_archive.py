@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import importlib.util
 import io
 import os
 import tarfile
@@ -13,14 +14,18 @@ import pytest
 import komparu
 from komparu import DiffReason
 
+requires_lzma = pytest.mark.skipif(
+    importlib.util.find_spec("lzma") is None,
+    reason="lzma module not available",
+)
 
-@pytest.fixture
-def make_tar(tmp_path: Path):
-    """Create a tar.gz archive from a dict of {name: content}."""
+
+def _tar_maker(tmp_path: Path, mode: str):
+    """Archive factory for one tarfile write mode ("w:gz", "w:", ...)."""
 
     def _make(name: str, files: dict[str, bytes]) -> Path:
         p = tmp_path / name
-        with tarfile.open(str(p), "w:gz") as tf:
+        with tarfile.open(str(p), mode) as tf:
             for entry_name, data in files.items():
                 info = tarfile.TarInfo(name=entry_name)
                 info.size = len(data)
@@ -30,6 +35,12 @@ def make_tar(tmp_path: Path):
     return _make
 
 
+@pytest.fixture
+def make_tar(tmp_path: Path):
+    """Create a tar.gz archive from a dict of {name: content}."""
+    return _tar_maker(tmp_path, "w:gz")
+
+
 @pytest.fixture
 def make_zip(tmp_path: Path):
     """Create a zip archive from a dict of {name: content}."""
@@ -47,49 +58,19 @@ def make_zip(tmp_path: Path):
 @pytest.fixture
 def make_tar_plain(tmp_path: Path):
     """Create an uncompressed tar archive from a dict of {name: content}."""
-
-    def _make(name: str, files: dict[str, bytes]) -> Path:
-        p = tmp_path / name
-        with tarfile.open(str(p), "w:") as tf:
-            for entry_name, data in files.items():
-                info = tarfile.TarInfo(name=entry_name)
-                info.size = len(data)
-                tf.addfile(info, io.BytesIO(data))
-        return p
-
-    return _make
+    return _tar_maker(tmp_path, "w:")
 
 
 @pytest.fixture
 def make_tar_bz2(tmp_path: Path):
     """Create a tar.bz2 archive from a dict of {name: content}."""
-
-    def _make(name: str, files: dict[str, bytes]) -> Path:
-        p = tmp_path / name
-        with tarfile.open(str(p), "w:bz2") as tf:
-            for entry_name, data in files.items():
-                info = tarfile.TarInfo(name=entry_name)
-                info.size = len(data)
-                tf.addfile(info, io.BytesIO(data))
-        return p
-
-    return _make
+    return _tar_maker(tmp_path, "w:bz2")
 
 
 @pytest.fixture
 def make_tar_xz(tmp_path: Path):
     """Create a tar.xz archive from a dict of {name: content}."""
-
-    def _make(name: str, files: dict[str, bytes]) -> Path:
-        p = tmp_path / name
-        with tarfile.open(str(p), "w:xz") as tf:
-            for entry_name, data in files.items():
-                info = tarfile.TarInfo(name=entry_name)
-                info.size = len(data)
-                tf.addfile(info, io.BytesIO(data))
-        return p
-
-    return _make
+    return _tar_maker(tmp_path, "w:xz")
 
 
 class TestSameArchive:
@@ -257,6 +238,15 @@ class TestArchiveSafety:
         result = komparu.compare_archive(str(a_path), str(b))
         assert result.equal is True
 
+    @pytest.mark.parametrize("hash_compare", [False, True])
+    def test_inner_dot_and_double_slash_normalized(self, make_tar, hash_compare):
+        """Interior ./ components and repeated slashes are collapsed."""
+        a = make_tar("a.tar.gz", {"dir//sub/./file.txt": b"hello"})
+        b = make_tar("b.tar.gz", {"dir/sub/file.txt": b"hello"})
+        result = komparu.compare_archive(str(a), str(b), hash_compare=hash_compare)
+        assert result.equal is True
+        assert result.only_left == set()
+
     def test_max_entries_bomb(self, tmp_path: Path):
         """Archive with too many entries raises error."""
         a_path = tmp_path / "bomb.tar.gz"
@@ -356,13 +346,9 @@ class TestArchiveFormats:
         assert result.equal is False
         assert result.only_right == {"new.txt"}
 
-    @pytest.mark.skipif(
-        not hasattr(tarfile, "ENCODING"),
-        reason="tarfile xz support check",
-    )
+    @requires_lzma
     def test_tar_xz_identical(self, make_tar_xz):
         """tar.xz archives with identical content (requires lzma)."""
-        pytest.importorskip("lzma")
         files = {"data.txt": b"xz compressed", "nested/file.bin": os.urandom(128)}
         a = make_tar_xz("a.tar.xz", files)
         b = make_tar_xz("b.tar.xz", files)
@@ -370,13 +356,9 @@ class TestArchiveFormats:
         assert result.equal is True
         assert result.diff == {}
 
-    @pytest.mark.skipif(
-        not hasattr(tarfile, "ENCODING"),
-        reason="tarfile xz support check",
-    )
+    @requires_lzma
     def test_tar_xz_different(self, make_tar_xz):
         """tar.xz archives with different content."""
-        pytest.importorskip("lzma")
         a = make_tar_xz("a.tar.xz", {"file.txt": b"version X"})
         b = make_tar_xz("b.tar.xz", {"file.txt": b"version Y"})
         result = komparu.compare_archive(str(a), str(b))
@@ -593,6 +575,15 @@ class TestHashCompare:
         result = komparu.compare_archive(str(a), str(b), hash_compare=True)
         assert result.equal is True
 
+    def test_crafted_fast_hash_collision(self, make_tar, hash_collision):
+        """Entries forged to collide under the fast content hash still differ."""
+        left, right = hash_collision
+        a = make_tar("a.tar.gz", {"f.bin": left})
+        b = make_tar("b.tar.gz", {"f.bin": right})
+        result = komparu.compare_archive(str(a), str(b), hash_compare=True)
+        assert result.equal is False
+        assert result.diff == {"f.bin": DiffReason.CONTENT_MISMATCH}
+
     def test_hash_different_content(self, make_tar):
         """hash_compare=True with different content → not equal."""
         a = make_tar("a.tar.gz", {"file.txt": b"version A"})
@@ -686,3 +677,89 @@ class TestHashCompare:
         b = make_tar_bz2("b.tar.bz2", files)
         result = komparu.compare_archive(str(a), str(b), hash_compare=True)
         assert result.equal is True
+
+
+class TestParallelWorkers:
+    """Test parallel_workers mode for archive comparison."""
+
+    @pytest.mark.parametrize("maker", ["make_zip", "make_tar"])
+    def test_parallel_crafted_fast_hash_collision(self, request, maker, hash_collision):
+        """Digest equality decides entries here, so a forged pair must differ."""
+        make = request.getfixturevalue(maker)
+        left, right = hash_collision
+        common = {f"f{i:02d}.bin": bytes([i]) * 64 for i in range(20)}
+        a = make("a.arc", {**common, "forged.bin": left})
+        b = make("b.arc", {**common, "forged.bin": right})
+        result = komparu.compare_archive(str(a), str(b), parallel_workers=4)
+        assert result.diff == {"forged.bin": DiffReason.CONTENT_MISMATCH}
+
+    def test_parallel_identical_zip(self, make_zip):
+        """Many-entry zip split across readers → equal."""
+        files = {f"f{i:03d}.bin": os.urandom(256) for i in range(50)}
+        a = make_zip("a.zip", files)
+        b = make_zip("b.zip", files)
+        result = komparu.compare_archive(str(a), str(b), parallel_workers=4)
+        assert result.equal is True
+        assert result.only_left == set()
+        assert result.only_right == set()
+
+    def test_parallel_identical_tar_plain(self, make_tar_plain):
+        """Uncompressed tar split across readers → equal."""
+        files = {f"dir/f{i:03d}.txt": f"content {i}".encode() for i in range(40)}
+        a = make_tar_plain("a.tar", files)
+        b = make_tar_plain("b.tar", files)
+        result = komparu.compare_archive(str(a), str(b), parallel_workers=8)
+        assert result.equal is True
+
+    def test_parallel_compressed_tar(self, make_tar):
+        """Compressed streams use a single reader each but still compare."""
+        files = {f"f{i}.txt": f"data {i}".encode() for i in range(20)}
+        a = make_tar("a.tar.gz", files)
+        b = make_tar("b.tar.gz", {**files, "f7.txt": b"changed"})
+        result = komparu.compare_archive(str(a), str(b), parallel_workers=4)
+        assert result.equal is False
+        assert set(result.diff) == {"f7.txt"}
+
+    def test_parallel_matches_sequential(self, make_zip):
+        """Parallel and sequential modes produce the same result."""
+        left = {f"f{i:03d}.txt": f"v{i}".encode() for i in range(30)}
+        right = {k: v for k, v in left.items() if k != "f003.txt"}
+        right["f010.txt"] = b"different size"
+        right["f020.txt"] = b"v21"
+        right["new.txt"] = b"new"
+        a = make_zip("a.zip", left)
+        b = make_zip("b.zip", right)
+        seq = komparu.compare_archive(str(a), str(b), hash_compare=True)
+        par = komparu.compare_archive(str(a), str(b), parallel_workers=6)
+        assert par == seq
+        assert par.diff == {
+            "f010.txt": DiffReason.SIZE_MISMATCH,
+            "f020.txt": DiffReason.CONTENT_MISMATCH,
+        }
+        assert par.only_left == {"f003.txt"}
+        assert par.only_right == {"new.txt"}
+
+    def test_parallel_auto_workers(self, make_zip):
+        """parallel_workers=0 picks the worker count automatically."""
+        files = {f"f{i}.txt": b"x" * i for i in range(25)}
+        a = make_zip("a.zip", files)
+        b = make_zip("b.zip", files)
+        assert komparu.compare_archive(str(a), str(b), parallel_workers=0).equal is True
+
+    def test_parallel_bomb_limit_shared(self, make_zip):
+        """Decompressed-size budget is enforced across all readers."""
+        files = {f"f{i:02d}.bin": b"\x00" * 10240 for i in range(20)}
+        a = make_zip("a.zip", files)
+        b = make_zip("b.zip", files)
+        with pytest.raises(IOError, match="bomb"):
+            komparu.compare_archive(
+                str(a), str(b),
+                parallel_workers=8,
+                max_decompressed_size=100_000,
+                max_compression_ratio=100_000,
+            )
+
+    def test_parallel_negative_workers_rejected(self, make_zip):
+        a = make_zip("a.zip", {"f.txt": b"x"})
+        with pytest.raises(ValueError, match="parallel_workers"):
+            komparu.compare_archive(str(a), str(a), parallel_workers=-1)
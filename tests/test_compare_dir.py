@@ -75,6 +75,20 @@ class TestCrossDirHardlinks:
         result = komparu.compare_dir(str(a), str(b_dir))
         assert result.equal is True
 
+    def test_hardlinks_mixed_with_changes(self, make_dir):
+        """Linked, resized and rewritten files in one pass."""
+        a = make_dir("a", {"link.txt": b"data", "size.txt": b"short", "body.txt": b"aaaa"})
+        b = make_dir("b", {"size.txt": b"much longer", "body.txt": b"bbbb"})
+        os.link(str(a / "link.txt"), str(b / "link.txt"))
+        for workers in (1, 4):
+            result = komparu.compare_dir(str(a), str(b), max_workers=workers)
+            assert result.diff == {
+                "size.txt": DiffReason.SIZE_MISMATCH,
+                "body.txt": DiffReason.CONTENT_MISMATCH,
+            }
+        result = komparu.compare_dir(str(a), str(b), size_precheck=False)
+        assert set(result.diff) == {"size.txt", "body.txt"}
+
 
 class TestIdenticalDirs:
     """Two identical directories should return equal=True."""
@@ -219,6 +233,40 @@ class TestDirOptions:
         result = komparu.compare_dir(str(a), str(b), quick_check=False)
         assert result.equal is True
 
+    def test_trust_mtime(self, make_dir):
+        """Same size and mtime counts as equal only when trust_mtime is set."""
+        a = make_dir("a", {"f.bin": b"alpha", "g.bin": b"gamma"})
+        b = make_dir("b", {"f.bin": b"bravo", "g.bin": b"delta"})
+        st = os.stat(a / "f.bin")
+        os.utime(b / "f.bin", ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.utime(b / "g.bin", ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        result = komparu.compare_dir(str(a), str(b))
+        assert result.diff == {
+            "f.bin": DiffReason.CONTENT_MISMATCH,
+            "g.bin": DiffReason.CONTENT_MISMATCH,
+        }
+
+        result = komparu.compare_dir(str(a), str(b), trust_mtime=True)
+        assert result.diff == {"g.bin": DiffReason.CONTENT_MISMATCH}
+
+    @pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="POSIX only")
+    def test_entry_types(self, make_dir, tmp_path: Path):
+        """Files and dirs are listed, symlinks only when followed,
+        special files never."""
+        a = make_dir("a", {"f.txt": b"x", "sub/g.txt": b"y"})
+        b = make_dir("b", {"f.txt": b"x", "sub/g.txt": b"y"})
+        (a / "link.txt").symlink_to(a / "f.txt")
+        (a / "link_dir").symlink_to(a / "sub")
+        os.mkfifo(a / "pipe")
+
+        result = komparu.compare_dir(str(a), str(b), follow_symlinks=False)
+        assert result.only_left == set()
+        assert result.equal is True
+
+        result = komparu.compare_dir(str(a), str(b))
+        assert result.only_left == {"link.txt", "link_dir/g.txt"}
+
 
 # ---- New tests: Unicode paths ----
 
@@ -623,6 +671,94 @@ class TestIgnorePatterns:
         assert result.only_left == set()
 
 
+class TestLargeOnlySide:
+    """only_left/only_right above 10,000 entries come back as a PathSet view."""
+
+    def test_large_only_left_is_path_set(self, tmp_path):
+        from komparu._types import PathSet
+
+        a = tmp_path / "a"
+        b = tmp_path / "b"
+        a.mkdir()
+        b.mkdir()
+        for i in range(10_001):
+            (a / f"f{i:05d}").touch()
+        result = komparu.compare_dir(str(a), str(b))
+        assert result.equal is False
+        assert isinstance(result.only_left, PathSet)
+        assert len(result.only_left) == 10_001
+        assert list(result.only_left) == sorted(result.only_left)
+        assert result.only_right == set()
+
+        expected = {f"f{i:05d}" for i in range(10_001)}
+        assert result.only_left == expected
+        assert expected == result.only_left
+        assert "f00042" in result.only_left
+        assert "f10001" not in result.only_left
+        assert 1 not in result.only_left
+        assert result.only_left - {"f00000"} == expected - {"f00000"}
+        assert {"f00000", "zz"} - result.only_left == {"zz"}
+        assert result.only_left | result.only_right == expected
+        assert result.only_left & {"f00001", "zz"} == {"f00001"}
+        assert isinstance(result.only_left | result.only_right, set)
+
+    def test_small_only_left_stays_set(self, make_dir):
+        a = make_dir("a", {"x.txt": b"x"})
+        b = make_dir("b", {})
+        b.mkdir(exist_ok=True)
+        result = komparu.compare_dir(str(a), str(b))
+        assert result.only_left == {"x.txt"}
+
+    def test_ignore_keeps_path_set(self, tmp_path):
+        from komparu._types import PathSet
+
+        a = tmp_path / "a"
+        b = tmp_path / "b"
+        a.mkdir()
+        b.mkdir()
+        for i in range(10_001):
+            (a / f"f{i:05d}.{'log' if i % 2 else 'txt'}").touch()
+        result = komparu.compare_dir(str(a), str(b), ignore=["*.log"])
+        assert isinstance(result.only_left, PathSet)
+        assert len(result.only_left) == 5_001
+        assert result.only_left == {f"f{i:05d}.txt" for i in range(0, 10_001, 2)}
+        assert "f00001.log" not in result.only_left
+
+
+class TestLargeDiff:
+    """diff above 10,000 entries comes back as a read-only PathDiff."""
+
+    def test_large_diff_is_path_diff(self, tmp_path):
+        from komparu._types import PathDiff
+
+        a = tmp_path / "a"
+        b = tmp_path / "b"
+        a.mkdir()
+        b.mkdir()
+        for i in range(10_001):
+            (a / f"f{i:05d}").write_bytes(b"a")
+            (b / f"f{i:05d}").write_bytes(b"b" if i % 2 else b"bb")
+        result = komparu.compare_dir(str(a), str(b))
+        assert result.equal is False
+        assert isinstance(result.diff, PathDiff)
+        assert len(result.diff) == 10_001
+        assert result.diff["f00001"] == DiffReason.CONTENT_MISMATCH
+        assert result.diff["f00002"] == DiffReason.SIZE_MISMATCH
+        assert "f10001" not in result.diff
+        assert 1 not in result.diff
+        assert list(result.diff) == sorted(result.diff)
+        assert dict(result.diff) == {
+            f"f{i:05d}": DiffReason.CONTENT_MISMATCH if i % 2 else DiffReason.SIZE_MISMATCH
+            for i in range(10_001)
+        }
+
+        filtered = komparu.compare_dir(str(a), str(b), ignore=["f0000?"])
+        assert isinstance(filtered.diff, PathDiff)
+        assert len(filtered.diff) == 10_001 - 10
+        assert "f00001" not in filtered.diff
+        assert filtered.diff["f00011"] == DiffReason.CONTENT_MISMATCH
+
+
 # ---- Permission denied errors ----
 
 
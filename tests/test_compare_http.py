@@ -19,6 +19,25 @@ def allow_localhost():
     komparu.reset_config()
 
 
+def _range_handler(content: bytes):
+    """Serve *content* with Range support."""
+
+    def handler(request):
+        range_header = request.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            start, end = range_header[6:].split("-")
+            start = int(start)
+            end = min(int(end) if end else len(content) - 1, len(content) - 1)
+            resp = Response(content[start:end + 1], status=206)
+            resp.headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+            return resp
+        resp = Response(content, status=200)
+        resp.headers["Accept-Ranges"] = "bytes"
+        return resp
+
+    return handler
+
+
 class TestHttpIdentical:
     """Two identical remote files should return True."""
 
@@ -81,6 +100,81 @@ class TestMixedComparison:
         ) is False
 
 
+    def test_local_vs_http_multi_chunk(self, httpserver: HTTPServer, make_file):
+        """Each chunk of the stream is checked against the mapped file."""
+        content = os.urandom(200_000)
+        changed = content[:-1] + bytes([content[-1] ^ 0xFF])
+        local = make_file("local.bin", content)
+        httpserver.expect_request("/same").respond_with_handler(_range_handler(content))
+        httpserver.expect_request("/changed").respond_with_handler(_range_handler(changed))
+        opts = {"chunk_size": 4096, "quick_check": False}
+        for url, expected in (("/same", True), ("/changed", False)):
+            url = httpserver.url_for(url)
+            assert komparu.compare(str(local), url, **opts) is expected
+            assert komparu.compare(url, str(local), **opts) is expected
+
+    def test_local_shorter_than_http(self, httpserver: HTTPServer, make_file):
+        """Without a size precheck, extra remote bytes still differ."""
+        content = os.urandom(10_000)
+        local = make_file("local.bin", content)
+        httpserver.expect_request("/longer").respond_with_handler(
+            _range_handler(content + b"extra"))
+        assert komparu.compare(
+            str(local), httpserver.url_for("/longer"),
+            chunk_size=4096, size_precheck=False, quick_check=False,
+        ) is False
+
+    def test_small_file_single_request(self, httpserver: HTTPServer, make_file):
+        """Opening a URL fetches the start of the body; a small file needs
+        no other request."""
+        content = os.urandom(1000)
+        local = make_file("local.bin", content)
+        httpserver.expect_request("/remote").respond_with_handler(_range_handler(content))
+        assert komparu.compare(str(local), httpserver.url_for("/remote")) is True
+        assert [request.method for request, _ in httpserver.log] == ["GET"]
+
+    def test_no_range_body_larger_than_probe(self, httpserver: HTTPServer, make_file):
+        """A server ignoring Range still serves files past the first 64 KiB."""
+        content = os.urandom(100_000)
+        local = make_file("local.bin", content)
+        httpserver.expect_request("/remote").respond_with_data(content)
+        assert komparu.compare(
+            str(local), httpserver.url_for("/remote"), chunk_size=131072,
+        ) is True
+
+    def test_no_range_streamed_in_chunks(self, httpserver: HTTPServer, make_file):
+        """A server ignoring Range is read through one GET, chunk by chunk."""
+        content = os.urandom(300_000)
+        changed = content[:-1] + bytes([content[-1] ^ 0xFF])
+        local = make_file("local.bin", content)
+        httpserver.expect_request("/same").respond_with_data(content)
+        httpserver.expect_request("/changed").respond_with_data(changed)
+        assert komparu.compare(
+            str(local), httpserver.url_for("/same"), chunk_size=4096,
+        ) is True
+        # The aborted probe, then the streamed body
+        assert len(httpserver.log) == 2
+        for url, expected in (("/same", True), ("/changed", False)):
+            url = httpserver.url_for(url)
+            assert komparu.compare(url, str(local), chunk_size=4096) is expected
+            assert komparu.compare(url, url, chunk_size=4096) is True
+
+    def test_empty_remote(self, httpserver: HTTPServer, make_file):
+        local = make_file("local.bin", b"")
+        httpserver.expect_request("/remote").respond_with_data(b"")
+        assert komparu.compare(str(local), httpserver.url_for("/remote")) is True
+
+    def test_size_mismatch_fetches_at_most_local_size(self, httpserver: HTTPServer, make_file):
+        """Opening against a smaller local file stops at its size."""
+        content = os.urandom(1 << 20)
+        httpserver.expect_request("/remote").respond_with_handler(_range_handler(content))
+        for local_content, expected_range in ((b"x" * 1000, "bytes=0-999"), (b"", "bytes=0-0")):
+            httpserver.clear_log()
+            local = make_file("local.bin", local_content)
+            assert komparu.compare(str(local), httpserver.url_for("/remote")) is False
+            assert [request.headers.get("Range") for request, _ in httpserver.log] == [expected_range]
+
+
 class TestHttpHeaders:
     """Custom headers are sent correctly."""
 
@@ -109,6 +203,26 @@ class TestHttpHeaders:
             headers={"Authorization": "Bearer test_token"},
         ) is True
 
+    def test_source_headers_in_batch(self, httpserver: HTTPServer, make_file):
+        """Per-Source headers apply to every pair of compare_all/compare_many."""
+        content = b"auth protected content"
+        local = make_file("local.bin", content)
+
+        def handler(request):
+            if request.headers.get("Authorization") != "Bearer src_token":
+                return Response("Unauthorized", status=401)
+            return Response(content, status=200)
+
+        httpserver.expect_request("/protected").respond_with_handler(handler)
+        src = komparu.Source(httpserver.url_for("/protected"),
+                             headers={"Authorization": "Bearer src_token"})
+        other = make_file("other.bin", b"something else")
+
+        assert komparu.compare_all([str(local), src], max_workers=1) is True
+        result = komparu.compare_many([str(other), src, str(local)], max_workers=1)
+        assert result.diff[(src.url, str(local))] is True
+        assert result.diff[(str(other), src.url)] is False
+
 
 class TestHttpErrors:
     """HTTP error handling."""
@@ -167,3 +281,39 @@ class TestHttpRangeSupport:
             httpserver.url_for("/a"),
             httpserver.url_for("/b"),
         ) is True
+
+    def test_quick_check_samples_are_small(self, httpserver: HTTPServer):
+        """Quick check fetches a page per sample point, not a chunk."""
+        size = 1 << 20
+        content_a = os.urandom(size)
+        mid = size // 2
+        content_b = content_a[:mid] + bytes([content_a[mid] ^ 0xFF]) + content_a[mid + 1:]
+        served = {"/a": 0, "/b": 0}
+
+        def handler_for(path, content):
+            def handler(request):
+                range_header = request.headers.get("Range")
+                if range_header and range_header.startswith("bytes="):
+                    start, end = range_header[6:].split("-")
+                    start = int(start)
+                    end = min(int(end) if end else len(content) - 1, len(content) - 1)
+                    chunk = content[start:end + 1]
+                    served[path] += len(chunk)
+                    resp = Response(chunk, status=206)
+                    resp.headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+                    return resp
+                resp = Response(b"" if request.method == "HEAD" else content, status=200)
+                resp.headers["Content-Length"] = str(len(content))
+                resp.headers["Accept-Ranges"] = "bytes"
+                return resp
+            return handler
+
+        httpserver.expect_request("/a").respond_with_handler(handler_for("/a", content_a))
+        httpserver.expect_request("/b").respond_with_handler(handler_for("/b", content_b))
+
+        # Opening fetches the first 64 KiB, which covers the start sample;
+        # then end, 25% and 50%, which hits the flipped byte
+        assert komparu.compare(
+            httpserver.url_for("/a"), httpserver.url_for("/b"), chunk_size=65536,
+        ) is False
+        assert served == {"/a": 65536 + 3 * 4096, "/b": 65536 + 3 * 4096}
@@ -148,6 +148,20 @@ class TestCompareEdgeCases:
         # Very large chunk
         assert komparu.compare(str(a), str(b), chunk_size=1024 * 1024) is True
 
+    def test_read_size_growth(self, make_file):
+        """Small files are read in one call; larger ones grow the buffer."""
+        for size in (1, 200, 4095, 4096, 4097, 70_000, 300_000):
+            content = os.urandom(size)
+            a = make_file(f"a{size}.bin", content)
+            b = make_file(f"b{size}.bin", content)
+            c = make_file(f"c{size}.bin", content[:-1] + bytes([content[-1] ^ 1]))
+            d = make_file(f"d{size}.bin", content + b"x")
+            opts = {"size_precheck": False, "quick_check": False}
+            assert komparu.compare(str(a), str(b), **opts) is True
+            assert komparu.compare(str(a), str(c), **opts) is False
+            assert komparu.compare(str(a), str(d), **opts) is False
+            assert komparu.compare(str(d), str(a), **opts) is False
+
     def test_binary_content(self, make_file):
         """All byte values 0-255."""
         content = bytes(range(256)) * 10
@@ -181,6 +195,71 @@ class TestCompareEdgeCases:
         link.symlink_to(a)
         assert komparu.compare(str(a), str(link)) is True
 
+    def test_same_file_short_circuit(self, make_file, tmp_dir, monkeypatch):
+        """Same path, symlink or hard link is equal without reading."""
+        import komparu._api as api
+
+        a = make_file("a.txt", b"data")
+        link = tmp_dir / "link.txt"
+        link.symlink_to(a)
+        hard = tmp_dir / "hard.txt"
+        os.link(a, hard)
+
+        def fail(*args):
+            raise AssertionError("file was read")
+
+        monkeypatch.setattr(api, "_compare_resolved", fail)
+        assert komparu.compare(str(a), str(a)) is True
+        assert komparu.compare(str(a), str(link)) is True
+        assert komparu.compare(str(hard), str(link)) is True
+
+    def test_one_stat_per_path(self, make_file, monkeypatch):
+        """Auto chunk sizing and the same-file check share their stat calls."""
+        a = make_file("a.txt", b"data")
+        b = make_file("b.txt", b"data")
+        calls = []
+        real = os.stat
+
+        def counting(path, *args, **kwargs):
+            calls.append(path)
+            return real(path, *args, **kwargs)
+
+        monkeypatch.setattr(os, "stat", counting)
+        assert komparu.compare(str(a), str(b)) is True
+        assert calls == [str(a), str(b)]
+
+    def test_uncached_large_files(self, make_file):
+        """Large files evicted from the page cache are read in blocks."""
+        content = os.urandom(3 * 1024 * 1024 + 123)
+        paths = {
+            "same": make_file("same.bin", content),
+            "a": make_file("a.bin", content),
+            "mid": make_file("mid.bin", content[:1_500_000] + b"x" + content[1_500_001:]),
+            "end": make_file("end.bin", content[:-1] + bytes([content[-1] ^ 0xFF])),
+        }
+
+        def evict():
+            if not hasattr(os, "posix_fadvise"):
+                return
+            for path in paths.values():
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                finally:
+                    os.close(fd)
+
+        for opts in ({}, {"quick_check": False, "chunk_size": 100_000}):
+            for name, expected in (("same", True), ("mid", False), ("end", False)):
+                evict()
+                assert komparu.compare(str(paths["a"]), str(paths[name]), **opts) is expected
+
+    def test_same_path_errors_still_raised(self, tmp_dir):
+        """The short-circuit only applies to existing regular files."""
+        missing = str(tmp_dir / "missing")
+        with pytest.raises(FileNotFoundError):
+            komparu.compare(missing, missing)
+
     def test_broken_symlink(self, tmp_dir):
         link = tmp_dir / "broken_link"
         link.symlink_to(tmp_dir / "nonexistent_target")
@@ -350,3 +429,57 @@ class TestSpecialCharFilePaths:
         a = make_file("dir with spaces/a.txt", content)
         b = make_file("dir with spaces/b.txt", content)
         assert komparu.compare(str(a), str(b)) is True
+
+
+class TestFingerprint:
+    """_core.fingerprint — content digest used by compare_many."""
+
+    def test_equal_content_equal_digest(self, tmp_path: Path):
+        from komparu._core import fingerprint
+
+        a = tmp_path / "a.bin"
+        b = tmp_path / "b.bin"
+        a.write_bytes(os.urandom(200_000))
+        b.write_bytes(a.read_bytes())
+        assert len(fingerprint(str(a))) == 24
+        assert fingerprint(str(a)) == fingerprint(str(b), chunk_size=4096)
+
+    def test_different_content_different_digest(self, tmp_path: Path):
+        from komparu._core import fingerprint
+
+        a = tmp_path / "a.bin"
+        b = tmp_path / "b.bin"
+        a.write_bytes(b"x" * 1000)
+        b.write_bytes(b"x" * 999 + b"y")
+        assert fingerprint(str(a)) != fingerprint(str(b))
+
+    def test_digest_independent_of_read_sizes(self, tmp_path: Path):
+        """Reads that split 32-byte stripes give the same digest."""
+        from komparu._core import fingerprint
+
+        a = tmp_path / "a.bin"
+        a.write_bytes(os.urandom(10_001))
+        digests = {fingerprint(str(a), chunk_size=n) for n in (1, 7, 33, 1000, 65536)}
+        assert len(digests) == 1
+
+    def test_short_inputs_distinct(self, tmp_path: Path):
+        """Lengths around the stripe size and single-byte changes differ."""
+        from komparu._core import fingerprint
+
+        base = bytes(range(80))
+        digests = set()
+        for n in range(81):
+            p = tmp_path / f"len{n}.bin"
+            p.write_bytes(base[:n])
+            digests.add(fingerprint(str(p))[:16])
+        for i in range(80):
+            p = tmp_path / f"flip{i}.bin"
+            p.write_bytes(base[:i] + b"\xff" + base[i + 1:])
+            digests.add(fingerprint(str(p))[:16])
+        assert len(digests) == 81 + 80
+
+    def test_missing_file(self, tmp_path: Path):
+        from komparu._core import fingerprint
+
+        with pytest.raises(FileNotFoundError):
+            fingerprint(str(tmp_path / "missing"))
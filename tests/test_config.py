@@ -6,6 +6,7 @@ import pytest
 
 import komparu
 from komparu._config import get_config, reset_config
+from komparu._helpers import local_stats, pair_needs_stat, resolve_pair
 
 
 class TestConfigure:
@@ -19,6 +20,7 @@ class TestConfigure:
     def test_defaults(self):
         cfg = get_config()
         assert cfg.chunk_size == 65536
+        assert cfg.auto_chunk is True
         assert cfg.max_workers == 0
         assert cfg.timeout == 30.0
         assert cfg.follow_redirects is True
@@ -55,3 +57,73 @@ class TestConfigure:
         komparu.configure(chunk_size=999)
         reset_config()
         assert get_config().chunk_size == 65536
+
+
+def _resolve(path_a, path_b, chunk_size):
+    return resolve_pair(path_a, path_b, chunk_size, *local_stats((path_a, path_b)))
+
+
+class TestAutoChunk:
+
+    def setup_method(self):
+        reset_config()
+
+    def teardown_method(self):
+        reset_config()
+
+    def test_small_local_files(self, make_file):
+        a = make_file("a.bin", b"x" * 100)
+        b = make_file("b.bin", b"x" * 100)
+        assert _resolve(str(a), str(b), None) == (16384, False)
+
+    def test_large_local_files(self, make_file):
+        a = make_file("a.bin", b"\0" * (4 * 1024 * 1024))
+        b = make_file("b.bin", b"\0" * 10)
+        assert _resolve(str(a), str(b), None)[0] == 262144
+
+    def test_medium_local_files_use_default(self, make_file):
+        a = make_file("a.bin", b"x" * (512 * 1024))
+        b = make_file("b.bin", b"x" * (512 * 1024))
+        assert _resolve(str(a), str(b), None)[0] == 65536
+
+    def test_url_source(self, make_file):
+        a = make_file("a.bin", b"x" * 100)
+        assert _resolve(str(a), "https://example.com/f", None)[0] == 65536
+
+    def test_configured_chunk_size_wins(self, make_file):
+        komparu.configure(chunk_size=1024)
+        small = make_file("a.bin", b"x" * 100)
+        large = make_file("b.bin", b"\0" * (4 * 1024 * 1024))
+        assert _resolve(str(small), "https://example.com/f", None)[0] == 1024
+        assert _resolve(str(small), str(small), None) == (1024, True)
+        assert _resolve(str(large), str(small), None)[0] == 1024
+
+    def test_missing_file_falls_back(self, tmp_dir):
+        komparu.configure(chunk_size=4096)
+        missing = str(tmp_dir / "nope")
+        assert _resolve(missing, missing, None) == (4096, False)
+
+    def test_explicit_or_disabled(self, make_file):
+        a = make_file("a.bin", b"x" * 100)
+        assert _resolve(str(a), str(a), 1000) == (1000, True)
+        komparu.configure(auto_chunk=False, chunk_size=4096)
+        assert _resolve(str(a), str(a), None) == (4096, True)
+
+    def test_pair_needs_stat(self):
+        assert pair_needs_stat("/a", "/b", None) is True
+        assert pair_needs_stat("/a", "/b", 4096) is False
+        assert pair_needs_stat("/a", "https://example.com/f", None) is False
+        komparu.configure(chunk_size=1024)
+        assert pair_needs_stat("/a", "/b", None) is False
+        komparu.configure(chunk_size=65536, auto_chunk=False)
+        assert pair_needs_stat("/a", "/b", None) is False
+
+    def test_unknown_stats_fall_back(self):
+        assert resolve_pair("/a", "/b", None, None, None) == (65536, False)
+
+    def test_compare_uses_auto_chunk(self, make_file):
+        a = make_file("a.bin", b"same content")
+        b = make_file("b.bin", b"same content")
+        assert komparu.compare(str(a), str(b)) is True
+        komparu.configure(auto_chunk=False)
+        assert komparu.compare(str(a), str(b)) is True
@@ -81,6 +81,21 @@ class TestParallelDirCompare:
         result = komparu.compare_dir(str(a), str(b), max_workers=8)
         assert result.equal is True
 
+    def test_reused_pools_concurrent_callers(self, make_dir):
+        """Pools cached between calls are never shared by two callers."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        files = {f"f{i}.txt": f"content_{i}".encode() for i in range(30)}
+        a = make_dir("a", files)
+        b = make_dir("b", {**files, "f7.txt": b"changed"})
+
+        def run(k: int) -> set[str]:
+            result = komparu.compare_dir(str(a), str(b), max_workers=2 + k % 3)
+            return set(result.diff)
+
+        with ThreadPoolExecutor(max_workers=6) as ex:
+            assert all(diff == {"f7.txt"} for diff in ex.map(run, range(60)))
+
     def test_sequential_fallback(self, make_dir):
         """max_workers=1 forces sequential comparison."""
         files = {"a.txt": b"hello", "b.txt": b"world"}
@@ -165,6 +180,33 @@ class TestCompareAll:
         p.write_bytes(b"data")
         assert komparu.compare_all([str(p), str(p), str(p)]) is True
 
+    def test_cancel_flag(self, tmp_path: Path):
+        """A set cancel flag fails the comparison at its next read."""
+        from komparu._core import cancel_flag_new, cancel_flag_set, compare
+
+        a = tmp_path / "a.bin"
+        b = tmp_path / "b.bin"
+        content = os.urandom(100_000)
+        a.write_bytes(content)
+        b.write_bytes(content)
+        flag = cancel_flag_new()
+        assert compare(str(a), str(b), cancel=flag) is True
+        cancel_flag_set(flag)
+        with pytest.raises(IOError):
+            compare(str(a), str(b), cancel=flag)
+
+    def test_mismatch_among_large_files(self, tmp_path: Path):
+        content = os.urandom(1 << 20)
+        paths = []
+        for i in range(6):
+            p = tmp_path / f"file_{i}.bin"
+            p.write_bytes(content)
+            paths.append(str(p))
+        p = tmp_path / "file_diff.bin"
+        p.write_bytes(b"x" + content[1:])
+        paths.insert(1, str(p))
+        assert komparu.compare_all(paths, chunk_size=4096, max_workers=4) is False
+
 
 # =========================================================================
 # compare_many
@@ -251,6 +293,267 @@ class TestCompareMany:
         assert result.all_equal is True
         assert len(result.groups) == 1
 
+    def test_diff_complete_with_representative(self, tmp_path: Path):
+        """Every pair is reported, including pairs inferred from sources[0]."""
+        contents = [b"x", b"x", b"y", b"x", b"y", b"z"]
+        paths = []
+        for i, c in enumerate(contents):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(c)
+            paths.append(str(p))
+
+        result = komparu.compare_many(paths, max_workers=1)
+        assert len(result.diff) == 15
+        for i in range(6):
+            for j in range(i + 1, 6):
+                assert result.diff[(paths[i], paths[j])] is (contents[i] == contents[j])
+        assert sorted(len(g) for g in result.groups) == [1, 2, 3]
+
+    def test_only_mismatches_compared_pairwise(self, tmp_path: Path, monkeypatch):
+        """Sources equal to sources[0] are not compared against each other."""
+        import komparu._api as api
+
+        paths = []
+        for i in range(5):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(b"same" if i < 4 else b"diff")
+            paths.append(str(p))
+
+        calls = []
+        real = api._compare_resolved
+
+        def counting(a, b, resolved):
+            calls.append((a, b))
+            return real(a, b, resolved)
+
+        monkeypatch.setattr(api, "_compare_resolved", counting)
+        result = komparu.compare_many(paths, max_workers=1)
+        assert len(calls) == 4
+        assert result.all_equal is False
+        assert len(result.diff) == 10
+
+    def test_many_mismatches_bucketed_by_fingerprint(self, tmp_path: Path, monkeypatch):
+        """From 8 leftovers on, only sources with equal fingerprints are compared."""
+        import komparu._api as api
+
+        # sources[0] plus 4 groups of 3 of the same size, and 2 files of
+        # a size of their own which are never fingerprinted
+        contents = [b"base"] + [b"g%d" % (i // 3) for i in range(12)] + [b"x", b"long"]
+        paths = []
+        for i, c in enumerate(contents):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(c)
+            paths.append(str(p))
+
+        calls = []
+        hashed = []
+        real_cmp = api._compare_resolved
+        real_fp = api._fingerprint_c
+
+        def counting(a, b, resolved):
+            calls.append((a, b))
+            return real_cmp(a, b, resolved)
+
+        def fingerprint(path, *args, **kwargs):
+            hashed.append(path)
+            return real_fp(path, *args, **kwargs)
+
+        monkeypatch.setattr(api, "_compare_resolved", counting)
+        monkeypatch.setattr(api, "_fingerprint_c", fingerprint)
+        result = komparu.compare_many(paths, max_workers=1)
+        # 14 against sources[0], then 2 per group of 3 instead of C(14, 2)
+        assert len(calls) == 14 + 4 * 2
+        assert sorted(hashed) == sorted(paths[1:13])
+        assert sorted(len(g) for g in result.groups) == [1, 1, 1, 3, 3, 3, 3]
+        assert result.diff == {
+            (paths[i], paths[j]): contents[i] == contents[j]
+            for i in range(15) for j in range(i + 1, 15)
+        }
+
+    def test_colliding_fingerprints_confirmed(self, tmp_path: Path, hash_collision):
+        """A fingerprint bucket is only a candidate: bytes decide."""
+        from komparu._core import fingerprint
+
+        left, right = hash_collision
+        contents = [b"base" * 16, left, right] + [bytes([i]) * 64 for i in range(8)]
+        paths = []
+        for i, c in enumerate(contents):
+            p = tmp_path / f"f{i}.bin"
+            p.write_bytes(c)
+            paths.append(str(p))
+        assert fingerprint(paths[1]) == fingerprint(paths[2])
+
+        result = komparu.compare_many(paths)
+        assert result.diff[(paths[1], paths[2])] is False
+        assert sorted(len(g) for g in result.groups) == [1] * 11
+
+    def test_unique_samples_not_fingerprinted(self, tmp_path: Path, monkeypatch):
+        """Same-size files whose sampled chunks differ are never read in full."""
+        import komparu._api as api
+
+        size = 1 << 20
+        base = bytes(size)
+        paths = []
+        # 9 distinct files, then a pair that differs only past the samples
+        for i in range(9):
+            data = bytearray(base)
+            data[size // 2] = i + 1
+            paths.append(tmp_path / f"u{i}.bin")
+            paths[-1].write_bytes(bytes(data))
+        for i in range(2):
+            data = bytearray(base)
+            data[size // 2] = 99
+            data[size // 3] = i
+            paths.append(tmp_path / f"p{i}.bin")
+            paths[-1].write_bytes(bytes(data))
+        paths = [str(p) for p in paths]
+
+        full = []
+        real_fp = api._fingerprint_c
+
+        def fingerprint(path, *args, samples=False):
+            if not samples:
+                full.append(path)
+            return real_fp(path, *args, samples=samples)
+
+        monkeypatch.setattr(api, "_fingerprint_c", fingerprint)
+        result = komparu.compare_many(paths, max_workers=1)
+        assert sorted(full) == sorted(paths[9:])
+        assert sorted(len(g) for g in result.groups) == [1] * 11
+        assert not any(result.diff.values())
+
+    def test_fingerprints_cached_between_calls(self, tmp_path: Path, monkeypatch):
+        """Unchanged files are not re-read; cached digests also bucket
+        fewer than 8 leftovers."""
+        from collections import OrderedDict
+
+        import komparu._api as api
+        import komparu._helpers as helpers
+
+        # Files written by the test are too fresh to cache otherwise
+        monkeypatch.setattr(helpers, "_FINGERPRINT_MIN_AGE_NS", 0)
+        monkeypatch.setattr(helpers, "_fingerprint_cache", OrderedDict())
+
+        contents = [b"base"] + [b"g%d" % (i % 3) for i in range(9)]
+        paths = []
+        for i, c in enumerate(contents):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(c)
+            paths.append(str(p))
+
+        calls = []
+        hashed = []
+        real_cmp = api._compare_resolved
+        real_fp = api._fingerprint_c
+
+        def counting(a, b, resolved):
+            calls.append((a, b))
+            return real_cmp(a, b, resolved)
+
+        def fingerprint(path, *args, **kwargs):
+            hashed.append(path)
+            return real_fp(path, *args, **kwargs)
+
+        monkeypatch.setattr(api, "_compare_resolved", counting)
+        monkeypatch.setattr(api, "_fingerprint_c", fingerprint)
+
+        first = komparu.compare_many(paths, max_workers=1)
+        assert sorted(hashed) == sorted(paths[1:])
+        hashed.clear()
+        assert komparu.compare_many(paths, max_workers=1).diff == first.diff
+        assert hashed == []
+
+        # A rewrite changes the file's key, so only it is read again
+        (tmp_path / "f1.txt").write_bytes(b"g1")
+        komparu.compare_many(paths, max_workers=1)
+        assert hashed == [paths[1]]
+
+        # 3 leftovers, all cached: one check per bucket, no pairwise round
+        hashed.clear()
+        calls.clear()
+        small = [paths[0], paths[3], paths[4], paths[6]]  # base, g2, g0, g2
+        result = komparu.compare_many(small, max_workers=1)
+        assert hashed == []
+        assert len(calls) == 3 + 1
+        assert sorted(len(g) for g in result.groups) == [1, 1, 2]
+
+    def test_group_roots(self):
+        """Equal results merge groups, unequal ones never split them."""
+        from komparu._helpers import group_roots
+
+        n = 1000
+        pairs = [(i, i + 1, True) for i in range(0, n - 1, 2)]
+        pairs += [(i, i + 2, True) for i in range(n - 2)]
+        pairs += [(0, 1, False), (3, 999, False)]
+        assert len(set(group_roots(n, *zip(*pairs)))) == 1
+
+        roots = group_roots(4, [0, 2, 1], [1, 3, 3], [True, False, True])
+        assert roots[0] == roots[1] == roots[3] != roots[2]
+
+    def test_large_diff_is_group_view(self, tmp_path: Path):
+        """From 32 sources on, diff is a read-only view over the groups."""
+        from collections.abc import Mapping
+
+        contents = [b"abc"[i % 3:i % 3 + 1] for i in range(40)]
+        paths = []
+        for i, c in enumerate(contents):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(c)
+            paths.append(str(p))
+
+        result = komparu.compare_many(paths)
+        diff = result.diff
+        assert isinstance(diff, Mapping) and not isinstance(diff, dict)
+        expected = {
+            (paths[i], paths[j]): contents[i] == contents[j]
+            for i in range(40) for j in range(i + 1, 40)
+        }
+        assert len(diff) == len(expected) == 780
+        assert diff == expected
+        assert list(diff) == list(expected)
+        assert (paths[1], paths[0]) not in diff
+        assert ("nope", paths[0]) not in diff
+        with pytest.raises(KeyError):
+            diff[(paths[3], paths[3])]
+        assert sorted(len(g) for g in result.groups) == [13, 13, 14]
+
+    def test_small_diff_is_dict(self, tmp_path: Path):
+        paths = []
+        for i in range(31):
+            p = tmp_path / f"f{i}.txt"
+            p.write_bytes(b"x")
+            paths.append(str(p))
+        assert type(komparu.compare_many(paths).diff) is dict
+
+    def test_same_file_sources_not_read(self, tmp_path: Path, monkeypatch):
+        """Repeated paths, symlinks and hard links share one comparison."""
+        import komparu._api as api
+
+        a = tmp_path / "a.txt"
+        a.write_bytes(b"same")
+        b = tmp_path / "b.txt"
+        b.write_bytes(b"diff")
+        link = tmp_path / "link.txt"
+        link.symlink_to(a)
+        hard = tmp_path / "hard.txt"
+        os.link(a, hard)
+        paths = [str(a), str(link), str(b), str(hard), str(a)]
+
+        calls = []
+        real = api._compare_resolved
+
+        def counting(x, y, resolved):
+            calls.append((x, y))
+            return real(x, y, resolved)
+
+        monkeypatch.setattr(api, "_compare_resolved", counting)
+        result = komparu.compare_many(paths, max_workers=1)
+        assert calls == [(str(a), str(b))]
+        assert result.diff[(str(a), str(link))] is True
+        assert result.diff[(str(link), str(hard))] is True
+        assert result.diff[(str(link), str(b))] is False
+        assert sorted(len(g) for g in result.groups) == [1, 3]
+
 
 # =========================================================================
 # compare_dir_urls
@@ -269,6 +572,24 @@ class TestCompareDirUrls:
         result = komparu.compare_dir_urls(str(d), url_map)
         assert result.equal is True
 
+    def test_config_headers_fallback(self, make_dir, httpserver):
+        """configure(headers=...) applies when no headers are passed."""
+        from werkzeug.wrappers import Response
+
+        content = b"hello world"
+        d = make_dir("local", {"file.txt": content})
+
+        def handler(request):
+            if request.headers.get("Authorization") != "Bearer cfg":
+                return Response("Unauthorized", status=401)
+            return Response(content, status=200)
+
+        httpserver.expect_request("/file.txt").respond_with_handler(handler)
+        url_map = {"file.txt": httpserver.url_for("/file.txt")}
+        komparu.configure(headers={"Authorization": "Bearer cfg"})
+        assert komparu.compare_dir_urls(str(d), url_map).equal is True
+        assert komparu.compare_dir_urls(str(d), url_map, headers={}).equal is False
+
     def test_content_mismatch(self, make_dir, httpserver):
         d = make_dir("local", {"file.txt": b"local_version_"})
         httpserver.expect_request("/file.txt").respond_with_data(b"remote_version")
@@ -304,6 +625,76 @@ class TestCompareDirUrls:
         assert result.equal is False
         assert result.only_right == {"b.txt"}
 
+    def test_large_unsorted_map(self, make_dir, httpserver):
+        """Map order does not matter; entries are merged by sorted path."""
+        d = make_dir("local", {"m500.txt": b"data", "local.txt": b"x"})
+        httpserver.expect_request("/m500.txt").respond_with_data(b"data")
+
+        names = [f"m{i}.txt" for i in reversed(range(5000))]
+        url_map = {name: httpserver.url_for(f"/{name}") for name in names}
+        result = komparu.compare_dir_urls(str(d), url_map)
+        assert result.diff == {}
+        assert result.only_left == {"local.txt"}
+        assert result.only_right == set(names) - {"m500.txt"}
+
+    def test_sorted_map_with_late_outlier(self, make_dir, httpserver):
+        """A map in key order except for its last entry is still merged right."""
+        d = make_dir("local", {"a.txt": b"data", "m1.txt": b"data"})
+        httpserver.expect_request("/a.txt").respond_with_data(b"data")
+        httpserver.expect_request("/m1.txt").respond_with_data(b"data")
+
+        names = sorted(f"m{i}.txt" for i in range(5000)) + ["a.txt"]
+        url_map = {name: httpserver.url_for(f"/{name}") for name in names}
+        result = komparu.compare_dir_urls(str(d), url_map)
+        assert result.diff == {}
+        assert result.only_left == set()
+        assert result.only_right == set(names) - {"a.txt", "m1.txt"}
+
+    def test_keep_alive_connections_reused(self, make_dir):
+        """More concurrent workers than curl's default cache of 4 idle
+        connections still reuse them instead of reconnecting per file."""
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        files = {f"f{i:02}.txt": f"data_{i}".encode() for i in range(40)}
+        d = make_dir("local", files)
+        connections = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                connections.append(None)
+                super().setup()
+
+            def do_GET(self):
+                body = files[self.path.lstrip("/")]
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            url_map = {name: f"{base}/{name}" for name in files}
+            for _ in range(3):
+                assert komparu.compare_dir_urls(str(d), url_map, max_workers=8).equal
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert len(connections) <= 8
+
+    def test_non_string_map_value(self, make_dir):
+        d = make_dir("local", {"a.txt": b"data"})
+        with pytest.raises(TypeError):
+            komparu.compare_dir_urls(str(d), {"a.txt": 1})
+
     def test_multiple_files(self, make_dir, httpserver):
         files = {f"f{i}.txt": f"content_{i}".encode() for i in range(5)}
         d = make_dir("local", files)
@@ -323,3 +714,18 @@ class TestCompareDirUrls:
         url_map = {name: httpserver.url_for(f"/{name}") for name in files}
         result = komparu.compare_dir_urls(str(d), url_map, max_workers=4)
         assert result.equal is True
+
+    def test_parallel_matches_sequential(self, make_dir, httpserver):
+        files = {f"f{i:02}.txt": f"data_{i}".encode() for i in range(20)}
+        d = make_dir("local", files)
+        for i, (name, content) in enumerate(files.items()):
+            body = content if i % 3 else b"changed!"
+            httpserver.expect_request(f"/{name}").respond_with_data(body)
+
+        url_map = {name: httpserver.url_for(f"/{name}") for name in files}
+        url_map["remote.txt"] = httpserver.url_for("/remote.txt")
+        seq = komparu.compare_dir_urls(str(d), url_map, max_workers=1)
+        par = komparu.compare_dir_urls(str(d), url_map, max_workers=4)
+        assert list(par.diff.items()) == list(seq.diff.items())
+        assert set(par.diff) == {name for i, name in enumerate(files) if i % 3 == 0}
+        assert par.only_right == seq.only_right == {"remote.txt"}
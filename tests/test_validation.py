@@ -1,5 +1,11 @@
 """Tests for parameter validation."""
 
+import dataclasses
+import os
+import pickle
+import subprocess
+import sys
+
 import pytest
 import komparu
 from komparu import Source
@@ -95,6 +101,44 @@ class TestSourceValidation:
         s = Source(url="/path/to/file")
         assert s.url == "/path/to/file"
 
+    def test_hashable_with_headers(self):
+        a = Source(url="https://x/f", headers={"A": "1"}, proxy="http://p:1")
+        b = Source(url="https://x/f", headers={"A": "1"}, proxy="http://p:1")
+        assert a == b
+        assert hash(a) == hash(b)
+        assert {a: 1}[b] == 1
+
+    def test_pickle_round_trip_with_headers(self):
+        a = Source(url="https://x/f", headers={"A": "1"}, proxy="http://p:1")
+        b = pickle.loads(pickle.dumps(a))
+        assert b == a
+        assert hash(b) == hash(a)
+        assert {a: 1}[b] == 1
+
+    def test_unpickled_hash_follows_process_seed(self):
+        # A hash stored on the instance would travel with the pickle and
+        # miss dict lookups in a process with another PYTHONHASHSEED.
+        data = pickle.dumps(Source(url="https://x/f", headers={"A": "1"}))
+        code = (
+            "import pickle, sys; from komparu import Source; "
+            "s = pickle.loads(sys.stdin.buffer.read()); "
+            "f = Source(url='https://x/f', headers={'A': '1'}); "
+            "assert s == f and hash(s) == hash(f) and {f: 1}.get(s) == 1"
+        )
+        for seed in ("1", "2"):
+            env = {**os.environ, "PYTHONHASHSEED": seed}
+            subprocess.run(
+                [sys.executable, "-c", code], input=data, env=env, check=True,
+            )
+
+    def test_no_extra_fields(self):
+        s = Source(url="/f")
+        assert [f.name for f in dataclasses.fields(s)] == [
+            "url", "headers", "timeout", "follow_redirects", "verify_ssl", "proxy",
+        ]
+        assert "_hash" not in dataclasses.asdict(s)
+        assert s != Source(url="/f", timeout=5.0)
+
 
 class TestCompareAllValidation:
     def test_chunk_size_zero(self, tmp_path):
@@ -128,3 +172,9 @@ class TestCompareManyValidation:
         f.write_text("x")
         with pytest.raises(ValueError, match="timeout must be positive"):
             komparu.compare_many([str(f), str(f)], timeout=-1)
+
+    def test_empty_source_validated_once_up_front(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("x")
+        with pytest.raises(ValueError, match=r"sources\[2\] cannot be empty"):
+            komparu.compare_many([str(f), str(f), ""])